@@ -1,3 +1,209 @@
-from django.test import TestCase
+import json
+from datetime import date, time, timedelta
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from Models.models import Usuario, Horarios
+from Models.pruebas import HorariosTestCase
+from SGHSENA import instrumentacion
+
+
+class HorariosJsonTests(HorariosTestCase):
+
+    def setUp(self):
+        caches['catalogos'].clear()
+        caches['default'].clear()
+        self.client.force_login(self.usuario)
+
+    def crear_horarios(self, cantidad, desde=date(2026, 1, 5)):
+        Horarios.objects.bulk_create([self.bloque(fecha=desde + timedelta(days=n)) for n in range(cantidad)])
+
+    def consultas_para(self, cantidad):
+        Horarios.objects.all().delete()
+        self.crear_horarios(cantidad)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('dashboard:horarios_json'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()['eventos']
+
+    def test_numero_de_consultas_constante(self):
+        pocas, _ = self.consultas_para(1)
+        muchas, eventos = self.consultas_para(30)
+        self.assertEqual(pocas, muchas)
+        # 30 días desde un lunes: 4 domingos quedan fuera
+        self.assertEqual(len(eventos), 26)
+
+    def test_excluye_domingos_y_serializa_evento(self):
+        # 2026-01-11 es domingo
+        self.crear_horarios(2, desde=date(2026, 1, 10))
+        eventos = self.client.get(reverse('dashboard:horarios_json')).json()['eventos']
+        self.assertEqual(len(eventos), 1)
+        self.assertEqual(eventos[0], {
+            'id': eventos[0]['id'],
+            'dia_index': 5,
+            'fecha': '2026-01-10',
+            'hora_inicio': '07:00',
+            'hora_fin': '09:00',
+            'competencia': 'Programación',
+            'competencia_id': self.competencia.id_competencia,
+            'color': eventos[0]['color'],
+            'ambiente': 'Sala 1',
+            'ficha': '2500001',
+            'jornada': 'Mañana',
+        })
+
+    def test_ventana_semanal_y_cursor(self):
+        self.crear_horarios(21)  # tres semanas desde el lunes 2026-01-05
+        url = reverse('dashboard:horarios_json')
+
+        # desde/hasta se amplían a la semana completa (lunes a sábado)
+        data = self.client.get(url, {'desde': '2026-01-14', 'hasta': '2026-01-14'}).json()
+        self.assertEqual([e['fecha'] for e in data['eventos']][0], '2026-01-12')
+        self.assertEqual(len(data['eventos']), 6)
+        self.assertIsNone(data['siguiente'])
+
+        vistos, cursor = [], None
+        while True:
+            params = {'limite': 4}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            vistos += [e['id'] for e in data['eventos']]
+            cursor = data['siguiente']
+            if not cursor:
+                break
+        self.assertEqual(len(vistos), 18)
+        self.assertEqual(len(set(vistos)), 18)
+
+    def test_streaming_ndjson(self):
+        self.crear_horarios(7)
+        response = self.client.get(reverse('dashboard:horarios_json'), {'formato': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lineas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lineas), 6)
+        self.assertEqual(json.loads(lineas[0])['fecha'], '2026-01-05')
+
+    def test_parametros_invalidos(self):
+        url = reverse('dashboard:horarios_json')
+        self.assertEqual(self.client.get(url, {'desde': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limite': '0'}).status_code, 400)
+
+    def test_etag_responde_304_si_no_hay_cambios(self):
+        self.crear_horarios(3)
+        url = reverse('dashboard:horarios_json')
+        # bulk_create no envía señales: guardar un bloque cambia la versión
+        Horarios.objects.first().save()
+
+        primera = self.client.get(url)
+        etag = primera['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            segunda = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(segunda.status_code, 304)
+        # Sin frescura heurística: el navegador revalida siempre
+        for respuesta in (primera, segunda):
+            self.assertEqual(set(respuesta['Cache-Control'].split(', ')), {'private', 'no-cache'})
+        self.assertFalse(any('"horarios"' in q['sql'] for q in ctx.captured_queries))
+
+        Horarios.objects.first().delete()
+        tercera = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(tercera.status_code, 200)
+        self.assertNotEqual(tercera['ETag'], etag)
+
+    def test_etag_cambia_al_renombrar_catalogo(self):
+        self.bloque().save()
+        url = reverse('dashboard:horarios_json')
+        etag = self.client.get(url)['ETag']
+
+        self.competencia.nombre_competencia = 'Programación web'
+        self.competencia.save()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['eventos'][0]['competencia'], 'Programación web')
+
+    def test_panel_sin_consultas_de_catalogos(self):
+        url = reverse('dashboard:dashboard_instructor')
+        self.assertContains(self.client.get(url), 'Sala 1')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, '<option value="2500001">2500001</option>', html=True)
+        tablas = ('"ambientes"', '"competencias"', '"fichas"', '"jornadas"', '"niveles_formacion"')
+        self.assertFalse([q for q in ctx.captured_queries if any(t in q['sql'] for t in tablas)])
+
+        # Guardar un catálogo invalida su entrada
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ambiente.nombre_ambiente = 'Sala renombrada'
+            self.ambiente.save()
+        self.assertContains(self.client.get(url), 'Sala renombrada')
+
+    def test_grilla_renderizada_en_servidor_y_en_cache(self):
+        url = reverse('dashboard:dashboard_instructor')
+        hoy = date.today()
+        lunes = hoy - timedelta(days=hoy.weekday())
+        horario = self.bloque(fecha=lunes)
+        horario.save()
+        self.assertContains(self.client.get(url), '07:00 - 09:00')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, '07:00 - 09:00')
+        self.assertFalse(any('"horarios"' in q['sql'] for q in ctx.captured_queries))
+
+        # Guardar el bloque cambia la versión y con ella la llave del fragmento
+        horario.hora_fin = time(10)
+        horario.save()
+        self.assertContains(self.client.get(url), '07:00 - 10:00')
+
+    def test_panel_coordinador_metricas_en_cache(self):
+        coordinador = Usuario.objects.create_user(
+            10000002, 'clave-segura-123', username='coordinador', tipo='COORDINADOR'
+        )
+        self.client.force_login(coordinador)
+        self.crear_horarios(6)
+        url = reverse('dashboard:dashboard_coordinador') + '?fecha=2026-01-07'
+
+        response = self.client.get(url)
+        # 6 bloques de 2 h en la semana del 5 al 10 de enero; ventana de jornada de 6 h
+        self.assertEqual(response.context['ocupacion'][0]['horas_ocupadas'], 12)
+        self.assertEqual(response.context['ocupacion'][0]['porcentaje'], round(100 * 12 / 36, 1))
+        self.assertEqual(response.context['sin_programar'][0]['faltantes'], 28)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, HTTP_IF_NONE_MATCH='')
+        self.assertFalse(any('"horarios"' in q['sql'] for q in ctx.captured_queries))
+
+        # El ETag sigue al cálculo en caché: al vencer el TTL se recalcula y ya no hay 304
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        caches['default'].clear()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_instrumentacion_server_timing_y_presupuesto(self):
+        self.crear_horarios(3)
+        url = reverse('dashboard:horarios_json')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn(f'desc="{len(ctx.captured_queries)} consultas"', response['Server-Timing'])
+
+        with override_settings(PRESUPUESTO_CONSULTAS={'dashboard:horarios_json': 1}):
+            with self.assertLogs('sghsena.rendimiento', 'WARNING') as logs:
+                self.client.get(url, HTTP_IF_NONE_MATCH='')
+        self.assertIn('presupuesto_excedido vista=dashboard:horarios_json', logs.output[0])
+
+        admin = Usuario.objects.create_superuser(10000009, 'clave-segura-123', username='admin')
+        self.client.force_login(admin)
+        self.assertContains(self.client.get('/admin/rendimiento/'), 'dashboard:horarios_json')
+
+        # Las rutas que no existen van todas al mismo buffer
+        antes = len(instrumentacion._muestras)
+        for ruta in ('/wp-login.php', '/.env', '/no/existe/'):
+            self.assertEqual(self.client.get(ruta).status_code, 404)
+        self.assertIn(instrumentacion.SIN_VISTA, instrumentacion._muestras)
+        self.assertLessEqual(len(instrumentacion._muestras), antes + 1)
@@ -4,6 +4,7 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path("instructor/", views.dashboard_instructor, name="dashboard_instructor"),
+    path("coordinador/", views.DashboardCoordinadorView.as_view(), name="dashboard_coordinador"),
     path("api/horarios/", views.horarios_json, name="horarios_json"),
     
 ]
\ No newline at end of file
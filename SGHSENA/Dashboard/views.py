@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+import json
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from Models.models import (  # asume que en Dashboard.models importas tus modelos o ajusta el import
@@ -7,15 +8,69 @@ from Models.models import (  # asume que en Dashboard.models importas tus modelo
     Instructores, NivelesFormacion, Horarios
 )
 from django.views.generic import TemplateView
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.contrib import messages
-from datetime import datetime
+from Models.versiones import ambito_instructor, version_de
+from Models.catalogos import catalogos
+from consultas.grilla import GrillaSemana, PALETA, TTL_GRILLA
+from consultas.metricas import metricas_coordinador
+from datetime import date, datetime, time, timedelta
 from django.db.models import Q
 
-# Palette simple (si quieres agregar colores en la base de datos puedes usar el campo)
-PALETTE = [
-    "#f87171", "#60a5fa", "#34d399", "#fbbf24", "#a78bfa",
-    "#fb7185", "#60a5fa", "#f97316", "#7dd3fc", "#fca5a5"
-]
+# Palette simple (la misma de la grilla renderizada en el servidor)
+PALETTE = PALETA
+
+# Tamaño de página del API de horarios (parámetro `limite`)
+LIMITE_POR_DEFECTO = 500
+LIMITE_MAXIMO = 2000
+CHUNK_STREAMING = 500
+
+CAMPOS_EVENTO = (
+    "id_horario", "fecha", "hora_inicio", "hora_fin",
+    "id_competencia_id", "id_competencia__nombre_competencia",
+    "id_ambiente__nombre_ambiente", "id_ficha_id",
+    "id_jornada__nombre_jornada",
+)
+
+
+def evento_json(id_horario, fecha, hora_inicio, hora_fin, comp_id, comp_name,
+                ambiente_name, ficha_id, jornada_name):
+    comp_id = comp_id or 0
+    return {
+        "id": id_horario,
+        "dia_index": fecha.weekday(),  # 0..5 (lunes..sábado)
+        "fecha": fecha.isoformat(),
+        "hora_inicio": hora_inicio.strftime("%H:%M"),
+        "hora_fin": hora_fin.strftime("%H:%M"),
+        "competencia": comp_name or "Sin competencia",
+        "competencia_id": comp_id,
+        # asignar color determinístico desde palette
+        "color": PALETTE[comp_id % len(PALETTE)],
+        "ambiente": ambiente_name or "",
+        "ficha": str(ficha_id) if ficha_id is not None else "",
+        "jornada": jornada_name or "",
+    }
+
+
+def contexto_catalogos():
+    """Listas (id, etiqueta) para los selects de filtros, desde el caché de catálogos."""
+    datos = catalogos("ambientes", "competencias", "fichas", "jornadas", "niveles")
+    return {
+        "ambientes": datos["ambientes"],
+        "competencias": datos["competencias"],
+        "fichas": datos["fichas"],
+        "jornadas": datos["jornadas"],
+        "categoria": datos["niveles"],
+    }
+
+
+def contexto_grilla(instructor):
+    """Semana actual del instructor para el primer pintado (fragmento en caché)."""
+    return {
+        "grilla": GrillaSemana("instructor", instructor.pk if instructor else None, date.today()),
+        "ttl_grilla": TTL_GRILLA,
+    }
 
 
 @login_required
@@ -27,85 +82,151 @@ def dashboard_instructor(request):
     except Instructores.DoesNotExist:
         instructor_obj = None
 
-    context = {
-        "ambientes": Ambientes.objects.all(),
-        "competencias": Competencias.objects.all(),
-        "fichas": Fichas.objects.all(),
-        "jornadas": Jornadas.objects.all(),
-        "categoria": NivelesFormacion.objects.all(),
-        "instructor_logeado": instructor_obj,
-    }
+    context = contexto_catalogos()
+    context.update(contexto_grilla(instructor_obj))
+    context["instructor_logeado"] = instructor_obj
     return render(request, "html/login-instructor/panel_instructor.html", context)
 
 
+def instructor_id_de(request):
+    """id del Instructor del usuario logueado (o None), consultado una vez por request."""
+    if not hasattr(request, "_instructor_id"):
+        request._instructor_id = (
+            Instructores.objects.filter(user=request.user).values_list("id", flat=True).first()
+        )
+    return request._instructor_id
+
+
+def version_instructor(request):
+    if not hasattr(request, "_version_horarios"):
+        instructor_id = instructor_id_de(request)
+        request._version_horarios = (
+            version_de(ambito_instructor(instructor_id)) if instructor_id else None
+        )
+    return request._version_horarios
+
+
+def etag_horarios_instructor(request, *args, **kwargs):
+    version = version_instructor(request)
+    if version is None:
+        return None
+    return f"h{instructor_id_de(request)}-{version[0]}"
+
+
+def ultima_modificacion_instructor(request, *args, **kwargs):
+    version = version_instructor(request)
+    return version[1] if version else None
+
+
 # Endpoint JSON para devolver los horarios filtrados (usado por JS)
+# Si el navegador ya tiene la versión actual responde 304 sin consultar los horarios.
+# no-cache: el navegador guarda la respuesta pero siempre la revalida con el ETag.
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etag_horarios_instructor, last_modified_func=ultima_modificacion_instructor)
 def horarios_json(request):
     # Instructor obligatorio: el logueado
-    try:
-        instructor_obj = Instructores.objects.get(user=request.user)
-    except Instructores.DoesNotExist:
+    instructor_id = instructor_id_de(request)
+    if instructor_id is None:
         return JsonResponse({"error": "Usuario no es instructor"}, status=403)
 
-    qs = Horarios.objects.filter(id_instructor=instructor_obj)
+    try:
+        qs = filtrar_horarios(request.GET, instructor_id)
+        cursor = leer_cursor(request.GET.get("cursor"))
+        limite = request.GET.get("limite")
+        limite = int(limite) if limite else None
+        if limite is not None and limite < 1:
+            raise ValueError("limite")
+    except ValueError:
+        return JsonResponse({"error": "Parámetros inválidos"}, status=400)
+
+    if cursor:
+        fecha_c, hora_c, id_c = cursor
+        qs = qs.filter(
+            Q(fecha__gt=fecha_c) |
+            Q(fecha=fecha_c, hora_inicio__gt=hora_c) |
+            Q(fecha=fecha_c, hora_inicio=hora_c, id_horario__gt=id_c)
+        )
+
+    # Orden estable para el cursor (keyset): fecha, hora_inicio, id_horario
+    filas = qs.order_by("fecha", "hora_inicio", "id_horario").values_list(*CAMPOS_EVENTO)
+
+    # NDJSON: un evento por línea, leyendo la BD por bloques
+    if request.GET.get("formato") == "ndjson":
+        if limite:
+            filas = filas[:limite]
+        lineas = (
+            json.dumps(evento_json(*fila)) + "\n"
+            for fila in filas.iterator(chunk_size=CHUNK_STREAMING)
+        )
+        return StreamingHttpResponse(lineas, content_type="application/x-ndjson")
+
+    limite = min(limite or LIMITE_POR_DEFECTO, LIMITE_MAXIMO)
+    pagina = list(filas[:limite + 1])
+    siguiente = None
+    if len(pagina) > limite:
+        pagina = pagina[:limite]
+        ultima = pagina[-1]
+        siguiente = f"{ultima[1].isoformat()}_{ultima[2].isoformat()}_{ultima[0]}"
+
+    # Armar lista de eventos
+    eventos = [evento_json(*fila) for fila in pagina]
+
+    return JsonResponse({"eventos": eventos, "siguiente": siguiente})
+
+
+def leer_cursor(cursor):
+    """Cursor con formato 'YYYY-MM-DD_HH:MM:SS_id' (el `siguiente` de la página anterior)."""
+    if not cursor:
+        return None
+    fecha, hora, id_horario = cursor.split("_")
+    return (
+        datetime.strptime(fecha, "%Y-%m-%d").date(),
+        time.fromisoformat(hora),
+        int(id_horario),
+    )
+
+
+def filtrar_horarios(params, instructor):
+    """
+    Horarios (Lunes a Sábado) del instructor con los filtros del panel.
+    `desde`/`hasta` se amplían a semanas completas (lunes a domingo).
+    Lanza ValueError si `desde`/`hasta` no tienen formato YYYY-MM-DD.
+    """
+    qs = Horarios.objects.filter(id_instructor=instructor)
 
     # Aplicar filtros opcionales (se envían desde el front)
-    ambiente = request.GET.get("ambiente")
-    competencia = request.GET.get("competencia")
-    ficha = request.GET.get("ficha")
-    jornada = request.GET.get("jornada")
-    fecha = request.GET.get("fecha")  # formato: YYYY-MM-DD
+    ambiente = params.get("ambiente")
+    competencia = params.get("competencia")
+    ficha = params.get("ficha")
+    jornada = params.get("jornada")
+    fecha = params.get("fecha")  # formato: YYYY-MM-DD
+    desde = params.get("desde")
+    hasta = params.get("hasta")
 
     if ambiente:
-        qs = qs.filter(id_ambiente__id_ambiente=ambiente)  # ajuste según FK
+        qs = qs.filter(id_ambiente_id=ambiente)
     if competencia:
-        qs = qs.filter(id_competencia__id_competencia=competencia)
+        qs = qs.filter(id_competencia_id=competencia)
     if ficha:
-        qs = qs.filter(id_ficha__id_ficha=ficha)
+        qs = qs.filter(id_ficha_id=ficha)
     if jornada:
-        qs = qs.filter(id_jornada__id_jornada=jornada)
+        qs = qs.filter(id_jornada_id=jornada)
     if fecha:
         try:
             fecha_obj = datetime.strptime(fecha, "%Y-%m-%d").date()
             qs = qs.filter(fecha=fecha_obj)
         except ValueError:
             pass
+    if desde:
+        desde = datetime.strptime(desde, "%Y-%m-%d").date()
+        qs = qs.filter(fecha__gte=desde - timedelta(days=desde.weekday()))
+    if hasta:
+        hasta = datetime.strptime(hasta, "%Y-%m-%d").date()
+        qs = qs.filter(fecha__lte=hasta + timedelta(days=6 - hasta.weekday()))
 
-    # Armar lista de eventos
-    eventos = []
-    for h in qs:
-        # weekday: Monday=0 ... Sunday=6
-        wk = h.fecha.weekday()
-        # solo mostramos Lunes(0) .. Sábado(5)
-        if wk > 5:
-            continue
-
-        comp = h.id_competencia
-        comp_name = comp.nombre_competencia if comp else "Sin competencia"
-        comp_id = comp.id_competencia if comp else 0
-
-        ambiente_name = h.id_ambiente.nombre_ambiente if h.id_ambiente else ""
-        ficha_name = str(h.id_ficha.id_ficha) if h.id_ficha else ""
-        jornada_name = h.id_jornada.nombre_jornada if h.id_jornada else ""
-
-        # asignar color determinístico desde palette
-        color = PALETTE[comp_id % len(PALETTE)]
-
-        eventos.append({
-            "id": h.id_horario,
-            "dia_index": wk,  # 0..5 (lunes..sábado)
-            "fecha": h.fecha.isoformat(),
-            "hora_inicio": h.hora_inicio.strftime("%H:%M"),
-            "hora_fin": h.hora_fin.strftime("%H:%M"),
-            "competencia": comp_name,
-            "competencia_id": comp_id,
-            "color": color,
-            "ambiente": ambiente_name,
-            "ficha": ficha_name,
-            "jornada": jornada_name,
-        })
-
-    return JsonResponse({"eventos": eventos})
+    # solo mostramos Lunes .. Sábado (week_day: 1=Domingo ... 7=Sábado)
+    return qs.exclude(fecha__week_day=1)
 
 @method_decorator(login_required, name='dispatch')
 class DashboardInstructorView(TemplateView):
@@ -121,17 +242,39 @@ class DashboardInstructorView(TemplateView):
             except Instructores.DoesNotExist:
                 instructor = None
 
-        context["ambientes"] = Ambientes.objects.all()
-        context["competencias"] = Competencias.objects.all()
-        context["fichas"] = Fichas.objects.all()
-        context["jornadas"] = Jornadas.objects.all()
-        context["categoria"] = NivelesFormacion.objects.all()
+        context.update(contexto_catalogos())
+        context.update(contexto_grilla(instructor))
         context["instructor_logeado"] = instructor
 
         return context
 
+def fecha_coordinador(request):
+    """Fecha (`?fecha=YYYY-MM-DD`) de la semana a mostrar; hoy si no viene o es inválida."""
+    try:
+        return datetime.strptime(request.GET.get("fecha", ""), "%Y-%m-%d").date()
+    except ValueError:
+        return date.today()
+
+
+def metricas_de(request):
+    """Métricas de la semana pedida, leídas (o calculadas) una vez por request."""
+    if not hasattr(request, "_metricas"):
+        request._metricas = metricas_coordinador(fecha_coordinador(request))
+    return request._metricas
+
+
+def etag_coordinador(request, *args, **kwargs):
+    # Cambia con cada cálculo de las métricas (versión de horarios o TTL vencido)
+    if getattr(request.user, 'tipo', None) != 'COORDINADOR':
+        return None
+    metricas = metricas_de(request)
+    return f"c{request.user.pk}-{metricas['lunes'].isoformat()}-{metricas['calculado'].timestamp():.6f}"
+
+
 # 🔹 Vista para coordinadores
 @method_decorator(login_required, name='dispatch')
+@method_decorator(cache_control(private=True, no_cache=True), name='dispatch')
+@method_decorator(condition(etag_func=etag_coordinador), name='dispatch')
 class DashboardCoordinadorView(TemplateView):
     template_name = "html/login-coordinador/panel_coordinador.html"
 
@@ -141,3 +284,11 @@ class DashboardCoordinadorView(TemplateView):
             return super().dispatch(request, *args, **kwargs)
         messages.error(request, "No tienes permiso para acceder al panel de coordinador.")
         return redirect('login')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        metricas = metricas_de(self.request)
+        context.update(metricas)
+        context["anterior"] = metricas["lunes"] - timedelta(days=7)
+        context["siguiente"] = metricas["lunes"] + timedelta(days=7)
+        return context
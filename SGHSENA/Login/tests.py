@@ -1,3 +1,44 @@
-from django.test import TestCase
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from Models.models import Usuario
+
+
+class HasherContador(MD5PasswordHasher):
+    """Cuenta cuántas veces se calcula el hash."""
+    llamadas = 0
+
+    def encode(self, password, salt):
+        HasherContador.llamadas += 1
+        return super().encode(password, salt)
+
+
+@override_settings(PASSWORD_HASHERS=['Login.tests.HasherContador'])
+class LoginTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(10000001, 'clave-segura-123', username='ana', tipo='INSTRUCTOR')
+        # Un username que coincide con el documento de otro usuario: gana el documento
+        Usuario.objects.create_user(10000002, 'otra-clave-456', username='10000001', tipo='INSTRUCTOR')
+
+    def intento(self, identificador, password):
+        HasherContador.llamadas = 0
+        with CaptureQueriesContext(connection) as ctx:
+            user = authenticate(None, username=identificador, password=password)
+        return user, len(ctx.captured_queries), HasherContador.llamadas
+
+    def test_una_consulta_y_un_hash(self):
+        self.assertEqual(self.intento('10000001', 'clave-segura-123'), (self.usuario, 1, 1))
+        self.assertEqual(self.intento('ana', 'clave-segura-123'), (self.usuario, 1, 1))
+        self.assertEqual(self.intento('ana', 'errada'), (None, 1, 1))
+        self.assertEqual(self.intento('nadie', 'errada'), (None, 1, 1))
+        self.assertEqual(self.intento('10000001', 'otra-clave-456'), (None, 1, 1))
+
+    def test_vista_de_login(self):
+        respuesta = self.client.post('/login/', {'numero_documento': 'ana', 'password': 'clave-segura-123'})
+        self.assertRedirects(respuesta, '/dashboard/instructor/', fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.usuario.pk)
@@ -1,25 +1,15 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login, get_user_model
+from django.contrib.auth import authenticate, login
 from django.contrib import messages
 
-Usuario = get_user_model()
-
 def login_view(request):
     if request.method == 'POST':
         identificador = request.POST.get('numero_documento')  # puede ser documento o username
         password = request.POST.get('password')
 
-        # Intentar autenticar directamente
+        # El backend resuelve documento o username en una sola consulta
         user = authenticate(request, username=identificador, password=password)
 
-        # Si no se encuentra por username, buscar por numero_documento
-        if user is None:
-            try:
-                usuario_obj = Usuario.objects.get(numero_documento=identificador)
-                user = authenticate(request, username=usuario_obj.username, password=password)
-            except Usuario.DoesNotExist:
-                user = None
-
         if user is not None:
             login(request, user)
 
@@ -1,18 +1,190 @@
 # admin.py
 from django.contrib import admin
+from django.contrib.admin import helpers
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import (
     Usuario, Instructores, Coordinadores, Ambientes, Competencias,
     Contratos, Fichas, Horarios, HorasCumplidas, Jornadas, NivelesFormacion,
-    Perfiles, ProgramasFormacion, ResultadosAprendizaje,JornadaDia
+    Perfiles, ProgramasFormacion, ResultadosAprendizaje,JornadaDia, HorarioRecurrente,
+    ExcepcionRecurrente
 )
 from .forms import UsuarioCreationForm, UsuarioChangeForm, InstructoresAdminForm
 from .forms import CustomAdminAuthForm
 from django import forms
+from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from django.shortcuts import redirect, render
+from django.urls import path
+from .importacion import IMPORTADORES, importar
+from .recurrencias import materializar
+from .dias_semana import DIAS_SEMANA, mascara_de
 
 admin.site.login_form = CustomAdminAuthForm
 
 
+# ===============================================================
+# IMPORTACIÓN MASIVA DESDE EL ADMIN
+# ===============================================================
+class ImportarForm(forms.Form):
+    archivo = forms.FileField(help_text="CSV (UTF-8, separado por coma o punto y coma) o XLSX.")
+
+
+class ImportarMixin:
+    """Agrega la vista `importar/` y el botón "Importar" al listado del modelo."""
+    tipo_importacion = None
+    change_list_template = 'html/admin/change_list_importar.html'
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('importar/', self.admin_site.admin_view(self.importar_view), name='%s_%s_importar' % info),
+        ] + super().get_urls()
+
+    def importar_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:index')
+        form = ImportarForm(request.POST or None, request.FILES or None)
+        resultado = None
+        if request.method == 'POST' and form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            try:
+                resultado = importar(self.tipo_importacion, archivo, archivo.name)
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, f"{resultado.creados} registros creados.")
+        return render(request, 'html/admin/importar.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f"Importar {self.model._meta.verbose_name_plural}",
+            'form': form,
+            'resultado': resultado,
+            'columnas': IMPORTADORES[self.tipo_importacion].columnas,
+        })
+
+
+
+# ===============================================================
+# CAMBIOS MASIVOS DE HORARIOS
+# ===============================================================
+class RangoFechasForm(forms.Form):
+    desde = forms.DateField(required=False, help_text="Opcional: solo los bloques desde esta fecha.")
+    hasta = forms.DateField(required=False, help_text="Opcional: solo los bloques hasta esta fecha.")
+
+
+class MoverForm(RangoFechasForm):
+    dias = forms.IntegerField(initial=7, help_text="Días a correr (negativo hacia atrás).")
+
+
+class ReasignarForm(RangoFechasForm):
+    ambiente = forms.ModelChoiceField(Ambientes.objects.all(), required=False)
+    instructor = forms.ModelChoiceField(Instructores.objects.select_related('user'), required=False)
+
+    def clean(self):
+        datos = super().clean()
+        if not datos.get('ambiente') and not datos.get('instructor'):
+            raise forms.ValidationError("Seleccione un ambiente, un instructor o ambos.")
+        return datos
+
+
+ACCIONES_MASIVAS = {
+    # acción: (formulario, título, función de consultas.masivo)
+    'mover_bloques': (MoverForm, "Mover bloques", 'mover'),
+    'clonar_bloques': (MoverForm, "Clonar bloques", 'clonar'),
+    'reasignar_bloques': (ReasignarForm, "Reasignar ambiente / instructor", 'reasignar'),
+}
+
+
+class AccionesMasivasMixin:
+    """Acciones del listado de Horarios que validan y aplican el cambio completo de una vez."""
+    actions = ['mover_bloques', 'reasignar_bloques', 'clonar_bloques']
+
+    def _accion_masiva(self, request, queryset, accion):
+        from consultas import masivo
+
+        form_class, titulo, funcion = ACCIONES_MASIVAS[accion]
+        form = form_class(request.POST if 'aplicar' in request.POST else None)
+        conflictos = []
+        if form.is_valid():
+            cambiados, conflictos = getattr(masivo, funcion)(queryset, **form.cleaned_data)
+            if not conflictos:
+                self.message_user(request, f"{titulo}: {len(cambiados)} bloques.", messages.SUCCESS)
+                return None
+            self.message_user(request, "No se aplicó ningún cambio: hay bloques con cruce.", messages.ERROR)
+        return render(request, 'html/admin/accion_masiva.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': titulo,
+            'form': form,
+            'accion': accion,
+            'seleccion': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'total': queryset.count(),
+            'conflictos': conflictos,
+        })
+
+    @admin.action(description="Mover bloques seleccionados")
+    def mover_bloques(self, request, queryset):
+        return self._accion_masiva(request, queryset, 'mover_bloques')
+
+    @admin.action(description="Reasignar ambiente / instructor")
+    def reasignar_bloques(self, request, queryset):
+        return self._accion_masiva(request, queryset, 'reasignar_bloques')
+
+    @admin.action(description="Clonar bloques seleccionados")
+    def clonar_bloques(self, request, queryset):
+        return self._accion_masiva(request, queryset, 'clonar_bloques')
+
+
+# ===============================================================
+# LISTADOS GRANDES
+# ===============================================================
+class PaginadorConteoLimitado(Paginator):
+    """
+    Cuenta como máximo `tope` filas. Si hay más, usa la estimación de la
+    tabla (MySQL, solo sin filtros) o se queda en el tope: las últimas
+    páginas de una tabla enorme no se navegan, se filtran.
+    """
+    tope = 10000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        limitado = qs.order_by()[:self.tope + 1].count()
+        if limitado <= self.tope:
+            return limitado
+        return max(self.tope, filas_estimadas(qs))
+
+
+def filas_estimadas(qs):
+    if connection.vendor != 'mysql' or qs.query.where:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [qs.model._meta.db_table],
+        )
+        fila = cursor.fetchone()
+    return (fila[0] or 0) if fila else 0
+
+
+class ListadoGrandeMixin:
+    """Changelist con número fijo de consultas: sin conteo total y con conteo limitado."""
+    paginator = PaginadorConteoLimitado
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class InstructorConUsuarioMixin:
+    """Los campos hacia Instructores traen el usuario: `__str__` muestra su username."""
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.related_model is Instructores:
+            kwargs['queryset'] = Instructores.objects.select_related('user')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 @admin.register(Usuario)
@@ -39,12 +211,19 @@ class UsuarioAdmin(BaseUserAdmin):
         }),
     )
 @admin.register(Instructores)
-class InstructoresAdmin(admin.ModelAdmin):
+class InstructoresAdmin(ImportarMixin, admin.ModelAdmin):
     form = InstructoresAdminForm
-    #list_display = ('especialidad', 'es_lider')
-    list_display=['es_lider']
+    tipo_importacion = 'instructores'
+    list_display = ('id', 'user', 'profesion', 'es_lider')
+    list_select_related = ('user',)
+    list_filter = ('es_lider',)
+    search_fields = ('user__username', '=user__numero_documento', 'profesion')
     #raw_id_fields = ('id_perfil',)
 
+    def get_queryset(self, request):
+        # También lo usa el autocompletado de los demás admins; una fila = una opción
+        return super().get_queryset(request).select_related('user')
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == 'user':
             # Sólo usuarios activos y de tipo INSTRUCTOR
@@ -55,6 +234,7 @@ class CoordinadoresAdmin(admin.ModelAdmin):
     #list_display = ('nombre', 'numero_documento', 'user')
     #list_display = ('nombre', 'user')
     list_display = ['user']
+    list_select_related = ('user',)
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == 'user':
@@ -66,12 +246,23 @@ class CoordinadoresAdmin(admin.ModelAdmin):
     
 
 class JornadaDiaForm(forms.ModelForm):
+    # Una casilla por día; se guardan juntas en `mascara_dias`
+    Lunes = forms.BooleanField(required=False)
+    Martes = forms.BooleanField(required=False)
+    Miercoles = forms.BooleanField(required=False, label='Miércoles')
+    Jueves = forms.BooleanField(required=False)
+    Viernes = forms.BooleanField(required=False)
+    Sabado = forms.BooleanField(required=False, label='Sábado')
+    Domingo = forms.BooleanField(required=False)
+
     class Meta:
         model = JornadaDia
-        fields = ['jornada', 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+        fields = ['jornada']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        for dia in DIAS_SEMANA:
+            self.fields[dia].initial = getattr(self.instance, dia)
         # Añadir la previsualización de los días seleccionados al formulario
         self.fields['dias_seleccionados'] = forms.CharField(
             required=False,
@@ -82,30 +273,18 @@ class JornadaDiaForm(forms.ModelForm):
         self.update_previsualizacion()
 
     def update_previsualizacion(self):
-        dias = []
-        # Recorrer los días y agregar a la lista si están marcados como True
-        if self.instance.Lunes:
-            dias.append('Lunes')
-        if self.instance.Martes:
-            dias.append('Martes')
-        if self.instance.Miercoles:
-            dias.append('Miércoles')
-        if self.instance.Jueves:
-            dias.append('Jueves')
-        if self.instance.Viernes:
-            dias.append('Viernes')
-        if self.instance.Sabado:
-            dias.append('Sábado')
-        if self.instance.Domingo:
-            dias.append('Domingo')
-        
-        # Actualizamos el campo 'dias_seleccionados' con los días seleccionados
-        self.fields['dias_seleccionados'].initial = ', '.join(dias) if dias else "Ningún día seleccionado"
+        self.fields['dias_seleccionados'].initial = self.instance.dias_seleccionados()
+
+    def clean(self):
+        datos = super().clean()
+        self.instance.mascara_dias = mascara_de(dia for dia in DIAS_SEMANA if datos.get(dia))
+        return datos
 
 @admin.register(JornadaDia)
 class JornadaDiaAdmin(admin.ModelAdmin):
     form = JornadaDiaForm
     list_display = ('jornada', 'dias_seleccionados')
+    list_select_related = ('jornada',)
 
     # Definimos el método para acceder a 'dias_seleccionados'
     def dias_seleccionados(self, obj):
@@ -116,16 +295,96 @@ class JornadaDiaAdmin(admin.ModelAdmin):
 
 # Registros simples (¡sin volver a registrar Instructores!)
 
-admin.site.register(Ambientes)
-admin.site.register(Competencias)
+@admin.register(Ambientes)
+class AmbientesAdmin(ImportarMixin, admin.ModelAdmin):
+    list_display = ('id_ambiente', 'nombre_ambiente')
+    search_fields = ('nombre_ambiente', '=id_ambiente')
+    tipo_importacion = 'ambientes'
+
+
+@admin.register(Competencias)
+class CompetenciasAdmin(ImportarMixin, admin.ModelAdmin):
+    tipo_importacion = 'competencias'
+    list_display = ('id_competencia', 'nombre_competencia', 'horas', 'programa_relacionado')
+    list_select_related = ('programa_relacionado',)
+    search_fields = ('nombre_competencia',)
+
+
+@admin.register(Fichas)
+class FichasAdmin(InstructorConUsuarioMixin, ImportarMixin, admin.ModelAdmin):
+    tipo_importacion = 'fichas'
+    list_display = ('id_ficha', 'id_programa', 'id_jornada', 'id_ambiente', 'id_instructor_lider', 'fecha_inicio', 'modalidad')
+    list_select_related = ('id_programa', 'id_jornada', 'id_ambiente', 'id_instructor_lider__user')
+    list_filter = ('id_jornada', 'modalidad')
+    search_fields = ('=id_ficha',)
+    autocomplete_fields = ('id_instructor_lider', 'id_ambiente')
+    date_hierarchy = 'fecha_inicio'
+
+
+@admin.register(Horarios)
+class HorariosAdmin(InstructorConUsuarioMixin, AccionesMasivasMixin, ListadoGrandeMixin, ImportarMixin, admin.ModelAdmin):
+    tipo_importacion = 'horarios'
+    list_display = ('id_horario', 'fecha', 'hora_inicio', 'hora_fin', 'id_ficha', 'id_instructor', 'id_ambiente', 'id_competencia')
+    list_select_related = ('id_ficha', 'id_instructor__user', 'id_ambiente', 'id_competencia')
+    # id_jornada + fecha y fecha + hora_inicio tienen índice (horarios_jornada_fecha_idx, horarios_fecha_hora_idx)
+    list_filter = ('id_jornada',)
+    date_hierarchy = 'fecha'
+    ordering = ('-fecha', 'hora_inicio')
+    autocomplete_fields = ('id_ficha', 'id_instructor', 'id_ambiente', 'id_competencia')
+    raw_id_fields = ('id_recurrente',)
+
+
+@admin.register(HorasCumplidas)
+class HorasCumplidasAdmin(InstructorConUsuarioMixin, ListadoGrandeMixin, admin.ModelAdmin):
+    list_display = ('id_registro', 'fecha', 'id_instructor', 'id_ficha', 'horas_cumplidas')
+    list_select_related = ('id_instructor__user', 'id_ficha')
+    date_hierarchy = 'fecha'
+    ordering = ('-fecha',)
+    autocomplete_fields = ('id_instructor', 'id_ficha')
+
+
+@admin.register(Contratos)
+class ContratosAdmin(InstructorConUsuarioMixin, admin.ModelAdmin):
+    list_display = ('id_contrato', 'tipo_contrato', 'id_instructor', 'fecha_inicio', 'fecha_fin', 'horas_por_cumplir')
+    list_select_related = ('id_instructor__user',)
+    autocomplete_fields = ('id_instructor',)
+
+
+class ExcepcionRecurrenteInline(admin.TabularInline):
+    """Fechas que la regla ya no genera; agregar una cancela esa ocurrencia."""
+    model = ExcepcionRecurrente
+    extra = 0
+    verbose_name = "Fecha excluida"
+    verbose_name_plural = "Fechas excluidas (materializadas o canceladas)"
+
+
+@admin.register(HorarioRecurrente)
+class HorarioRecurrenteAdmin(InstructorConUsuarioMixin, ListadoGrandeMixin, admin.ModelAdmin):
+    list_display = ('id_recurrente', 'id_ficha', 'id_instructor', 'id_ambiente', 'fecha_inicio', 'fecha_fin', 'hora_inicio', 'hora_fin')
+    list_select_related = ('id_ficha', 'id_instructor__user', 'id_ambiente')
+    list_filter = ('id_jornada',)
+    autocomplete_fields = ('id_ficha', 'id_instructor', 'id_ambiente', 'id_competencia')
+    inlines = [ExcepcionRecurrenteInline]
+    actions = ['materializar_ocurrencias']
+
+    @admin.action(description="Materializar ocurrencias en Horarios")
+    def materializar_ocurrencias(self, request, queryset):
+        total, cruces = 0, 0
+        for recurrente in queryset:
+            creados, conflictos = materializar(recurrente)
+            total += len(creados)
+            cruces += len(conflictos)
+        self.message_user(request, f"{total} bloques creados, {cruces} ocurrencias con cruce sin guardar.")
+
+
+@admin.register(ResultadosAprendizaje)
+class ResultadosAprendizajeAdmin(ImportarMixin, admin.ModelAdmin):
+    tipo_importacion = 'resultados'
+
+
 #admin.site.register(CompetenciasFichas)
-admin.site.register(Contratos)
-admin.site.register(Fichas)
-admin.site.register(Horarios)
-admin.site.register(HorasCumplidas)
 admin.site.register(Jornadas)
 admin.site.register(NivelesFormacion)
 admin.site.register(Perfiles)
 admin.site.register(ProgramasFormacion)
-admin.site.register(ResultadosAprendizaje)
 
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ModelsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Models'
+
+    def ready(self):
+        # Registra las señales que mantienen el índice de cruces, las versiones,
+        # el caché de catálogos, el libro de horas, la ocupación por franjas y
+        # las fechas consumidas de los horarios recurrentes al día
+        from . import catalogos, libro_horas, ocupacion, recurrencias, validacion_horarios, versiones  # noqa: F401
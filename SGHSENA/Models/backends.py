@@ -1,24 +1,58 @@
-# <tu_app>/backends.py
+# backends.py
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.db.models import Case, IntegerField, Q, Value, When
+
+
+def leer_documento(identificador):
+    """El identificador como número de documento (7 a 10 dígitos), o None."""
+    if identificador.isdigit() and 7 <= len(identificador) <= 10:
+        return int(identificador)
+    return None
+
+
+def resolver_usuario(identificador):
+    """
+    Usuario por número de documento o por username, en una sola consulta.
+    Si el identificador es a la vez documento de uno y username de otro,
+    gana el documento; un username repetido sin documento que coincida no
+    resuelve a nadie.
+    """
+    User = get_user_model()
+    identificador = str(identificador).strip()
+    documento = leer_documento(identificador)
+    if documento is None:
+        candidatos = list(User._default_manager.filter(username=identificador)[:2])
+    else:
+        candidatos = list(
+            User._default_manager.filter(Q(numero_documento=documento) | Q(username=identificador))
+            .annotate(por_documento=Case(
+                When(numero_documento=documento, then=Value(0)), default=Value(1), output_field=IntegerField()
+            ))
+            .order_by('por_documento')[:2]
+        )
+    if candidatos and candidatos[0].numero_documento == documento:
+        return candidatos[0]
+    return candidatos[0] if len(candidatos) == 1 else None
+
 
 class DocumentoOrUsernameBackend(ModelBackend):
+    """
+    Autenticación por documento o username: una consulta y un solo cálculo
+    del hash, exista o no el usuario (igual que ModelBackend, para no
+    revelar por el tiempo de respuesta qué usuarios existen).
+    """
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        User = get_user_model()
         if username is None:
+            username = kwargs.get(get_user_model().USERNAME_FIELD)
+        if username is None or password is None:
             return None
 
-        user = None
-        # Intentar como documento
-        try:
-            user = User.objects.get(numero_documento=username)
-        except (User.DoesNotExist, ValueError):
-            # Si no es un número de 10 dígitos, intentar como username
-            try:
-                user = User.objects.get(username=username)
-            except User.DoesNotExist:
-                return None
-
-        if user and user.check_password(password) and self.user_can_authenticate(user):
+        user = resolver_usuario(username)
+        if user is None:
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
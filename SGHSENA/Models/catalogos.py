@@ -0,0 +1,76 @@
+# catalogos.py
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .models import Ambientes, Competencias, Fichas, Jornadas, NivelesFormacion
+
+
+# ===============================================================
+# CACHÉ DE CATÁLOGOS (listas para filtros y selects)
+# ===============================================================
+# Cada catálogo se guarda como una lista compacta de tuplas (id, etiqueta)
+# en el caché 'catalogos' (ver settings.CACHES), compartido entre procesos.
+# Las señales post_save / post_delete borran la entrada del modelo afectado
+# cuando la transacción confirma; antes, otra petición podría volver a
+# guardar las filas viejas. CATALOGOS_TTL limita lo que dure una copia vieja.
+
+CACHE_ALIAS = 'catalogos'
+
+CATALOGOS = {
+    'ambientes': (Ambientes, 'id_ambiente', 'nombre_ambiente'),
+    'competencias': (Competencias, 'id_competencia', 'nombre_competencia'),
+    'fichas': (Fichas, 'id_ficha', 'id_ficha'),
+    'jornadas': (Jornadas, 'id_jornada', 'nombre_jornada'),
+    'niveles': (NivelesFormacion, 'id_nivel', 'nombre_nivel'),
+}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _llave(nombre):
+    return f'catalogo:{nombre}'
+
+
+def catalogo(nombre):
+    """Lista de tuplas (id, etiqueta) del catálogo, desde caché si está disponible."""
+    llave = _llave(nombre)
+    datos = _cache().get(llave)
+    if datos is None:
+        modelo, campo_id, campo_etiqueta = CATALOGOS[nombre]
+        datos = [
+            (pk, str(etiqueta))
+            for pk, etiqueta in modelo.objects.order_by(campo_id).values_list(campo_id, campo_etiqueta)
+        ]
+        _cache().set(llave, datos, timeout=settings.CATALOGOS_TTL)
+    return datos
+
+
+def catalogos(*nombres):
+    """Varios catálogos en un diccionario; una sola lectura al caché."""
+    nombres = nombres or tuple(CATALOGOS)
+    encontrados = _cache().get_many([_llave(n) for n in nombres])
+    return {
+        n: encontrados[_llave(n)] if _llave(n) in encontrados else catalogo(n)
+        for n in nombres
+    }
+
+
+def invalidar(nombre):
+    """Borra el catálogo del caché al confirmar la transacción actual (o ya, si no hay)."""
+    transaction.on_commit(lambda: _cache().delete(_llave(nombre)))
+
+
+def _conectar_invalidacion(nombre, modelo):
+    def _invalidar(sender, **kwargs):
+        invalidar(nombre)
+
+    post_save.connect(_invalidar, sender=modelo, weak=False, dispatch_uid=f'catalogo-{nombre}-save')
+    post_delete.connect(_invalidar, sender=modelo, weak=False, dispatch_uid=f'catalogo-{nombre}-delete')
+
+
+for _nombre, (_modelo, _, _) in CATALOGOS.items():
+    _conectar_invalidacion(_nombre, _modelo)
@@ -0,0 +1,163 @@
+# datos_sinteticos.py
+import random
+from datetime import date, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+
+from .dias_semana import dias_de, mascara_de
+from .models import (
+    Usuario, Instructores, Ambientes, Competencias, Contratos, Fichas, Horarios,
+    Jornadas, JornadaDia, NivelesFormacion, ProgramasFormacion
+)
+
+
+# ===============================================================
+# DATOS SINTÉTICOS DE UN CENTRO DE FORMACIÓN
+# ===============================================================
+# Catálogos, instructores, fichas y un trimestre de Horarios sin cruces,
+# insertados con bulk_create. Las fichas se reparten entre las jornadas y,
+# en cada franja, la ficha k de la jornada usa el ambiente y el instructor
+# que le tocan por rotación, así nunca coinciden dos en la misma hora (las
+# fichas que no alcanzan ambiente o instructor quedan sin horario).
+# bulk_create no envía señales: al final se reconstruye el libro de horas,
+# se marca el cambio de versión y se invalidan los catálogos.
+
+TAMANOS = {
+    'pequeno': {'ambientes': 10, 'instructores': 20, 'fichas': 15, 'competencias': 30},
+    'mediano': {'ambientes': 30, 'instructores': 60, 'fichas': 45, 'competencias': 90},
+    'grande': {'ambientes': 80, 'instructores': 160, 'fichas': 120, 'competencias': 240},
+}
+SEMANAS_TRIMESTRE = 13
+CLAVE_SINTETICA = 'clave-sintetica-123'
+DOCUMENTO_BASE = 30000000
+
+# (nombre, inicio, fin, días, franjas)
+JORNADAS = [
+    ('Mañana', time(6), time(12), ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes'],
+     [(time(6), time(9)), (time(9), time(12))]),
+    ('Tarde', time(12), time(18), ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes'],
+     [(time(12), time(15)), (time(15), time(18))]),
+    ('Noche', time(18), time(22), ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado'],
+     [(time(18), time(20)), (time(20), time(22))]),
+]
+PROFESIONES = ['Ingeniero de sistemas', 'Diseñador gráfico', 'Contador', 'Electricista', 'Enfermero', 'Cocinero']
+COMPETENCIAS_POR_PROGRAMA = 10
+
+
+def _siguiente(modelo, campo, minimo=0):
+    return max(modelo.objects.aggregate(m=Max(campo))['m'] or 0, minimo) + 1
+
+
+def generar(ambientes, instructores, fichas, competencias, semanas=SEMANAS_TRIMESTRE, desde=None, semilla=0):
+    """
+    Agrega el conjunto de datos a la BD actual (sin borrar lo que haya) y
+    devuelve {modelo: registros creados}. `desde` es el lunes en que empieza
+    el trimestre (por defecto el de la semana actual).
+    """
+    from . import catalogos
+    from .libro_horas import reconstruir
+    from .ocupacion import ocupacion_estricta, ocupar
+    from .versiones import AMBITO_GLOBAL, registrar_cambio, registrar_cambio_horarios
+
+    azar = random.Random(semilla)
+    desde = desde or date.today()
+    desde -= timedelta(days=desde.weekday())
+    hasta = desde + timedelta(weeks=semanas, days=-1)
+
+    with transaction.atomic():
+        nivel = NivelesFormacion.objects.create(nombre_nivel='Tecnólogo')
+        programas = [
+            ProgramasFormacion.objects.create(nombre_programa=f'Programa {n + 1}', id_nivel=nivel)
+            for n in range(max(1, competencias // COMPETENCIAS_POR_PROGRAMA))
+        ]
+        jornadas = []
+        for nombre, inicio, fin, dias, franjas in JORNADAS:
+            jornada = Jornadas.objects.create(nombre_jornada=nombre, hora_inicio=inicio, hora_fin=fin)
+            JornadaDia.objects.create(jornada=jornada, mascara_dias=mascara_de(dias))
+            jornadas.append((jornada, set(dias_de(mascara_de(dias))), franjas))
+
+        # Llaves explícitas: bulk_create no devuelve los id en MySQL
+        id_usuario = _siguiente(Usuario, 'id')
+        id_instructor = _siguiente(Instructores, 'id')
+        documento = _siguiente(Usuario, 'numero_documento', DOCUMENTO_BASE)
+        clave = make_password(CLAVE_SINTETICA)
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(id=id_usuario + n, numero_documento=documento + n, username=f'instructor{documento + n}',
+                    password=clave, tipo='INSTRUCTOR')
+            for n in range(instructores)
+        ], batch_size=500)
+        lista_instructores = Instructores.objects.bulk_create([
+            Instructores(id=id_instructor + n, user=usuario, profesion=azar.choice(PROFESIONES))
+            for n, usuario in enumerate(usuarios)
+        ], batch_size=500)
+        Contratos.objects.bulk_create([
+            Contratos(id_instructor=instructor, tipo_contrato='Planta', horas_por_cumplir=480,
+                      fecha_inicio=desde, fecha_fin=hasta)
+            for instructor in lista_instructores
+        ], batch_size=500)
+
+        id_ambiente = _siguiente(Ambientes, 'id_ambiente')
+        lista_ambientes = Ambientes.objects.bulk_create([
+            Ambientes(id_ambiente=id_ambiente + n, nombre_ambiente=f'Ambiente {id_ambiente + n}')
+            for n in range(ambientes)
+        ], batch_size=500)
+
+        id_competencia = _siguiente(Competencias, 'id_competencia')
+        lista_competencias = Competencias.objects.bulk_create([
+            Competencias(id_competencia=id_competencia + n, nombre_competencia=f'Competencia {id_competencia + n}',
+                         horas=azar.choice([40, 80, 120]), programa_relacionado=programas[n % len(programas)])
+            for n in range(competencias)
+        ], batch_size=500)
+        por_programa = {}
+        for competencia in lista_competencias:
+            por_programa.setdefault(competencia.programa_relacionado_id, []).append(competencia)
+
+        # Ficha n: jornada n % 3, posición k = n // 3 dentro de su jornada
+        id_ficha = _siguiente(Fichas, 'id_ficha', 2500000)
+        lista_fichas = Fichas.objects.bulk_create([
+            Fichas(
+                id_ficha=id_ficha + n, id_programa=programas[n % len(programas)],
+                id_instructor_lider=lista_instructores[(n // len(jornadas)) % instructores],
+                id_ambiente=lista_ambientes[(n // len(jornadas)) % ambientes],
+                id_jornada=jornadas[n % len(jornadas)][0], fecha_inicio=desde,
+            )
+            for n in range(fichas)
+        ], batch_size=500)
+
+        bloques = []
+        dia = desde
+        while dia <= hasta:
+            for j, (jornada, dias, franjas) in enumerate(jornadas):
+                if dia.weekday() not in dias:
+                    continue
+                for s, (inicio, fin) in enumerate(franjas):
+                    for k, ficha in enumerate(lista_fichas[j::len(jornadas)]):
+                        if k >= min(ambientes, instructores):
+                            break
+                        bloques.append(Horarios(
+                            id_ficha=ficha, id_jornada=jornada,
+                            id_ambiente=lista_ambientes[(k + s) % ambientes],
+                            id_instructor=lista_instructores[(k + s + dia.toordinal()) % instructores],
+                            id_competencia=azar.choice(por_programa[ficha.id_programa_id]),
+                            fecha=dia, hora_inicio=inicio, hora_fin=fin,
+                        ))
+            dia += timedelta(days=1)
+        Horarios.objects.bulk_create(bloques, batch_size=1000)
+        if ocupacion_estricta():
+            ocupar(bloques)
+
+        reconstruir()
+        # Ámbitos de cada instructor, ficha y ambiente (ETag y fragmentos de la grilla)
+        if bloques:
+            registrar_cambio_horarios(bloques)
+        else:
+            registrar_cambio([AMBITO_GLOBAL])
+        for nombre in ('ambientes', 'competencias', 'fichas', 'jornadas', 'niveles'):
+            catalogos.invalidar(nombre)
+
+    return {
+        'ambientes': len(lista_ambientes), 'instructores': len(lista_instructores),
+        'fichas': len(lista_fichas), 'competencias': len(lista_competencias), 'horarios': len(bloques),
+    }
@@ -0,0 +1,88 @@
+# dias_semana.py
+from django.db import models
+from django.db.models import Lookup
+
+
+# ===============================================================
+# DÍAS DE LA SEMANA COMO MÁSCARA DE 7 BITS
+# ===============================================================
+# Bit 0 = lunes ... bit 6 = domingo (el mismo orden que date.weekday()).
+# Saber si dos conjuntos de días se cruzan es un AND, en Python y en SQL
+# (`mascara_dias__comparte=...`).
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+BIT_DIA = {dia: 1 << i for i, dia in enumerate(DIAS_SEMANA)}
+TODOS_LOS_DIAS = 0b1111111
+LUNES_A_SABADO = 0b0111111
+
+
+def mascara_de(dias):
+    """Máscara a partir de nombres ('Lunes', ...) o números de día (0=lunes)."""
+    mascara = 0
+    for dia in dias:
+        mascara |= BIT_DIA[dia] if isinstance(dia, str) else 1 << dia
+    return mascara
+
+
+def bit_de_fecha(fecha):
+    return 1 << fecha.weekday()
+
+
+def dias_de(mascara):
+    """Números de día (0=lunes) presentes en la máscara."""
+    return [i for i in range(7) if mascara & (1 << i)]
+
+
+def nombres_de(mascara):
+    return [dia for dia in DIAS_SEMANA if mascara & BIT_DIA[dia]]
+
+
+def texto_dias(mascara):
+    nombres = nombres_de(mascara)
+    return ", ".join(nombres) if nombres else "Ningún día seleccionado"
+
+
+class MascaraDias(models.PositiveSmallIntegerField):
+    """Entero con un bit por día de la semana."""
+
+
+@MascaraDias.register_lookup
+class Comparte(Lookup):
+    """`campo__comparte=m`: el campo tiene al menos un día de la máscara m."""
+    lookup_name = 'comparte'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'({lhs} & {rhs}) <> 0', lhs_params + rhs_params
+
+
+def _propiedad_dia(dia):
+    bit = BIT_DIA[dia]
+
+    def leer(self):
+        return bool(self.mascara_dias & bit)
+
+    def escribir(self, valor):
+        self.mascara_dias = (self.mascara_dias | bit) if valor else (self.mascara_dias & ~bit)
+
+    return property(leer, escribir)
+
+
+class ConMascaraDias(models.Model):
+    """
+    Modelos con días de la semana en `mascara_dias`. Los atributos Lunes ...
+    Domingo se mantienen como propiedades (lectura, escritura y argumentos
+    del constructor), así el código que usaba los booleanos sigue igual.
+    """
+    mascara_dias = MascaraDias(default=0)
+
+    class Meta:
+        abstract = True
+
+    def dias_seleccionados(self):
+        return texto_dias(self.mascara_dias)
+
+
+for _dia in DIAS_SEMANA:
+    setattr(ConMascaraDias, _dia, _propiedad_dia(_dia))
@@ -0,0 +1,411 @@
+# importacion.py
+import csv
+import io
+from datetime import date, datetime, time
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from .models import (
+    Usuario, Instructores, Ambientes, Competencias, ResultadosAprendizaje, Fichas,
+    Horarios, ProgramasFormacion, Jornadas
+)
+from . import catalogos
+
+
+# ===============================================================
+# IMPORTACIÓN MASIVA DESDE CSV / XLSX
+# ===============================================================
+# El archivo se lee fila por fila; cada fila se valida contra diccionarios
+# precargados (una consulta por tabla relacionada, no una por fila) y con
+# clean_fields (largos, tipos, choices), y las válidas se insertan por
+# lotes con bulk_create. Los errores se acumulan por número de línea del
+# archivo y no detienen la carga: si la BD rechaza un lote se reintenta
+# fila por fila.
+
+TAMANO_LOTE = 1000
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.creados = 0
+        self.errores = []  # [(numero_fila, mensaje)]
+
+    def error(self, fila, mensaje):
+        self.errores.append((fila, mensaje))
+
+
+# ---------------- lectura ----------------
+def _normalizar(encabezado):
+    return str(encabezado or '').strip().lower()
+
+
+def leer_filas(archivo, nombre_archivo):
+    """
+    Genera (numero_de_linea, dict) por fila con datos de un CSV o XLSX
+    (llaves en minúscula). Las líneas en blanco se saltan pero cuentan, así
+    que el número es el que se ve en el archivo (la línea 1 es el encabezado).
+    """
+    if nombre_archivo.lower().endswith(('.xlsx', '.xlsm')):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Para importar archivos .xlsx instale openpyxl (pip install openpyxl).")
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezados = [_normalizar(e) for e in next(filas, [])]
+            for numero, fila in enumerate(filas, start=2):
+                if any(v not in (None, '') for v in fila):
+                    yield numero, dict(zip(encabezados, fila))
+        finally:
+            libro.close()
+        return
+
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    muestra = texto.readline()
+    # Excel en español suele separar con ';'
+    delimitador = ';' if muestra.count(';') > muestra.count(',') else ','
+    encabezados = [_normalizar(e) for e in next(csv.reader([muestra], delimiter=delimitador))]
+    lector = csv.reader(texto, delimiter=delimitador)
+    # line_num cuenta líneas físicas (un campo entre comillas puede ocupar varias)
+    numero = 2
+    for fila in lector:
+        if any(v.strip() for v in fila):
+            yield numero, dict(zip(encabezados, fila))
+        numero = lector.line_num + 2
+
+
+# ---------------- conversión de valores ----------------
+def _texto(fila, campo, requerido=True):
+    valor = fila.get(campo)
+    valor = '' if valor is None else str(valor).strip()
+    if requerido and not valor:
+        raise ValueError(f"Falta '{campo}'.")
+    return valor
+
+
+def _entero(fila, campo, requerido=True):
+    valor = fila.get(campo)
+    if isinstance(valor, (int, float)):
+        return int(valor)
+    valor = _texto(fila, campo, requerido)
+    if not valor:
+        return None
+    try:
+        return int(float(valor))
+    except ValueError:
+        raise ValueError(f"'{campo}' debe ser un número: {valor!r}.")
+
+
+def _fecha(fila, campo):
+    valor = fila.get(campo)
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    valor = _texto(fila, campo)
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f"'{campo}' debe tener formato AAAA-MM-DD o DD/MM/AAAA: {valor!r}.")
+
+
+def _hora(fila, campo):
+    valor = fila.get(campo)
+    if isinstance(valor, datetime):
+        return valor.time()
+    if isinstance(valor, time):
+        return valor
+    valor = _texto(fila, campo)
+    try:
+        return time.fromisoformat(valor if len(valor) > 4 else valor.zfill(5))
+    except ValueError:
+        raise ValueError(f"'{campo}' debe tener formato HH:MM: {valor!r}.")
+
+
+def _booleano(fila, campo):
+    valor = fila.get(campo)
+    if isinstance(valor, bool):
+        return valor
+    return _texto(fila, campo, requerido=False).lower() in ('1', 'si', 'sí', 'true', 'x', 'verdadero')
+
+
+def _existe(valor, conjunto, nombre):
+    if valor not in conjunto:
+        raise ValueError(f"No existe {nombre} {valor}.")
+    return valor
+
+
+# ---------------- importadores ----------------
+class Importador:
+    modelo = None
+    catalogo = None  # nombre en Models.catalogos a invalidar tras la carga
+
+    def construir(self, fila):
+        raise NotImplementedError
+
+    def validar(self, instancia):
+        """
+        clean_fields sin las llaves foráneas (ya se revisaron en `construir`
+        contra los conjuntos precargados; validarlas aquí sería una consulta
+        por fila).
+        """
+        instancia.clean_fields(exclude=[f.name for f in instancia._meta.fields if f.is_relation])
+
+    def guardar(self, lote, resultado):
+        """Inserta [(numero_fila, instancia), ...]; si el lote falla, aísla las filas malas."""
+        try:
+            with transaction.atomic():
+                self.modelo.objects.bulk_create([inst for _, inst in lote])
+            resultado.creados += len(lote)
+        except DatabaseError:
+            # IntegrityError, DataError (p. ej. texto largo en MySQL estricto), ...
+            for numero, instancia in lote:
+                try:
+                    with transaction.atomic():
+                        self.modelo.objects.bulk_create([instancia])
+                    resultado.creados += 1
+                except DatabaseError as e:
+                    resultado.error(numero, f"La base de datos rechazó la fila: {e}")
+
+    def terminar(self):
+        if self.catalogo:
+            catalogos.invalidar(self.catalogo)
+
+
+class ImportadorAmbientes(Importador):
+    modelo = Ambientes
+    catalogo = 'ambientes'
+    columnas = ('id_ambiente', 'nombre_ambiente')
+
+    def __init__(self):
+        self.existentes = set(Ambientes.objects.values_list('id_ambiente', flat=True))
+
+    def construir(self, fila):
+        pk = _entero(fila, 'id_ambiente')
+        if pk in self.existentes:
+            raise ValueError(f"El ambiente {pk} ya existe.")
+        self.existentes.add(pk)
+        return Ambientes(id_ambiente=pk, nombre_ambiente=_texto(fila, 'nombre_ambiente'))
+
+
+class ImportadorCompetencias(Importador):
+    modelo = Competencias
+    catalogo = 'competencias'
+    columnas = ('nombre_competencia', 'horas', 'id_programa', 'es_trasversal')
+
+    def __init__(self):
+        self.programas = set(ProgramasFormacion.objects.values_list('id_programa', flat=True))
+        self.existentes = {
+            (n.lower(), p) for n, p in Competencias.objects.values_list('nombre_competencia', 'programa_relacionado_id')
+        }
+
+    def construir(self, fila):
+        nombre = _texto(fila, 'nombre_competencia')
+        programa = _entero(fila, 'id_programa', requerido=False)
+        if programa is not None:
+            _existe(programa, self.programas, 'el programa')
+        if (nombre.lower(), programa) in self.existentes:
+            raise ValueError(f"La competencia '{nombre}' ya existe en ese programa.")
+        self.existentes.add((nombre.lower(), programa))
+        return Competencias(
+            nombre_competencia=nombre,
+            horas=_entero(fila, 'horas'),
+            programa_relacionado_id=programa,
+            es_trasversal=_booleano(fila, 'es_trasversal'),
+        )
+
+
+class ImportadorResultados(Importador):
+    modelo = ResultadosAprendizaje
+    columnas = ('nombre_resultado', 'id_competencia', 'hora_resultado')
+
+    def __init__(self):
+        self.competencias = set(Competencias.objects.values_list('id_competencia', flat=True))
+
+    def construir(self, fila):
+        return ResultadosAprendizaje(
+            nombre_resultado=_texto(fila, 'nombre_resultado'),
+            id_competencia_id=_existe(_entero(fila, 'id_competencia'), self.competencias, 'la competencia'),
+            hora_resultado=_entero(fila, 'hora_resultado'),
+        )
+
+
+def _instructores_por_documento():
+    return dict(Instructores.objects.values_list('user__numero_documento', 'id'))
+
+
+class ImportadorFichas(Importador):
+    modelo = Fichas
+    catalogo = 'fichas'
+    columnas = (
+        'id_ficha', 'id_programa', 'documento_instructor_lider', 'id_ambiente',
+        'id_jornada', 'fecha_inicio', 'modalidad',
+    )
+
+    def __init__(self):
+        self.existentes = set(Fichas.objects.values_list('id_ficha', flat=True))
+        self.programas = set(ProgramasFormacion.objects.values_list('id_programa', flat=True))
+        self.ambientes = set(Ambientes.objects.values_list('id_ambiente', flat=True))
+        self.jornadas = set(Jornadas.objects.values_list('id_jornada', flat=True))
+        self.instructores = _instructores_por_documento()
+        self.modalidades = {m for m, _ in Fichas.Choise_modalidades}
+
+    def construir(self, fila):
+        pk = _entero(fila, 'id_ficha')
+        if pk in self.existentes:
+            raise ValueError(f"La ficha {pk} ya existe.")
+        documento = _entero(fila, 'documento_instructor_lider')
+        if documento not in self.instructores:
+            raise ValueError(f"No existe un instructor con documento {documento}.")
+        modalidad = _texto(fila, 'modalidad', requerido=False) or 'Presencial'
+        if modalidad not in self.modalidades:
+            raise ValueError(f"Modalidad inválida: {modalidad!r}.")
+        self.existentes.add(pk)
+        return Fichas(
+            id_ficha=pk,
+            id_programa_id=_existe(_entero(fila, 'id_programa'), self.programas, 'el programa'),
+            id_instructor_lider_id=self.instructores[documento],
+            id_ambiente_id=_existe(_entero(fila, 'id_ambiente'), self.ambientes, 'el ambiente'),
+            id_jornada_id=_existe(_entero(fila, 'id_jornada'), self.jornadas, 'la jornada'),
+            fecha_inicio=_fecha(fila, 'fecha_inicio'),
+            modalidad=modalidad,
+        )
+
+
+class ImportadorInstructores(Importador):
+    """Crea el Usuario (tipo INSTRUCTOR) y su perfil de Instructores."""
+    modelo = Usuario
+    columnas = ('numero_documento', 'username', 'email', 'profesion', 'es_lider', 'password')
+
+    def __init__(self):
+        self.existentes = set(Usuario.objects.values_list('numero_documento', flat=True))
+
+    def construir(self, fila):
+        documento = _entero(fila, 'numero_documento')
+        if not 1000000 <= documento <= 9999999999:
+            raise ValueError('El número de documento debe tener entre 7 y 10 dígitos.')
+        if documento in self.existentes:
+            raise ValueError(f"Ya existe un usuario con documento {documento}.")
+        self.existentes.add(documento)
+        clave = _texto(fila, 'password', requerido=False)
+        usuario = Usuario(
+            numero_documento=documento,
+            username=_texto(fila, 'username'),
+            email=_texto(fila, 'email', requerido=False) or None,
+            tipo='INSTRUCTOR',
+            # Sin contraseña en el archivo la cuenta queda sin clave utilizable
+            password=make_password(clave or None),
+        )
+        usuario._perfil = Instructores(
+            profesion=_texto(fila, 'profesion', requerido=False),
+            es_lider=_booleano(fila, 'es_lider'),
+        )
+        return usuario
+
+    def validar(self, usuario):
+        super().validar(usuario)
+        super().validar(usuario._perfil)
+
+    def guardar(self, lote, resultado):
+        with transaction.atomic():
+            super().guardar(lote, resultado)
+            # MySQL no devuelve los pk de bulk_create: se buscan por documento
+            ids = dict(Usuario.objects.filter(
+                numero_documento__in=[u.numero_documento for _, u in lote]
+            ).values_list('numero_documento', 'id'))
+            perfiles = []
+            for _, usuario in lote:
+                if usuario.numero_documento in ids:
+                    usuario._perfil.user_id = ids[usuario.numero_documento]
+                    perfiles.append(usuario._perfil)
+            Instructores.objects.bulk_create(perfiles, ignore_conflicts=True)
+
+
+class ImportadorHorarios(Importador):
+    """Los cruces se validan por lote con `validar_lote` (contra la BD y dentro del archivo)."""
+    modelo = Horarios
+    columnas = (
+        'id_ficha', 'documento_instructor', 'id_ambiente', 'id_jornada', 'id_competencia',
+        'fecha', 'hora_inicio', 'hora_fin',
+    )
+
+    def __init__(self):
+        self.fichas = set(Fichas.objects.values_list('id_ficha', flat=True))
+        self.ambientes = set(Ambientes.objects.values_list('id_ambiente', flat=True))
+        self.jornadas = set(Jornadas.objects.values_list('id_jornada', flat=True))
+        self.competencias = set(Competencias.objects.values_list('id_competencia', flat=True))
+        self.instructores = _instructores_por_documento()
+
+    def construir(self, fila):
+        documento = _entero(fila, 'documento_instructor')
+        if documento not in self.instructores:
+            raise ValueError(f"No existe un instructor con documento {documento}.")
+        return Horarios(
+            id_ficha_id=_existe(_entero(fila, 'id_ficha'), self.fichas, 'la ficha'),
+            id_instructor_id=self.instructores[documento],
+            id_ambiente_id=_existe(_entero(fila, 'id_ambiente'), self.ambientes, 'el ambiente'),
+            id_jornada_id=_existe(_entero(fila, 'id_jornada'), self.jornadas, 'la jornada'),
+            id_competencia_id=_existe(_entero(fila, 'id_competencia'), self.competencias, 'la competencia'),
+            fecha=_fecha(fila, 'fecha'),
+            hora_inicio=_hora(fila, 'hora_inicio'),
+            hora_fin=_hora(fila, 'hora_fin'),
+        )
+
+    def guardar(self, lote, resultado):
+        from consultas.consultas import validar_lote
+
+        creados, conflictos = validar_lote([inst for _, inst in lote])
+        resultado.creados += len(creados)
+        for conflicto in conflictos:
+            resultado.error(lote[conflicto['indice']][0], conflicto['motivo'])
+
+
+IMPORTADORES = {
+    'ambientes': ImportadorAmbientes,
+    'competencias': ImportadorCompetencias,
+    'resultados': ImportadorResultados,
+    'instructores': ImportadorInstructores,
+    'fichas': ImportadorFichas,
+    'horarios': ImportadorHorarios,
+}
+
+
+def _mensaje(error):
+    if isinstance(error, ValidationError):
+        if hasattr(error, 'error_dict'):
+            return ' '.join(f"{campo}: {' '.join(mensajes)}" for campo, mensajes in error.message_dict.items())
+        return error.messages[0]
+    return str(error)
+
+
+def importar(tipo, archivo, nombre_archivo, tamano_lote=TAMANO_LOTE):
+    """
+    Importa `archivo` (binario, CSV o XLSX según `nombre_archivo`) como `tipo`
+    (ver IMPORTADORES). Devuelve un ResultadoImportacion con los creados y
+    los errores por línea del archivo (la línea 1 es el encabezado).
+    """
+    importador = IMPORTADORES[tipo]()
+    resultado = ResultadoImportacion()
+    lote = []
+    try:
+        for numero, fila in leer_filas(archivo, nombre_archivo):
+            try:
+                instancia = importador.construir(fila)
+                importador.validar(instancia)
+            except (ValueError, ValidationError) as e:
+                resultado.error(numero, _mensaje(e))
+                continue
+            lote.append((numero, instancia))
+            if len(lote) >= tamano_lote:
+                importador.guardar(lote, resultado)
+                lote = []
+        if lote:
+            importador.guardar(lote, resultado)
+    finally:
+        importador.terminar()
+    return resultado
@@ -0,0 +1,211 @@
+# libro_horas.py
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncWeek
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Contratos, Horarios, HorasCumplidas, LibroHorasContrato, LibroHorasSemana
+
+
+# ===============================================================
+# LIBRO DE HORAS: PLANEADAS (Horarios) VS. CUMPLIDAS (HorasCumplidas)
+# ===============================================================
+# Cada cambio se traduce en movimientos (instructor, fecha, minutos, horas)
+# que suman o restan sobre la fila de la semana y la de los contratos que
+# cubren esa fecha. Leer el saldo es una consulta por llave.
+
+def semana_de(fecha):
+    return fecha - timedelta(days=fecha.weekday())
+
+
+def _minutos(hora_inicio, hora_fin):
+    return (
+        (hora_fin.hour * 60 + hora_fin.minute) - (hora_inicio.hour * 60 + hora_inicio.minute)
+    )
+
+
+def aplicar_movimientos(movimientos):
+    """Suma los movimientos [(instructor_id, fecha, minutos, horas), ...] al libro."""
+    por_semana = defaultdict(lambda: [0, 0])
+    por_dia = defaultdict(lambda: [0, 0])
+    for instructor, fecha, minutos, horas in movimientos:
+        if instructor is None or fecha is None:
+            continue
+        for acumulado in (por_semana[(instructor, semana_de(fecha))], por_dia[(instructor, fecha)]):
+            acumulado[0] += minutos
+            acumulado[1] += horas
+    if not por_semana:
+        return
+
+    with transaction.atomic():
+        existentes = set(
+            LibroHorasSemana.objects.filter(
+                id_instructor_id__in={i for i, _ in por_semana},
+                semana__in={s for _, s in por_semana},
+            ).values_list('id_instructor_id', 'semana')
+        )
+        # Las filas nuevas se crean en cero y luego se actualizan igual que las demás
+        LibroHorasSemana.objects.bulk_create(
+            [LibroHorasSemana(id_instructor_id=i, semana=s) for i, s in set(por_semana) - existentes],
+            ignore_conflicts=True,
+        )
+        for (instructor, semana), (minutos, horas) in por_semana.items():
+            if minutos or horas:
+                LibroHorasSemana.objects.filter(id_instructor_id=instructor, semana=semana).update(
+                    minutos_planeados=F('minutos_planeados') + minutos,
+                    horas_cumplidas=F('horas_cumplidas') + horas,
+                )
+
+        por_contrato = defaultdict(lambda: [0, 0])
+        contratos = Contratos.objects.filter(
+            id_instructor_id__in={i for i, _ in por_dia}
+        ).values_list('id_contrato', 'id_instructor_id', 'fecha_inicio', 'fecha_fin')
+        for contrato, instructor, inicio, fin in contratos:
+            for (inst, fecha), (minutos, horas) in por_dia.items():
+                if inst == instructor and inicio <= fecha <= fin:
+                    por_contrato[contrato][0] += minutos
+                    por_contrato[contrato][1] += horas
+        for contrato, (minutos, horas) in por_contrato.items():
+            if minutos or horas:
+                LibroHorasContrato.objects.filter(contrato_id=contrato).update(
+                    minutos_planeados=F('minutos_planeados') + minutos,
+                    horas_cumplidas=F('horas_cumplidas') + horas,
+                )
+
+
+def movimiento_horario(horario, signo=1, valores=None):
+    valores = valores or {
+        'id_instructor_id': horario.id_instructor_id, 'fecha': horario.fecha,
+        'hora_inicio': horario.hora_inicio, 'hora_fin': horario.hora_fin,
+    }
+    return (
+        valores['id_instructor_id'], valores['fecha'],
+        signo * _minutos(valores['hora_inicio'], valores['hora_fin']), 0,
+    )
+
+
+def movimiento_cumplidas(registro, signo=1, valores=None):
+    valores = valores or {
+        'id_instructor_id': registro.id_instructor_id, 'fecha': registro.fecha,
+        'horas_cumplidas': registro.horas_cumplidas,
+    }
+    return (valores['id_instructor_id'], valores['fecha'], 0, signo * valores['horas_cumplidas'])
+
+
+def registrar_horarios(horarios, signo=1):
+    """Para escrituras que no envían señales (bulk_create, bulk_update, update)."""
+    aplicar_movimientos([movimiento_horario(h, signo) for h in horarios])
+
+
+def _originales(instance, campos):
+    originales = getattr(instance, '_valores_originales', None) or {}
+    return originales if all(c in originales for c in campos) else None
+
+
+CAMPOS_HORARIO = ('id_instructor_id', 'fecha', 'hora_inicio', 'hora_fin')
+CAMPOS_CUMPLIDAS = ('id_instructor_id', 'fecha', 'horas_cumplidas')
+
+
+@receiver(post_save, sender=Horarios)
+def _horario_guardado(sender, instance, created, **kwargs):
+    movimientos = [movimiento_horario(instance)]
+    anteriores = None if created else _originales(instance, CAMPOS_HORARIO)
+    if anteriores:
+        movimientos.append(movimiento_horario(instance, -1, anteriores))
+    aplicar_movimientos(movimientos)
+
+
+@receiver(post_delete, sender=Horarios)
+def _horario_eliminado(sender, instance, **kwargs):
+    aplicar_movimientos([movimiento_horario(instance, -1, _originales(instance, CAMPOS_HORARIO))])
+
+
+@receiver(post_save, sender=HorasCumplidas)
+def _cumplidas_guardadas(sender, instance, created, **kwargs):
+    movimientos = [movimiento_cumplidas(instance)]
+    anteriores = None if created else _originales(instance, CAMPOS_CUMPLIDAS)
+    if anteriores:
+        movimientos.append(movimiento_cumplidas(instance, -1, anteriores))
+    aplicar_movimientos(movimientos)
+
+
+@receiver(post_delete, sender=HorasCumplidas)
+def _cumplidas_eliminadas(sender, instance, **kwargs):
+    aplicar_movimientos([movimiento_cumplidas(instance, -1, _originales(instance, CAMPOS_CUMPLIDAS))])
+
+
+@receiver(post_save, sender=Contratos)
+def _contrato_guardado(sender, instance, **kwargs):
+    # Cambiar fechas o instructor de un contrato es raro: se recalcula completo
+    recalcular_contrato(instance)
+
+
+# ===============================================================
+# CONSULTAS Y RECONSTRUCCIÓN
+# ===============================================================
+def _minutos_total(duracion):
+    return int(duracion.total_seconds() // 60) if duracion else 0
+
+
+def recalcular_contrato(contrato):
+    minutos, horas = 0, 0
+    if contrato.id_instructor_id:
+        rango = {
+            'id_instructor_id': contrato.id_instructor_id,
+            'fecha__range': (contrato.fecha_inicio, contrato.fecha_fin),
+        }
+        minutos = _minutos_total(
+            Horarios.objects.filter(**rango).aggregate(t=Sum(F('hora_fin') - F('hora_inicio')))['t']
+        )
+        horas = HorasCumplidas.objects.filter(**rango).aggregate(t=Sum('horas_cumplidas'))['t'] or 0
+    LibroHorasContrato.objects.update_or_create(
+        contrato=contrato, defaults={'minutos_planeados': minutos, 'horas_cumplidas': horas}
+    )
+
+
+def reconstruir():
+    """Rehace el libro completo a partir de Horarios, HorasCumplidas y Contratos."""
+    with transaction.atomic():
+        semanas = defaultdict(lambda: [0, 0])
+        planeadas = Horarios.objects.annotate(semana=TruncWeek('fecha')).values(
+            'id_instructor_id', 'semana'
+        ).annotate(t=Sum(F('hora_fin') - F('hora_inicio'))).values_list('id_instructor_id', 'semana', 't')
+        for instructor, semana, total in planeadas:
+            semanas[(instructor, semana)][0] = _minutos_total(total)
+        cumplidas = HorasCumplidas.objects.annotate(semana=TruncWeek('fecha')).values(
+            'id_instructor_id', 'semana'
+        ).annotate(t=Sum('horas_cumplidas')).values_list('id_instructor_id', 'semana', 't')
+        for instructor, semana, total in cumplidas:
+            semanas[(instructor, semana)][1] = total or 0
+
+        LibroHorasSemana.objects.all().delete()
+        LibroHorasSemana.objects.bulk_create([
+            LibroHorasSemana(id_instructor_id=i, semana=s, minutos_planeados=m, horas_cumplidas=h)
+            for (i, s), (m, h) in semanas.items()
+        ], batch_size=1000)
+
+        for contrato in Contratos.objects.all():
+            recalcular_contrato(contrato)
+    return len(semanas)
+
+
+def horas_semana(instructor, fecha):
+    """(horas_planeadas, horas_cumplidas) del instructor en la semana de `fecha`."""
+    fila = LibroHorasSemana.objects.filter(
+        id_instructor=instructor, semana=semana_de(fecha)
+    ).values_list('minutos_planeados', 'horas_cumplidas').first()
+    return (fila[0] / 60, fila[1]) if fila else (0, 0)
+
+
+def balance_contrato(contrato):
+    """Horas por cumplir, planeadas y cumplidas del contrato."""
+    fila = LibroHorasContrato.objects.filter(contrato=contrato).values_list(
+        'contrato__horas_por_cumplir', 'minutos_planeados', 'horas_cumplidas'
+    ).first()
+    if fila is None:
+        return None
+    return {'horas_por_cumplir': fila[0], 'horas_planeadas': fila[1] / 60, 'horas_cumplidas': fila[2]}
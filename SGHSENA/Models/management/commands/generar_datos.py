@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Models.datos_sinteticos import SEMANAS_TRIMESTRE, TAMANOS, generar
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un centro de formación sintético (ambientes, instructores, fichas, competencias "
+        "y un trimestre de Horarios sin cruces) para pruebas de carga. No borra datos existentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano', choices=sorted(TAMANOS), default='pequeno',
+                            help="Cantidades base; las opciones siguientes las reemplazan.")
+        parser.add_argument('--ambientes', type=int)
+        parser.add_argument('--instructores', type=int)
+        parser.add_argument('--fichas', type=int)
+        parser.add_argument('--competencias', type=int)
+        parser.add_argument('--semanas', type=int, default=SEMANAS_TRIMESTRE)
+        parser.add_argument('--desde', type=date.fromisoformat, help='YYYY-MM-DD (por defecto esta semana)')
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def handle(self, *args, **opts):
+        cantidades = dict(TAMANOS[opts['tamano']])
+        for campo in cantidades:
+            if opts[campo] is not None:
+                cantidades[campo] = opts[campo]
+        if min(cantidades.values()) < 1:
+            raise CommandError("Todas las cantidades deben ser mayores que cero.")
+
+        creados = generar(**cantidades, semanas=opts['semanas'], desde=opts['desde'], semilla=opts['semilla'])
+        self.stdout.write(self.style.SUCCESS(
+            "Creados: " + ", ".join(f"{total} {modelo}" for modelo, total in creados.items())
+        ))
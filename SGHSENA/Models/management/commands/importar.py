@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Models.importacion import IMPORTADORES, TAMANO_LOTE, importar
+
+
+class Command(BaseCommand):
+    help = "Importa ambientes, competencias, resultados, instructores, fichas u horarios desde un CSV o XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=sorted(IMPORTADORES))
+        parser.add_argument('archivo')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por inserción.")
+
+    def handle(self, *args, **opts):
+        try:
+            with open(opts['archivo'], 'rb') as archivo:
+                resultado = importar(opts['tipo'], archivo, opts['archivo'], opts['lote'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for fila, mensaje in resultado.errores:
+            self.stderr.write(f"Fila {fila}: {mensaje}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.creados} registros creados, {len(resultado.errores)} filas con error."
+        ))
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from SGHSENA.instrumentacion import percentil
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de authenticate() con muchos usuarios entrando a la vez "
+        "(el pico de inicio de la jornada de la mañana)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documento', required=True, help="Documento o username de un usuario existente.")
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--concurrencia', type=int, default=40)
+        parser.add_argument('--intentos', type=int, default=5, help="Intentos por hilo.")
+        parser.add_argument('--fallidos', type=int, default=20, help="Porcentaje de intentos con clave errada.")
+
+    def handle(self, *args, **opts):
+        documento, password = opts['documento'], opts['password']
+        errada = password + '-x'
+
+        with CaptureQueriesContext(connection) as ctx:
+            if authenticate(None, username=documento, password=password) is None:
+                self.stderr.write(self.style.ERROR("Las credenciales no autentican; revise --documento y --password."))
+                return
+        consultas_ok = len(ctx.captured_queries)
+        with CaptureQueriesContext(connection) as ctx:
+            authenticate(None, username=documento, password=errada)
+        consultas_error = len(ctx.captured_queries)
+
+        concurrencia = opts['concurrencia']
+        barrera = threading.Barrier(concurrencia)
+
+        def trabajador(n):
+            barrera.wait()
+            tiempos = []
+            try:
+                for i in range(opts['intentos']):
+                    clave = errada if (n * opts['intentos'] + i) % 100 < opts['fallidos'] else password
+                    inicio = time.perf_counter()
+                    authenticate(None, username=documento, password=clave)
+                    tiempos.append(time.perf_counter() - inicio)
+            finally:
+                connection.close()
+            return tiempos
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(concurrencia) as ejecutor:
+            tiempos = [t for lista in ejecutor.map(trabajador, range(concurrencia)) for t in lista]
+        total = time.perf_counter() - inicio
+
+        ms = [t * 1000 for t in tiempos]
+        self.stdout.write(f"Intentos: {len(ms)} con {concurrencia} hilos en {total:.2f} s ({len(ms) / total:.1f}/s)")
+        self.stdout.write(f"Consultas por intento: {consultas_ok} (clave correcta), {consultas_error} (clave errada)")
+        self.stdout.write(
+            f"Latencia ms  p50 {percentil(ms, 50):.1f}  p95 {percentil(ms, 95):.1f}  "
+            f"p99 {percentil(ms, 99):.1f}  máx {max(ms):.1f}"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from Models.libro_horas import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Rehace el libro de horas (planeadas vs. cumplidas) por semana y por contrato."
+
+    def handle(self, *args, **opts):
+        semanas = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"Libro de horas reconstruido: {semanas} semanas."))
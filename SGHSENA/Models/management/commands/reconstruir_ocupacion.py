@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from Models.ocupacion import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Rehace la ocupación por franjas (modo estricto de cruces) a partir de Horarios."
+
+    def handle(self, *args, **opts):
+        sin_lugar = reconstruir()
+        for horario_id in sin_lugar:
+            self.stderr.write(f"Horario {horario_id}: se cruza con otro bloque, queda sin franjas.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Ocupación reconstruida; {len(sin_lugar)} horarios con cruces previos."
+        ))
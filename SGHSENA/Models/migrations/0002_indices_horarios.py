@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Models', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='horarios',
+            index=models.Index(fields=['id_instructor', 'fecha', 'hora_inicio'], name='horarios_instr_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horarios',
+            index=models.Index(fields=['id_ambiente', 'fecha', 'hora_inicio'], name='horarios_amb_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horarios',
+            index=models.Index(fields=['id_ficha', 'fecha', 'hora_inicio'], name='horarios_ficha_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horarios',
+            index=models.Index(fields=['id_jornada', 'fecha'], name='horarios_jornada_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horarios',
+            index=models.Index(fields=['fecha', 'hora_inicio'], name='horarios_fecha_hora_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horascumplidas',
+            index=models.Index(fields=['id_instructor', 'fecha'], name='horas_instructor_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horascumplidas',
+            index=models.Index(fields=['id_ficha', 'fecha'], name='horas_ficha_fecha_idx'),
+        ),
+    ]
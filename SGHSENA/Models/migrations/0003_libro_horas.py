@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Models', '0002_indices_horarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibroHorasContrato',
+            fields=[
+                ('contrato', models.OneToOneField(db_column='id_contrato', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='libro', serialize=False, to='Models.contratos')),
+                ('minutos_planeados', models.IntegerField(default=0)),
+                ('horas_cumplidas', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'libro_horas_contrato',
+            },
+        ),
+        migrations.AddField(
+            model_name='contratos',
+            name='id_instructor',
+            field=models.ForeignKey(blank=True, db_column='id_instructor', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='contratos', to='Models.instructores'),
+        ),
+        migrations.CreateModel(
+            name='LibroHorasSemana',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana', models.DateField()),
+                ('minutos_planeados', models.IntegerField(default=0)),
+                ('horas_cumplidas', models.IntegerField(default=0)),
+                ('id_instructor', models.ForeignKey(db_column='id_instructor', on_delete=django.db.models.deletion.CASCADE, to='Models.instructores')),
+            ],
+            options={
+                'db_table': 'libro_horas_semana',
+                'constraints': [models.UniqueConstraint(fields=('id_instructor', 'semana'), name='libro_horas_instructor_semana')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Models', '0003_libro_horas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HorarioRecurrente',
+            fields=[
+                ('id_recurrente', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField()),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fin', models.TimeField()),
+                ('Lunes', models.BooleanField(default=False)),
+                ('Martes', models.BooleanField(default=False)),
+                ('Miercoles', models.BooleanField(default=False)),
+                ('Jueves', models.BooleanField(default=False)),
+                ('Viernes', models.BooleanField(default=False)),
+                ('Sabado', models.BooleanField(default=False)),
+                ('Domingo', models.BooleanField(default=False)),
+                ('id_ambiente', models.ForeignKey(db_column='id_ambiente', on_delete=django.db.models.deletion.DO_NOTHING, to='Models.ambientes')),
+                ('id_competencia', models.ForeignKey(db_column='id_competencia', on_delete=django.db.models.deletion.DO_NOTHING, to='Models.competencias')),
+                ('id_ficha', models.ForeignKey(db_column='id_ficha', on_delete=django.db.models.deletion.DO_NOTHING, to='Models.fichas')),
+                ('id_instructor', models.ForeignKey(db_column='id_instructor', on_delete=django.db.models.deletion.DO_NOTHING, to='Models.instructores')),
+                ('id_jornada', models.ForeignKey(db_column='id_jornada', on_delete=django.db.models.deletion.DO_NOTHING, to='Models.jornadas')),
+            ],
+            options={
+                'db_table': 'horarios_recurrentes',
+            },
+        ),
+        migrations.AddField(
+            model_name='horarios',
+            name='id_recurrente',
+            field=models.ForeignKey(blank=True, db_column='id_recurrente', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ocurrencias', to='Models.horariorecurrente'),
+        ),
+        migrations.AddIndex(
+            model_name='horariorecurrente',
+            index=models.Index(fields=['fecha_inicio', 'fecha_fin'], name='recurrentes_fechas_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:46
+
+import Models.dias_semana
+from django.db import migrations
+
+DIAS = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+MODELOS = ['JornadaDia', 'HorarioRecurrente']
+
+
+def booleanos_a_mascara(apps, schema_editor):
+    for nombre in MODELOS:
+        modelo = apps.get_model('Models', nombre)
+        filas = list(modelo.objects.all())
+        for fila in filas:
+            fila.mascara_dias = sum(1 << i for i, dia in enumerate(DIAS) if getattr(fila, dia))
+        modelo.objects.bulk_update(filas, ['mascara_dias'], batch_size=500)
+
+
+def mascara_a_booleanos(apps, schema_editor):
+    for nombre in MODELOS:
+        modelo = apps.get_model('Models', nombre)
+        filas = list(modelo.objects.all())
+        for fila in filas:
+            for i, dia in enumerate(DIAS):
+                setattr(fila, dia, bool(fila.mascara_dias & (1 << i)))
+        modelo.objects.bulk_update(filas, DIAS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Models', '0004_horarios_recurrentes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='horariorecurrente',
+            name='mascara_dias',
+            field=Models.dias_semana.MascaraDias(default=0),
+        ),
+        migrations.AddField(
+            model_name='jornadadia',
+            name='mascara_dias',
+            field=Models.dias_semana.MascaraDias(default=0),
+        ),
+        migrations.RunPython(booleanos_a_mascara, mascara_a_booleanos),
+    ] + [
+        migrations.RemoveField(model_name=modelo.lower(), name=dia)
+        for modelo in MODELOS for dia in DIAS
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Models', '0005_mascara_dias'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usuario',
+            name='username',
+            field=models.CharField(db_index=True, max_length=150),
+        ),
+    ]
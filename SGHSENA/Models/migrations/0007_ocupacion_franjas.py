@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Models', '0006_indice_username'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacionFranja',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recurso', models.CharField(choices=[('I', 'Instructor'), ('F', 'Ficha'), ('A', 'Ambiente')], max_length=1)),
+                ('id_recurso', models.BigIntegerField()),
+                ('fecha', models.DateField()),
+                ('franja', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'db_table': 'ocupacion_franjas',
+                'constraints': [models.UniqueConstraint(fields=('recurso', 'id_recurso', 'fecha', 'franja'), name='ocupacion_franja_unica')],
+            },
+        ),
+    ]
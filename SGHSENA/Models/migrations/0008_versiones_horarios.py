@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Models', '0007_ocupacion_franjas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionHorarios',
+            fields=[
+                ('ambito', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('modificado', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'versiones_horarios',
+            },
+        ),
+    ]
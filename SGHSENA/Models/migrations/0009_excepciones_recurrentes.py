@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def consumir_materializadas(apps, schema_editor):
+    # Las ocurrencias ya guardadas en Horarios consumen su fecha
+    Horarios = apps.get_model('Models', 'Horarios')
+    ExcepcionRecurrente = apps.get_model('Models', 'ExcepcionRecurrente')
+    pares = Horarios.objects.filter(id_recurrente__isnull=False).values_list('id_recurrente', 'fecha').distinct()
+    ExcepcionRecurrente.objects.bulk_create(
+        [ExcepcionRecurrente(recurrente_id=r, fecha=fecha) for r, fecha in pares.iterator()],
+        batch_size=500, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Models', '0008_versiones_horarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExcepcionRecurrente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('recurrente', models.ForeignKey(db_column='id_recurrente', on_delete=django.db.models.deletion.CASCADE, related_name='excepciones', to='Models.horariorecurrente')),
+            ],
+            options={
+                'db_table': 'horarios_recurrentes_excepciones',
+                'constraints': [models.UniqueConstraint(fields=('recurrente', 'fecha'), name='excepcion_recurrente_unica')],
+            },
+        ),
+        migrations.RunPython(consumir_materializadas, migrations.RunPython.noop),
+    ]
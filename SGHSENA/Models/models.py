@@ -1,10 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.db.models import Q
 from django.conf import settings
 from .managers import UsuarioManager
+from .dias_semana import ConMascaraDias
 
 # ===============================================================
 # MODELO DE USUARIO PRINCIPAL
@@ -18,7 +19,7 @@ class Usuario(AbstractUser):
     last_name = None
     email = models.EmailField(blank=True, null=True)
 
-    username = models.CharField(max_length=150, blank=False)
+    username = models.CharField(max_length=150, blank=False, db_index=True)
     numero_documento = models.BigIntegerField(
         'N° de documento',
         unique=True,
@@ -80,6 +81,32 @@ class Usuario(AbstractUser):
             ),
         ]
 
+# ===============================================================
+# VALORES ORIGINALES (para señales que necesitan el "antes")
+# ===============================================================
+class ConValoresOriginales(models.Model):
+    """
+    Guarda en `_valores_originales` los valores leídos de la BD (o los del
+    último save), para que las señales sepan a quién afectaba el registro
+    antes de editarlo sin volver a consultarlo.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._valores_originales = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._valores_originales = {
+            f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields
+        }
+
+
 # ===============================================================
 # TABLAS RELACIONADAS
 # ===============================================================
@@ -91,7 +118,7 @@ class Ambientes(models.Model):
         db_table = 'ambientes'
 
     def __str__(self):
-        return self.id_ambiente + " - " + self.nombre_ambiente 
+        return f"{self.id_ambiente} - {self.nombre_ambiente}"
 
 #Perfiles de las competencias
 class Perfiles(models.Model):
@@ -133,11 +160,19 @@ class Instructores(models.Model):
         db_table = 'instructores'
 
     def __str__(self):
-        return self.nombres + " - " + str(self.especialidad)
+        return f"{self.user.username} - {self.profesion}"
 
 
 class Contratos(models.Model):
     id_contrato = models.AutoField(primary_key=True)
+    id_instructor = models.ForeignKey(
+        Instructores,
+        models.DO_NOTHING,
+        db_column='id_instructor',
+        related_name='contratos',
+        null=True,
+        blank=True,
+    )
     tipo_contrato = models.CharField(max_length=50)
     horas_por_cumplir = models.IntegerField(default=0)
     fecha_inicio = models.DateField()
@@ -187,7 +222,8 @@ class Jornadas(models.Model):
         return self.nombre_jornada
 
 
-class JornadaDia(models.Model):
+class JornadaDia(ConMascaraDias):
+    """Días en que aplica una jornada (`mascara_dias`, ver dias_semana)."""
 
     id = models.AutoField(primary_key=True)
     jornada = models.ForeignKey(
@@ -195,32 +231,12 @@ class JornadaDia(models.Model):
         on_delete=models.CASCADE,
         related_name='dias'
     )
-    Lunes = models.BooleanField(default=False)
-    Martes = models.BooleanField(default=False)
-    Miercoles = models.BooleanField(default=False)
-    Jueves = models.BooleanField(default=False)
-    Viernes = models.BooleanField(default=False)
-    Sabado = models.BooleanField(default=False)
-    Domingo = models.BooleanField(default=False) 
+
     class Meta:
         db_table = 'jornadas_dias'
 
     def __str__(self):
-        # Creamos una lista con los días activos
-        dias_seleccionados = []
-        for dia in ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']:
-            if getattr(self, dia):  # Si el campo de ese día es True
-                dias_seleccionados.append(dia)
-        
-        # Retornamos el nombre de la jornada y los días seleccionados
-        return f"{self.jornada.nombre_jornada} - {', '.join(dias_seleccionados)}" if dias_seleccionados else f"{self.jornada.nombre_jornada} - Ningún día seleccionado"
-    
-    def dias_seleccionados(self):
-        dias = []
-        for dia in ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']:
-            if getattr(self, dia):
-                dias.append(dia)
-        return ", ".join(dias) if dias else "Ningún día seleccionado"
+        return f"{self.jornada.nombre_jornada} - {self.dias_seleccionados()}"
 
 class Fichas(models.Model):
     Choise_modalidades= (
@@ -310,7 +326,7 @@ class ResultadosAprendizaje(models.Model):
         db_table = 'competencias_fichas'
 '''
 
-class HorasCumplidas(models.Model):
+class HorasCumplidas(ConValoresOriginales):
     id_registro = models.AutoField(primary_key=True)
     id_instructor = models.ForeignKey(Instructores, models.DO_NOTHING, db_column='id_instructor')
     id_ficha = models.ForeignKey(Fichas, models.DO_NOTHING, db_column='id_ficha')
@@ -319,9 +335,13 @@ class HorasCumplidas(models.Model):
 
     class Meta:
         db_table = 'horas_cumplidas'
+        indexes = [
+            models.Index(fields=['id_instructor', 'fecha'], name='horas_instructor_fecha_idx'),
+            models.Index(fields=['id_ficha', 'fecha'], name='horas_ficha_fecha_idx'),
+        ]
 
 
-class Horarios(models.Model):
+class Horarios(ConValoresOriginales):
     id_horario = models.AutoField(primary_key=True)
     id_ficha = models.ForeignKey(Fichas, models.DO_NOTHING, db_column='id_ficha')
     id_instructor = models.ForeignKey(Instructores, models.DO_NOTHING, db_column='id_instructor')
@@ -331,9 +351,22 @@ class Horarios(models.Model):
     fecha = models.DateField()
     hora_inicio = models.TimeField()
     hora_fin = models.TimeField()
+    # Regla de la que salió el bloque al materializarla (None si se creó a mano)
+    id_recurrente = models.ForeignKey(
+        'HorarioRecurrente', models.SET_NULL, db_column='id_recurrente',
+        null=True, blank=True, related_name='ocurrencias',
+    )
 
     class Meta:
         db_table = 'horarios'
+        # Las consultas de cruces y horarios filtran por recurso + fecha + rango de horas
+        indexes = [
+            models.Index(fields=['id_instructor', 'fecha', 'hora_inicio'], name='horarios_instr_fecha_idx'),
+            models.Index(fields=['id_ambiente', 'fecha', 'hora_inicio'], name='horarios_amb_fecha_idx'),
+            models.Index(fields=['id_ficha', 'fecha', 'hora_inicio'], name='horarios_ficha_fecha_idx'),
+            models.Index(fields=['id_jornada', 'fecha'], name='horarios_jornada_fecha_idx'),
+            models.Index(fields=['fecha', 'hora_inicio'], name='horarios_fecha_hora_idx'),
+        ]
 
     def clean(self):
         super().clean()
@@ -343,6 +376,32 @@ class Horarios(models.Model):
 
         # Importar aquí para evitar ciclos si pones la función en otro archivo
         from django.db.models import Q
+        from .validacion_horarios import indice_actual
+
+        from .recurrencias import reglas_en_choque
+
+        # Ocurrencias de horarios recurrentes aún sin materializar; con un
+        # índice activo sus reglas ya están en memoria y no se consulta
+        indice = indice_actual()
+        if reglas_en_choque(
+            self.fecha, self.hora_inicio, self.hora_fin,
+            self.id_instructor_id, self.id_ficha_id, self.id_ambiente_id,
+            excluir=self.id_recurrente_id,
+            reglas=indice.reglas_recurrentes(self.fecha) if indice is not None else None,
+        ):
+            raise ValidationError('Existe un cruce con un horario recurrente.')
+
+        # Durante una carga masiva el cruce se resuelve en memoria
+        if indice is not None:
+            if indice.hay_choque(
+                self.fecha, self.hora_inicio, self.hora_fin,
+                instructor=self.id_instructor_id,
+                ficha=self.id_ficha_id,
+                ambiente=self.id_ambiente_id,
+                horario_id=self.pk,
+            ):
+                raise ValidationError('Existe un cruce de horario con otro registro.')
+            return
 
         qs = Horarios.objects.filter(
             fecha=self.fecha,
@@ -360,6 +419,177 @@ class Horarios(models.Model):
         if qs.exists():
             raise ValidationError('Existe un cruce de horario con otro registro.')
 
+    def save(self, *args, **kwargs):
+        from .ocupacion import ocupacion_estricta, reocupar, valores_guardados
+
+        if not ocupacion_estricta():
+            return super().save(*args, **kwargs)
+        # La fila y sus franjas se escriben juntas: un cruce deshace ambas
+        with transaction.atomic():
+            anteriores = valores_guardados(self)
+            super().save(*args, **kwargs)
+            reocupar(self, anteriores)
+
+
+class HorarioRecurrente(ConMascaraDias, ConValoresOriginales):
+    """
+    Bloque que se repite cada semana entre `fecha_inicio` y `fecha_fin`
+    (p. ej. lunes y miércoles de 07:00 a 10:00). Los días marcados mandan;
+    si no se marca ninguno se usan los días de la jornada (JornadaDia).
+    Las ocurrencias se calculan al consultar y solo se guardan en Horarios
+    al materializar la regla.
+    """
+    id_recurrente = models.AutoField(primary_key=True)
+    id_ficha = models.ForeignKey(Fichas, models.DO_NOTHING, db_column='id_ficha')
+    id_instructor = models.ForeignKey(Instructores, models.DO_NOTHING, db_column='id_instructor')
+    id_ambiente = models.ForeignKey(Ambientes, models.DO_NOTHING, db_column='id_ambiente')
+    id_jornada = models.ForeignKey(Jornadas, models.DO_NOTHING, db_column='id_jornada')
+    id_competencia = models.ForeignKey(Competencias, models.DO_NOTHING, db_column='id_competencia')
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField()
+    hora_inicio = models.TimeField()
+    hora_fin = models.TimeField()
+
+    class Meta:
+        db_table = 'horarios_recurrentes'
+        indexes = [
+            models.Index(fields=['fecha_inicio', 'fecha_fin'], name='recurrentes_fechas_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ficha {self.id_ficha_id} {self.hora_inicio:%H:%M}-{self.hora_fin:%H:%M} ({self.fecha_inicio} a {self.fecha_fin})"
+
+    def clean(self):
+        super().clean()
+
+        if self.hora_fin <= self.hora_inicio:
+            raise ValidationError({'hora_fin': 'La hora fin debe ser mayor que la hora inicio.'})
+        if self.fecha_fin < self.fecha_inicio:
+            raise ValidationError({'fecha_fin': 'La fecha fin no puede ser anterior a la fecha inicio.'})
+
+        from .recurrencias import choques_regla
+
+        choques = choques_regla(self)
+        if choques['reglas']:
+            raise ValidationError(
+                'Se cruza con los horarios recurrentes %s.' % ', '.join(map(str, choques['reglas']))
+            )
+        if choques['horarios'].exists():
+            raise ValidationError('Se cruza con horarios ya programados en esas fechas.')
+
+
+class ExcepcionRecurrente(models.Model):
+    """
+    Fecha que la regla ya no genera: la ocurrencia se materializó (aunque el
+    bloque después se mueva o se borre) o se canceló. Las ocurrencias
+    pendientes y los cruces contra la regla saltan estas fechas.
+    """
+    recurrente = models.ForeignKey(
+        HorarioRecurrente, models.CASCADE, db_column='id_recurrente', related_name='excepciones'
+    )
+    fecha = models.DateField()
+
+    class Meta:
+        db_table = 'horarios_recurrentes_excepciones'
+        constraints = [
+            models.UniqueConstraint(fields=['recurrente', 'fecha'], name='excepcion_recurrente_unica'),
+        ]
+
+    def __str__(self):
+        return f"Regla {self.recurrente_id} sin {self.fecha}"
+
+
+# ===============================================================
+# OCUPACIÓN POR FRANJAS (cruces garantizados por la BD)
+# ===============================================================
+class OcupacionFranja(models.Model):
+    """
+    Franja de 15 minutos que un Horario ocupa para su instructor, su ficha
+    y su ambiente. La restricción única es la que impide los cruces, aun
+    con guardados simultáneos, cuando HORARIOS_OCUPACION_ESTRICTA está
+    activo (ver ocupacion.py).
+    """
+    RECURSO_CHOICES = (
+        ('I', 'Instructor'),
+        ('F', 'Ficha'),
+        ('A', 'Ambiente'),
+    )
+    recurso = models.CharField(max_length=1, choices=RECURSO_CHOICES)
+    id_recurso = models.BigIntegerField()
+    fecha = models.DateField()
+    franja = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = 'ocupacion_franjas'
+        constraints = [
+            models.UniqueConstraint(fields=['recurso', 'id_recurso', 'fecha', 'franja'], name='ocupacion_franja_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_recurso_display()} {self.id_recurso} {self.fecha} franja {self.franja}"
+
+
+# ===============================================================
+# LIBRO DE HORAS (planeadas vs. cumplidas, materializado)
+# ===============================================================
+class LibroHorasSemana(models.Model):
+    """
+    Totales por instructor y semana (lunes). Se mantiene por señales de
+    Horarios y HorasCumplidas; `manage.py reconstruir_libro_horas` lo rehace.
+    """
+    id_instructor = models.ForeignKey(Instructores, models.CASCADE, db_column='id_instructor')
+    semana = models.DateField()
+    minutos_planeados = models.IntegerField(default=0)
+    horas_cumplidas = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'libro_horas_semana'
+        constraints = [
+            models.UniqueConstraint(fields=['id_instructor', 'semana'], name='libro_horas_instructor_semana'),
+        ]
+
+    @property
+    def horas_planeadas(self):
+        return self.minutos_planeados / 60
+
+    def __str__(self):
+        return f"{self.id_instructor_id} - semana {self.semana}"
+
+
+class LibroHorasContrato(models.Model):
+    """Totales del periodo de un contrato, frente a `horas_por_cumplir`."""
+    contrato = models.OneToOneField(
+        Contratos, models.CASCADE, primary_key=True, db_column='id_contrato', related_name='libro'
+    )
+    minutos_planeados = models.IntegerField(default=0)
+    horas_cumplidas = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'libro_horas_contrato'
+
+    @property
+    def horas_planeadas(self):
+        return self.minutos_planeados / 60
+
+    def __str__(self):
+        return f"Contrato {self.contrato_id}"
+
+
+class VersionHorarios(models.Model):
+    """
+    Contador de cambios de Horarios por ámbito ('global', 'instructor:<id>').
+    Se incrementa al guardar o borrar un Horario y alimenta los ETag de las vistas.
+    """
+    ambito = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    modificado = models.DateTimeField()
+
+    class Meta:
+        db_table = 'versiones_horarios'
+
+    def __str__(self):
+        return f"{self.ambito} v{self.version}"
+
 
 class Coordinadores(models.Model):
     user = models.OneToOneField(
@@ -0,0 +1,160 @@
+# ocupacion.py
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Horarios, OcupacionFranja
+
+
+# ===============================================================
+# OCUPACIÓN POR FRANJAS (modo estricto)
+# ===============================================================
+# Con HORARIOS_OCUPACION_ESTRICTA cada Horario reserva, en la misma
+# transacción en que se escribe, una fila por recurso y franja de 15
+# minutos. Dos bloques que se cruzan comparten al menos una franja, así
+# que el segundo choca con la restricción única (una violación de índice,
+# no un barrido de rangos) aunque los dos hayan pasado clean() a la vez.
+# Las horas que no caen en múltiplos de 15 minutos ocupan la franja
+# completa, así que el control es conservador.
+#
+# Lo mantienen Horarios.save, el borrado (señal), validar_lote, los cambios
+# masivos y el generador de datos. QuerySet.update() sobre Horarios no pasa
+# por aquí: `manage.py reconstruir_ocupacion` rehace la tabla.
+
+FRANJA_MINUTOS = 15
+RECURSOS_OCUPACION = (('I', 'id_instructor_id'), ('F', 'id_ficha_id'), ('A', 'id_ambiente_id'))
+CAMPOS_OCUPACION = ('id_instructor_id', 'id_ficha_id', 'id_ambiente_id', 'fecha', 'hora_inicio', 'hora_fin')
+MENSAJE_CRUCE = 'Existe un cruce de horario con otro registro.'
+
+
+class CruceHorario(ValidationError):
+    """El bloque cae en una franja ya ocupada (lo detectó la restricción única)."""
+
+
+def ocupacion_estricta():
+    return settings.HORARIOS_OCUPACION_ESTRICTA
+
+
+def franjas(hora_inicio, hora_fin):
+    tamano = FRANJA_MINUTOS * 60
+    inicio = hora_inicio.hour * 3600 + hora_inicio.minute * 60 + hora_inicio.second
+    fin = hora_fin.hour * 3600 + hora_fin.minute * 60 + hora_fin.second
+    return range(inicio // tamano, -(-fin // tamano))
+
+
+def valores_de(horario):
+    return {campo: getattr(horario, campo) for campo in CAMPOS_OCUPACION}
+
+
+def valores_guardados(horario):
+    """Valores con los que el bloque está hoy en la BD (None si aún no existe)."""
+    if horario._state.adding or horario.pk is None:
+        return None
+    originales = getattr(horario, '_valores_originales', None) or {}
+    if all(campo in originales for campo in CAMPOS_OCUPACION):
+        return {campo: originales[campo] for campo in CAMPOS_OCUPACION}
+    return Horarios.objects.filter(pk=horario.pk).values(*CAMPOS_OCUPACION).first()
+
+
+# ---------------- reservar / soltar ----------------
+def _ocupar_valores(lista_valores):
+    filas = [
+        OcupacionFranja(recurso=recurso, id_recurso=valores[campo], fecha=valores['fecha'], franja=franja)
+        for valores in lista_valores
+        for recurso, campo in RECURSOS_OCUPACION
+        for franja in franjas(valores['hora_inicio'], valores['hora_fin'])
+    ]
+    try:
+        with transaction.atomic():
+            OcupacionFranja.objects.bulk_create(filas, batch_size=1000)
+    except IntegrityError:
+        raise CruceHorario(MENSAJE_CRUCE)
+
+
+def ocupar(horarios):
+    """Reserva las franjas de los bloques; CruceHorario si alguna ya está tomada."""
+    _ocupar_valores([valores_de(h) for h in horarios])
+
+
+def ocupar_por_bloque(horarios):
+    """
+    Como `ocupar`, pero no se detiene en el primer cruce: si el lote no cabe
+    completo reserva bloque por bloque y devuelve las posiciones de los que
+    comparten una franja ya tomada (en la BD o por un bloque anterior).
+    """
+    try:
+        ocupar(horarios)
+        return []
+    except CruceHorario:
+        pass
+    rechazados = []
+    for pos, horario in enumerate(horarios):
+        try:
+            ocupar([horario])
+        except CruceHorario:
+            rechazados.append(pos)
+    return rechazados
+
+
+def liberar(lista_valores):
+    """Suelta las franjas de los bloques dados por sus valores (ver CAMPOS_OCUPACION)."""
+    lista_valores = [v for v in lista_valores if v]
+    for pos in range(0, len(lista_valores), 200):
+        filtro = Q()
+        for valores in lista_valores[pos:pos + 200]:
+            rango = franjas(valores['hora_inicio'], valores['hora_fin'])
+            recursos = Q()
+            for recurso, campo in RECURSOS_OCUPACION:
+                recursos |= Q(recurso=recurso, id_recurso=valores[campo])
+            filtro |= Q(fecha=valores['fecha'], franja__gte=rango.start, franja__lt=rango.stop) & recursos
+        OcupacionFranja.objects.filter(filtro).delete()
+
+
+def reocupar(horario, anteriores=None):
+    """Después de guardar `horario`: suelta las franjas que tenía (`anteriores`) y toma las nuevas."""
+    if anteriores:
+        liberar([anteriores])
+    ocupar([horario])
+
+
+@receiver(post_delete, sender=Horarios)
+def _horario_eliminado(sender, instance, **kwargs):
+    if ocupacion_estricta():
+        originales = getattr(instance, '_valores_originales', None) or {}
+        liberar([{campo: originales.get(campo, getattr(instance, campo)) for campo in CAMPOS_OCUPACION}])
+
+
+# ---------------- reconstrucción ----------------
+def reconstruir():
+    """
+    Rehace la tabla a partir de Horarios (para activar el modo estricto con
+    datos existentes). Devuelve los id_horario que no caben porque ya se
+    cruzaban con otro bloque; esos quedan sin franjas hasta que se corrijan.
+    """
+    sin_lugar = []
+
+    def cargar(lote):
+        try:
+            _ocupar_valores(lote)
+        except CruceHorario:
+            for valores in lote:
+                try:
+                    _ocupar_valores([valores])
+                except CruceHorario:
+                    sin_lugar.append(valores['id_horario'])
+
+    with transaction.atomic():
+        OcupacionFranja.objects.all().delete()
+        lote = []
+        filas = Horarios.objects.order_by('fecha', 'hora_inicio', 'id_horario').values('id_horario', *CAMPOS_OCUPACION)
+        for valores in filas.iterator(chunk_size=2000):
+            lote.append(valores)
+            if len(lote) == 500:
+                cargar(lote)
+                lote = []
+        if lote:
+            cargar(lote)
+    return sin_lugar
@@ -0,0 +1,66 @@
+# pruebas.py
+from datetime import date, time
+
+from django.test import TestCase, TransactionTestCase
+
+from .models import (
+    Usuario, Instructores, NivelesFormacion, ProgramasFormacion, Ambientes,
+    Jornadas, Fichas, Competencias, Horarios
+)
+
+
+# ===============================================================
+# DATOS BASE PARA LAS PRUEBAS DE HORARIOS
+# ===============================================================
+# Un instructor, un programa, la Sala 1, la jornada de la mañana, la ficha
+# 2500001 y una competencia de 40 horas. Las clases de prueba heredan de
+# HorariosTestCase y agregan lo suyo llamando a super().setUpTestData().
+# Las que necesitan datos confirmados (p. ej. para otros procesos) heredan de
+# HorariosTransactionTestCase, que los crea en setUp().
+
+LUNES = date(2026, 1, 5)
+
+
+class DatosHorarios:
+
+    @classmethod
+    def crear_datos_base(cls):
+        cls.usuario = Usuario.objects.create_user(
+            10000001, 'clave-segura-123', username='instructor', tipo='INSTRUCTOR'
+        )
+        cls.instructor = Instructores.objects.create(user=cls.usuario, profesion='Ingeniero')
+        nivel = NivelesFormacion.objects.create(nombre_nivel='Tecnólogo')
+        cls.programa = ProgramasFormacion.objects.create(nombre_programa='ADSO', id_nivel=nivel)
+        cls.ambiente = Ambientes.objects.create(id_ambiente=1, nombre_ambiente='Sala 1')
+        cls.jornada = Jornadas.objects.create(nombre_jornada='Mañana', hora_inicio=time(6), hora_fin=time(12))
+        cls.ficha = Fichas.objects.create(
+            id_ficha=2500001, id_programa=cls.programa, id_instructor_lider=cls.instructor,
+            id_ambiente=cls.ambiente, id_jornada=cls.jornada, fecha_inicio=LUNES,
+        )
+        cls.competencia = Competencias.objects.create(
+            nombre_competencia='Programación', horas=40, programa_relacionado=cls.programa
+        )
+
+    @classmethod
+    def bloque(cls, inicio=(7,), fin=(9,), **campos):
+        """Horario sin guardar con los datos base; `inicio`/`fin` son tuplas para time()."""
+        datos = {
+            'id_ficha': cls.ficha, 'id_instructor': cls.instructor, 'id_ambiente': cls.ambiente,
+            'id_jornada': cls.jornada, 'id_competencia': cls.competencia,
+            'fecha': LUNES, 'hora_inicio': time(*inicio), 'hora_fin': time(*fin),
+        }
+        datos.update(campos)
+        return Horarios(**datos)
+
+
+class HorariosTestCase(DatosHorarios, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.crear_datos_base()
+
+
+class HorariosTransactionTestCase(DatosHorarios, TransactionTestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
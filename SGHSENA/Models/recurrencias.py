@@ -0,0 +1,296 @@
+# recurrencias.py
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .dias_semana import LUNES_A_SABADO, bit_de_fecha, dias_de
+
+
+# ===============================================================
+# HORARIOS RECURRENTES
+# ===============================================================
+# Una regla (HorarioRecurrente) representa todas sus ocurrencias. Los
+# cruces entre reglas se deciden con aritmética de fechas (¿se solapan los
+# rangos y comparten algún día de la semana en ese solape?), los cruces con
+# Horarios con una sola consulta por regla, y las ocurrencias solo se
+# generan cuando se consultan o se materializan.
+#
+# Una fecha materializada queda consumida (ExcepcionRecurrente): la regla
+# deja de generarla y de chocar en ella, así que mover o borrar ese bloque
+# libera la franja en lugar de hacer reaparecer la ocurrencia. Las fechas
+# canceladas a mano usan el mismo registro.
+
+Regla = namedtuple(
+    'Regla', 'id fecha_inicio fecha_fin inicio fin dias instructor ficha ambiente excluidas',
+    defaults=(frozenset(),),
+)
+
+
+def _segundos(hora):
+    return hora.hour * 3600 + hora.minute * 60 + hora.second
+
+
+def dias_por_jornada(jornadas=None):
+    """{id_jornada: máscara de días} según JornadaDia (de todas o de `jornadas`), en una consulta."""
+    from .models import JornadaDia
+
+    qs = JornadaDia.objects.all()
+    if jornadas is not None:
+        qs = qs.filter(jornada__in=jornadas)
+    dias = {}
+    for jornada, mascara in qs.values_list('jornada_id', 'mascara_dias'):
+        dias[jornada] = dias.get(jornada, 0) | mascara
+    return {jornada: mascara for jornada, mascara in dias.items() if mascara}
+
+
+def dias_regla(recurrente, por_jornada=None):
+    """Días marcados en la regla; si no tiene, los de su jornada; si tampoco, lunes a sábado."""
+    if recurrente.mascara_dias:
+        return recurrente.mascara_dias
+    if por_jornada is None:
+        por_jornada = dias_por_jornada()
+    return por_jornada.get(recurrente.id_jornada_id, LUNES_A_SABADO)
+
+
+def regla_de(recurrente, por_jornada=None, excluidas=frozenset()):
+    return Regla(
+        recurrente.pk, recurrente.fecha_inicio, recurrente.fecha_fin,
+        _segundos(recurrente.hora_inicio), _segundos(recurrente.hora_fin),
+        dias_regla(recurrente, por_jornada),
+        recurrente.id_instructor_id, recurrente.id_ficha_id, recurrente.id_ambiente_id,
+        excluidas,
+    )
+
+
+def fechas_excluidas(ids=None, desde=None, hasta=None):
+    """
+    {id_recurrente: frozenset(fechas)} consumidas o canceladas (de todas las
+    reglas si `ids` es None), opcionalmente solo entre `desde` y `hasta`.
+    """
+    from .models import ExcepcionRecurrente
+
+    qs = ExcepcionRecurrente.objects.all()
+    if ids is not None:
+        qs = qs.filter(recurrente__in=ids)
+    if desde is not None:
+        qs = qs.filter(fecha__gte=desde)
+    if hasta is not None:
+        qs = qs.filter(fecha__lte=hasta)
+    excluidas = {}
+    for recurrente, fecha in qs.values_list('recurrente_id', 'fecha'):
+        excluidas.setdefault(recurrente, set()).add(fecha)
+    return {recurrente: frozenset(fechas) for recurrente, fechas in excluidas.items()}
+
+
+def cargar_reglas(qs=None, con_excepciones=True, desde=None, hasta=None):
+    """
+    Todas las reglas (o las de `qs`) como tuplas Regla. Una consulta si no
+    hay reglas y a lo sumo tres si las hay: los días de las jornadas (solo
+    si alguna regla no marca días) y las fechas excluidas entre `desde` y
+    `hasta` (no con `con_excepciones=False`).
+    """
+    from .models import HorarioRecurrente
+
+    recurrentes = list(HorarioRecurrente.objects.all() if qs is None else qs)
+    if not recurrentes:
+        return []
+    sin_dias = {r.id_jornada_id for r in recurrentes if not r.mascara_dias}
+    por_jornada = dias_por_jornada(sin_dias) if sin_dias else {}
+    excluidas = {}
+    if con_excepciones:
+        excluidas = fechas_excluidas(None if qs is None else [r.pk for r in recurrentes], desde, hasta)
+    return [regla_de(r, por_jornada, excluidas.get(r.pk, frozenset())) for r in recurrentes]
+
+
+def consumir(pares):
+    """Marca las fechas (id_recurrente, fecha) como ya generadas: la regla no las vuelve a dar."""
+    from .models import ExcepcionRecurrente
+
+    filas = [ExcepcionRecurrente(recurrente_id=r, fecha=fecha) for r, fecha in set(pares) if r is not None]
+    ExcepcionRecurrente.objects.bulk_create(filas, batch_size=500, ignore_conflicts=True)
+
+
+@receiver(post_save, sender='Models.Horarios')
+def _ocurrencia_creada(sender, instance, created, **kwargs):
+    if created and instance.id_recurrente_id is not None:
+        consumir([(instance.id_recurrente_id, instance.fecha)])
+
+
+# ---------------- fechas ----------------
+def fechas_regla(regla, desde=None, hasta=None):
+    """Genera las fechas de la regla dentro de [desde, hasta]."""
+    dia = max(regla.fecha_inicio, desde or regla.fecha_inicio)
+    fin = min(regla.fecha_fin, hasta or regla.fecha_fin)
+    while dia <= fin:
+        if regla.dias & bit_de_fecha(dia) and dia not in regla.excluidas:
+            yield dia
+        dia += timedelta(days=1)
+
+
+def comparten_fecha(a, b):
+    """¿Hay alguna fecha que esté en ambas reglas? Sin recorrer las semanas."""
+    desde = max(a.fecha_inicio, b.fecha_inicio)
+    hasta = min(a.fecha_fin, b.fecha_fin)
+    if desde > hasta:
+        return False
+    comunes = a.dias & b.dias
+    if (hasta - desde).days >= 6:
+        return bool(comunes)
+    return any(comunes & bit_de_fecha(desde + timedelta(days=n)) for n in range((hasta - desde).days + 1))
+
+
+def _mismo_recurso(regla, instructor, ficha, ambiente):
+    return regla.instructor == instructor or regla.ficha == ficha or regla.ambiente == ambiente
+
+
+# ---------------- cruces ----------------
+def reglas_en_choque(fecha, hora_inicio, hora_fin, instructor, ficha, ambiente, excluir=None, reglas=None):
+    """
+    id de las reglas con una ocurrencia en `fecha` que se cruza con el
+    bloque para el mismo instructor, ficha o ambiente. `reglas` (lista de
+    Regla) evita la consulta cuando ya están cargadas.
+    """
+    if reglas is None:
+        from .models import HorarioRecurrente
+
+        reglas = cargar_reglas(HorarioRecurrente.objects.filter(
+            Q(id_instructor=instructor) | Q(id_ficha=ficha) | Q(id_ambiente=ambiente),
+            fecha_inicio__lte=fecha, fecha_fin__gte=fecha,
+            hora_inicio__lt=hora_fin, hora_fin__gt=hora_inicio,
+        ), desde=fecha, hasta=fecha)
+    inicio, fin = _segundos(hora_inicio), _segundos(hora_fin)
+    return [
+        r.id for r in reglas
+        if r.id != excluir
+        and r.fecha_inicio <= fecha <= r.fecha_fin
+        and r.dias & bit_de_fecha(fecha)
+        and fecha not in r.excluidas
+        and r.inicio < fin and r.fin > inicio
+        and _mismo_recurso(r, instructor, ficha, ambiente)
+    ]
+
+
+def _week_day(dia):
+    # weekday() de Python (0=lunes) a __week_day de Django (1=domingo ... 7=sábado)
+    return (dia + 1) % 7 + 1
+
+
+def choques_regla(recurrente):
+    """
+    Cruces de una regla: {'reglas': [id, ...], 'horarios': QuerySet}.
+    Contra otras reglas se compara regla con regla; contra Horarios es una
+    sola consulta filtrada por rango de fechas, horas y días de la semana.
+    """
+    from .models import Horarios, HorarioRecurrente
+
+    regla = regla_de(recurrente)
+    candidatas = HorarioRecurrente.objects.filter(
+        Q(id_instructor=recurrente.id_instructor_id) | Q(id_ficha=recurrente.id_ficha_id) |
+        Q(id_ambiente=recurrente.id_ambiente_id),
+        fecha_inicio__lte=recurrente.fecha_fin, fecha_fin__gte=recurrente.fecha_inicio,
+        hora_inicio__lt=recurrente.hora_fin, hora_fin__gt=recurrente.hora_inicio,
+    )
+    if recurrente.pk:
+        candidatas = candidatas.exclude(pk=recurrente.pk)
+    # comparten_fecha trabaja con los días de la semana y no mira las fechas excluidas
+    reglas = [
+        otra.id for otra in cargar_reglas(candidatas, con_excepciones=False) if comparten_fecha(regla, otra)
+    ]
+
+    horarios = Horarios.objects.filter(
+        Q(id_instructor=recurrente.id_instructor_id) | Q(id_ficha=recurrente.id_ficha_id) |
+        Q(id_ambiente=recurrente.id_ambiente_id),
+        fecha__range=(recurrente.fecha_inicio, recurrente.fecha_fin),
+        fecha__week_day__in=[_week_day(d) for d in dias_de(regla.dias)],
+        hora_inicio__lt=recurrente.hora_fin, hora_fin__gt=recurrente.hora_inicio,
+    )
+    if recurrente.pk:
+        horarios = horarios.exclude(id_recurrente=recurrente.pk)
+    return {'reglas': reglas, 'horarios': horarios}
+
+
+# ---------------- ocurrencias ----------------
+def ocurrencias_por_recurso(recurso, desde, hasta, hora_inicio, hora_fin, ids=None):
+    """
+    {(id_recurso, fecha): [(inicio, fin), ...]} (en segundos) con las
+    ocurrencias aún sin materializar entre `desde` y `hasta` que tocan
+    [hora_inicio, hora_fin). `recurso` es 'instructor', 'ficha' o 'ambiente';
+    `ids` limita los recursos.
+    """
+    from .models import HorarioRecurrente
+
+    qs = HorarioRecurrente.objects.filter(
+        fecha_inicio__lte=hasta, fecha_fin__gte=desde,
+        hora_inicio__lt=hora_fin, hora_fin__gt=hora_inicio,
+    )
+    if ids is not None:
+        qs = qs.filter(**{f'id_{recurso}__in': ids})
+    ocupadas = {}
+    for regla in cargar_reglas(qs, desde=desde, hasta=hasta):
+        for fecha in fechas_regla(regla, desde, hasta):
+            ocupadas.setdefault((getattr(regla, recurso), fecha), []).append((regla.inicio, regla.fin))
+    return ocupadas
+
+
+def ocurrencias_pendientes(desde, hasta, instructor=None, ficha=None, ambiente=None):
+    """
+    Genera Horarios sin guardar (pk None, con `id_recurrente`) para las
+    ocurrencias entre `desde` y `hasta` que aún no se han materializado.
+    Los objetos relacionados vienen cargados, así que leer nombres no
+    hace más consultas.
+    """
+    from .models import Horarios, HorarioRecurrente
+
+    qs = HorarioRecurrente.objects.filter(fecha_inicio__lte=hasta, fecha_fin__gte=desde).select_related(
+        'id_ficha', 'id_instructor__user', 'id_ambiente', 'id_jornada', 'id_competencia'
+    )
+    if instructor is not None:
+        qs = qs.filter(id_instructor=instructor)
+    if ficha is not None:
+        qs = qs.filter(id_ficha=ficha)
+    if ambiente is not None:
+        qs = qs.filter(id_ambiente=ambiente)
+    recurrentes = list(qs)
+    if not recurrentes:
+        return
+
+    ids = [r.pk for r in recurrentes]
+    materializadas = set(Horarios.objects.filter(
+        id_recurrente__in=ids, fecha__range=(desde, hasta)
+    ).values_list('id_recurrente_id', 'fecha'))
+    excluidas = fechas_excluidas(ids, desde, hasta)
+    por_jornada = dias_por_jornada({r.id_jornada_id for r in recurrentes if not r.mascara_dias})
+    for recurrente in recurrentes:
+        regla = regla_de(recurrente, por_jornada, excluidas.get(recurrente.pk, frozenset()))
+        for fecha in fechas_regla(regla, desde, hasta):
+            if (recurrente.pk, fecha) in materializadas:
+                continue
+            yield Horarios(
+                id_ficha=recurrente.id_ficha, id_instructor=recurrente.id_instructor,
+                id_ambiente=recurrente.id_ambiente, id_jornada=recurrente.id_jornada,
+                id_competencia=recurrente.id_competencia, id_recurrente=recurrente,
+                fecha=fecha, hora_inicio=recurrente.hora_inicio, hora_fin=recurrente.hora_fin,
+            )
+
+
+def materializar(recurrente, desde=None, hasta=None):
+    """
+    Guarda en Horarios las ocurrencias pendientes de la regla (opcionalmente
+    solo entre `desde` y `hasta`) y consume sus fechas. Pasa por
+    `validar_lote`, así que los cruces con otros bloques se reportan en
+    lugar de guardarse. Devuelve (creados, conflictos).
+    """
+    from consultas.consultas import validar_lote
+
+    desde = max(recurrente.fecha_inicio, desde or recurrente.fecha_inicio)
+    hasta = min(recurrente.fecha_fin, hasta or recurrente.fecha_fin)
+    bloques = [
+        o for o in ocurrencias_pendientes(desde, hasta, ficha=recurrente.id_ficha_id)
+        if o.id_recurrente_id == recurrente.pk
+    ]
+    creados, conflictos = validar_lote(bloques)
+    consumir((recurrente.pk, h.fecha) for h in creados)
+    return creados, conflictos
@@ -1,3 +1,423 @@
-from django.test import TestCase
+import io
+from datetime import date, time, timedelta
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import (
+    Usuario, Instructores, NivelesFormacion, ProgramasFormacion, Ambientes,
+    Jornadas, JornadaDia, Fichas, Competencias, Horarios, HorarioRecurrente, ExcepcionRecurrente,
+    OcupacionFranja, Contratos, HorasCumplidas, LibroHorasSemana, LibroHorasContrato
+)
+from consultas.consultas import validar_lote
+from consultas.masivo import mover
+
+from .catalogos import catalogo
+from .datos_sinteticos import generar
+from .importacion import importar
+from .libro_horas import balance_contrato, horas_semana, reconstruir, registrar_horarios
+from .dias_semana import mascara_de
+from .ocupacion import CruceHorario, reconstruir as reconstruir_ocupacion
+from .pruebas import LUNES, HorariosTestCase
+from .recurrencias import choques_regla, materializar, ocurrencias_pendientes
+from .versiones import version_de
+from .validacion_horarios import IndiceHorarios, indice_actual, indice_horarios
+
+
+class HorarioRecurrenteTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        JornadaDia.objects.create(jornada=cls.jornada, Lunes=True, Miercoles=True)
+
+    def recurrente(self, **campos):
+        datos = {
+            'id_ficha': self.ficha, 'id_instructor': self.instructor, 'id_ambiente': self.ambiente,
+            'id_jornada': self.jornada, 'id_competencia': self.competencia,
+            'fecha_inicio': date(2026, 1, 5), 'fecha_fin': date(2026, 3, 31),
+            'hora_inicio': time(7), 'hora_fin': time(10),
+        }
+        datos.update(campos)
+        return HorarioRecurrente(**datos)
+
+    def test_dias_de_la_jornada_y_materializacion(self):
+        regla = self.recurrente()
+        regla.full_clean()
+        regla.save()
+
+        # Sin días marcados usa los de JornadaDia: lunes y miércoles del trimestre
+        ocurrencias = list(ocurrencias_pendientes(date(2026, 1, 1), date(2026, 3, 31)))
+        self.assertEqual(len(ocurrencias), 25)
+        self.assertEqual({o.fecha.weekday() for o in ocurrencias}, {0, 2})
+        self.assertFalse(Horarios.objects.exists())
+
+        creados, conflictos = materializar(regla, hasta=date(2026, 1, 31))
+        self.assertEqual((len(creados), conflictos), (8, []))
+        self.assertEqual(len(list(ocurrencias_pendientes(date(2026, 1, 1), date(2026, 3, 31)))), 17)
+        self.assertEqual(materializar(regla, hasta=date(2026, 1, 31)), ([], []))
+
+    def test_cruces_sin_expandir_ocurrencias(self):
+        self.recurrente(Lunes=True).save()
+
+        otra = self.recurrente(fecha_inicio=date(2026, 3, 1), hora_inicio=time(9), hora_fin=time(11), Lunes=True)
+        # Reglas candidatas y Horarios (las reglas marcan sus días: JornadaDia
+        # no se consulta); no depende de cuántas ocurrencias haya
+        with CaptureQueriesContext(connection) as ctx:
+            choques = choques_regla(otra)
+            self.assertFalse(choques['horarios'].exists())
+        self.assertEqual(len(choques['reglas']), 1)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        with self.assertRaises(ValidationError):
+            otra.full_clean()
+
+        # Mismo horario pero otro día de la semana: no se cruzan
+        self.recurrente(fecha_inicio=date(2026, 3, 1), Martes=True).full_clean()
+
+        bloque = self.bloque((8,), (9,), fecha=date(2026, 2, 2))
+        with self.assertRaisesMessage(ValidationError, 'horario recurrente'):
+            bloque.full_clean()
+
+    def test_indice_carga_solo_reglas_de_sus_fechas(self):
+        enero = self.recurrente(fecha_fin=date(2026, 1, 31))
+        enero.save()
+        self.recurrente(fecha_inicio=date(2026, 3, 2)).save()
+        with indice_horarios(date(2026, 1, 5), date(2026, 1, 9)) as indice:
+            self.assertEqual([r.id for r in indice.reglas_recurrentes()], [enero.pk])
+            # Ya en memoria: clean() no consulta reglas ni Horarios
+            with self.assertNumQueries(0):
+                with self.assertRaisesMessage(ValidationError, 'horario recurrente'):
+                    self.bloque((8,), (9,), fecha=date(2026, 1, 5)).clean()
+                self.bloque((10,), (11,), fecha=date(2026, 1, 5)).clean()
+
+        # Con los recursos del lote: una regla de otro ambiente, ficha e instructor no se lee
+        indice = IndiceHorarios()
+        indice.cargar_rango(date(2026, 1, 5), date(2026, 1, 9))
+        otro = Instructores.objects.create(
+            user=Usuario.objects.create_user(10000002, None, username='otro', tipo='INSTRUCTOR'), profesion='Diseñador'
+        )
+        indice.limitar_reglas([self.bloque(id_instructor=otro, id_ficha_id=99, id_ambiente_id=99)])
+        self.assertEqual(indice.reglas_recurrentes(), [])
+
+    def test_fechas_materializadas_no_reaparecen(self):
+        regla = self.recurrente()
+        regla.save()
+        lunes, miercoles = date(2026, 1, 5), date(2026, 1, 7)
+        self.assertEqual(len(materializar(regla, hasta=miercoles)[0]), 2)
+
+        # Borrar la ocurrencia del lunes libera la franja sin que la regla la vuelva a generar
+        Horarios.objects.get(fecha=lunes).delete()
+        self.assertEqual(list(ocurrencias_pendientes(lunes, miercoles)), [])
+        self.bloque((8,), (9,), fecha=lunes).full_clean()
+
+        # Moverla (cambio masivo) también deja libre la fecha original
+        cambiados, conflictos = mover(Horarios.objects.filter(fecha=miercoles), 1)
+        self.assertEqual((len(cambiados), conflictos), (1, []))
+        self.assertEqual(list(ocurrencias_pendientes(lunes, miercoles)), [])
+        creados, conflictos = validar_lote([self.bloque((8,), (9,), fecha=miercoles)])
+        self.assertEqual((len(creados), conflictos), (1, []))
+
+        # Una fecha cancelada a mano se salta igual; las demás siguen bloqueadas por la regla
+        ExcepcionRecurrente.objects.create(recurrente=regla, fecha=date(2026, 1, 12))
+        self.assertEqual(
+            [o.fecha for o in ocurrencias_pendientes(date(2026, 1, 12), date(2026, 1, 14))], [date(2026, 1, 14)]
+        )
+        with self.assertRaisesMessage(ValidationError, 'horario recurrente'):
+            self.bloque((8,), (9,), fecha=date(2026, 1, 14)).full_clean()
+
+
+class MascaraDiasTests(TestCase):
+
+    def test_propiedades_y_lookup_comparte(self):
+        manana = Jornadas.objects.create(nombre_jornada='Mañana', hora_inicio=time(6), hora_fin=time(12))
+        tarde = Jornadas.objects.create(nombre_jornada='Tarde', hora_inicio=time(12), hora_fin=time(18))
+        lunes_viernes = JornadaDia.objects.create(jornada=manana, Lunes=True, Viernes=True)
+        sabado = JornadaDia.objects.create(jornada=tarde, mascara_dias=mascara_de(['Sabado']))
+
+        self.assertEqual(lunes_viernes.mascara_dias, 0b0010001)
+        self.assertEqual(str(lunes_viernes), 'Mañana - Lunes, Viernes')
+        lunes_viernes.Viernes = False
+        self.assertEqual(lunes_viernes.mascara_dias, 0b0000001)
+
+        comparte = JornadaDia.objects.filter(mascara_dias__comparte=mascara_de([4, 5])).order_by('id')
+        self.assertEqual(list(comparte), [lunes_viernes, sabado])
+        self.assertFalse(JornadaDia.objects.filter(mascara_dias__comparte=mascara_de(['Domingo'])).exists())
+
+
+class AdminListadosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(10000009, 'clave-segura-123', username='admin')
+        nivel = NivelesFormacion.objects.create(nombre_nivel='Tecnólogo')
+        cls.programa = ProgramasFormacion.objects.create(nombre_programa='ADSO', id_nivel=nivel)
+        cls.jornada = Jornadas.objects.create(nombre_jornada='Mañana', hora_inicio=time(6), hora_fin=time(12))
+        JornadaDia.objects.create(jornada=cls.jornada, Lunes=True)
+        cls.competencia = Competencias.objects.create(
+            nombre_competencia='Programación', horas=40, programa_relacionado=cls.programa
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.creados = 0
+
+    def agregar(self, cantidad):
+        """Una ficha con su instructor y ambiente propios, y `cantidad` horarios."""
+        for _ in range(cantidad):
+            self.creados += 1
+            n = self.creados
+            usuario = Usuario.objects.create_user(20000000 + n, None, username=f'inst{n}', tipo='INSTRUCTOR')
+            instructor = Instructores.objects.create(user=usuario, profesion='Ingeniero')
+            ambiente = Ambientes.objects.create(id_ambiente=n, nombre_ambiente=f'Sala {n}')
+            ficha = Fichas.objects.create(
+                id_ficha=2500000 + n, id_programa=self.programa, id_instructor_lider=instructor,
+                id_ambiente=ambiente, id_jornada=self.jornada, fecha_inicio=date(2026, 1, 5),
+            )
+            Horarios.objects.create(
+                id_ficha=ficha, id_instructor=instructor, id_ambiente=ambiente, id_jornada=self.jornada,
+                id_competencia=self.competencia, fecha=date(2026, 1, 5), hora_inicio=time(7), hora_fin=time(9),
+            )
+
+    def consultas(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_consultas_fijas_por_listado(self):
+        urls = [
+            f'/admin/Models/{modelo}/' for modelo in ('horarios', 'fichas', 'instructores', 'jornadadia', 'contratos')
+        ] + ['/admin/Models/ambientes/?q=Sala']
+        self.agregar(2)
+        antes = [self.consultas(url) for url in urls]
+        self.agregar(8)
+        self.assertEqual([self.consultas(url) for url in urls], antes)
+        self.assertLessEqual(max(antes), 10)
+
+    def test_opciones_de_instructor_sin_consulta_por_fila(self):
+        autocompletar = '/admin/autocomplete/?app_label=Models&model_name=horarios&field_name=id_instructor'
+        self.agregar(2)
+        horario = Horarios.objects.first()
+        urls = [autocompletar, f'/admin/Models/horarios/{horario.pk}/change/', '/admin/Models/contratos/add/']
+        for url in urls:
+            self.consultas(url)  # calienta cachés de sesión y catálogos
+        antes = [self.consultas(url) for url in urls]
+        self.agregar(8)
+        self.assertEqual(len(self.client.get(autocompletar).json()['results']), 10)
+        self.assertEqual([self.consultas(url) for url in urls], antes)
+
+
+class DatosSinteticosTests(TestCase):
+
+    def test_generar_sin_cruces(self):
+        caches['catalogos'].clear()
+        self.assertEqual(catalogo('ambientes'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            creados = generar(ambientes=3, instructores=4, fichas=10, competencias=12, semanas=1, desde=date(2026, 1, 14))
+        # bulk_create no envía señales: generar invalida los catálogos y marca las versiones
+        self.assertEqual(len(catalogo('ambientes')), 3)
+        bloque = Horarios.objects.first()
+        for ambito in (f'instructor:{bloque.id_instructor_id}', f'ficha:{bloque.id_ficha_id}',
+                       f'ambiente:{bloque.id_ambiente_id}', 'global'):
+            self.assertGreater(version_de(ambito)[0], 0, ambito)
+        self.assertEqual(Horarios.objects.count(), creados['horarios'])
+        self.assertEqual(Horarios.objects.order_by('fecha').first().fecha, date(2026, 1, 12))
+        # 4/3/3 fichas por jornada, pero solo caben 3 (hay 3 ambientes): 2 franjas x (5 + 5 + 6 días) x 3
+        self.assertEqual(creados['horarios'], 2 * 16 * 3)
+        for campo in ('id_instructor', 'id_ambiente', 'id_ficha'):
+            repetidos = Horarios.objects.values(campo, 'fecha', 'hora_inicio').annotate(n=Count('pk')).filter(n__gt=1)
+            self.assertFalse(repetidos.exists(), campo)
+
+
+class IndiceHorariosTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.existente = cls.bloque((7,), (9,))
+        cls.existente.save()
+
+    def choques(self, indice, inicio, fin, **recursos):
+        recursos = recursos or {'instructor': self.instructor}
+        return indice.choques(LUNES, time(*inicio), time(*fin), **recursos)
+
+    def test_cruce_y_bordes(self):
+        indice = IndiceHorarios()
+        indice.cargar_rango(LUNES, LUNES)
+        pk = self.existente.pk
+        with self.assertNumQueries(0):
+            # Los intervalos son [inicio, fin): tocarse en el borde no es cruce
+            self.assertEqual(self.choques(indice, (6,), (7,)), set())
+            self.assertEqual(self.choques(indice, (9,), (10,)), set())
+            self.assertEqual(self.choques(indice, (6,), (7, 1)), {pk})
+            self.assertEqual(self.choques(indice, (8, 59), (10,)), {pk})
+            self.assertEqual(self.choques(indice, (7, 30), (8,)), {pk})
+            self.assertEqual(self.choques(indice, (6,), (12,)), {pk})
+            # Otro recurso, o la misma franja pero del propio bloque (al editarlo)
+            self.assertEqual(self.choques(indice, (7,), (9,), ambiente=99), set())
+            self.assertEqual(self.choques(indice, (7,), (9,), ficha=self.ficha, horario_id=pk), set())
+
+        # Un bloque largo que empieza mucho antes sigue contando (max_duracion)
+        indice.agregar(-1, LUNES, time(6), time(12), 99, 99, 99)
+        indice.agregar(-2, LUNES, time(11, 30), time(11, 45), 99, 99, 99)
+        self.assertEqual(self.choques(indice, (11,), (11, 15), ambiente=99), {-1})
+        self.assertEqual(self.choques(indice, (11, 40), (12,), ambiente=99), {-1, -2})
+        indice.quitar(-1)
+        self.assertEqual(self.choques(indice, (11,), (11, 15), ambiente=99), set())
+
+    def test_senales_mantienen_el_indice_activo(self):
+        with indice_horarios(LUNES) as indice:
+            self.assertIs(indice_actual(), indice)
+            nuevo = self.bloque((10,), (11,))
+            nuevo.save()
+            self.assertEqual(self.choques(indice, (10, 30), (12,)), {nuevo.pk})
+
+            # Al moverlo se libera la posición vieja
+            nuevo.hora_inicio, nuevo.hora_fin = time(11), time(12)
+            nuevo.save()
+            self.assertEqual(self.choques(indice, (10,), (11,)), set())
+            self.assertEqual(self.choques(indice, (11, 30), (12,)), {nuevo.pk})
+
+            nuevo.delete()
+            self.assertEqual(self.choques(indice, (10,), (12,)), set())
+            self.assertEqual(self.choques(indice, (8,), (12,)), {self.existente.pk})
+        self.assertIsNone(indice_actual())
+
+        # Fuera del bloque `with` el índice ya no recibe cambios
+        self.bloque((10,), (11,)).save()
+        self.assertEqual(self.choques(indice, (10,), (11,)), set())
+
+
+class LibroHorasTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.enero = Contratos.objects.create(
+            id_instructor=cls.instructor, tipo_contrato='Planta', horas_por_cumplir=100,
+            fecha_inicio=date(2026, 1, 1), fecha_fin=date(2026, 1, 11),
+        )
+        cls.febrero = Contratos.objects.create(
+            id_instructor=cls.instructor, tipo_contrato='Contratista', horas_por_cumplir=50,
+            fecha_inicio=date(2026, 1, 12), fecha_fin=date(2026, 2, 28),
+        )
+
+    def libro(self):
+        # Las filas en cero que deja el incremental no existen tras reconstruir
+        semanas = set(
+            LibroHorasSemana.objects.exclude(minutos_planeados=0, horas_cumplidas=0)
+            .values_list('id_instructor_id', 'semana', 'minutos_planeados', 'horas_cumplidas')
+        )
+        contratos = set(LibroHorasContrato.objects.values_list('contrato_id', 'minutos_planeados', 'horas_cumplidas'))
+        return semanas, contratos
+
+    def test_movimientos_coinciden_con_reconstruir(self):
+        siguiente = LUNES + timedelta(days=7)
+        bloque = self.bloque((7,), (9,))
+        bloque.save()
+        HorasCumplidas.objects.create(id_instructor=self.instructor, id_ficha=self.ficha, fecha=LUNES, horas_cumplidas=2)
+        self.assertEqual(horas_semana(self.instructor, LUNES), (2, 2))
+
+        # Mover a la semana siguiente (y alargarlo) pasa los minutos de semana y de contrato
+        bloque.fecha, bloque.hora_fin = siguiente, time(10)
+        bloque.save()
+        self.assertEqual(horas_semana(self.instructor, LUNES), (0, 2))
+        self.assertEqual(horas_semana(self.instructor, siguiente), (3, 0))
+        self.assertEqual(balance_contrato(self.enero)['horas_planeadas'], 0)
+        self.assertEqual(balance_contrato(self.febrero)['horas_planeadas'], 3)
+
+        # Escrituras sin señales más un cambio masivo y un borrado
+        nuevos = Horarios.objects.bulk_create([
+            self.bloque((10,), (12,)), self.bloque((6,), (7, 30), fecha=siguiente + timedelta(days=1)),
+        ])
+        registrar_horarios(nuevos)
+        mover(Horarios.objects.filter(pk=nuevos[0].pk), 1)
+        Horarios.objects.get(pk=nuevos[1].pk).delete()
+        self.assertEqual(horas_semana(self.instructor, LUNES), (2, 2))
+        self.assertEqual(horas_semana(self.instructor, siguiente), (3, 0))
+
+        incremental = self.libro()
+        reconstruir()
+        self.assertEqual(self.libro(), incremental)
+
+
+@override_settings(HORARIOS_OCUPACION_ESTRICTA=True)
+class OcupacionFranjasTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.otro_ambiente = Ambientes.objects.create(id_ambiente=2, nombre_ambiente='Sala 2')
+
+    def test_save_directo_no_deja_cruces(self):
+        primero = self.bloque((7,), (9,))
+        primero.save()
+        # 3 recursos x 8 franjas de 15 minutos
+        self.assertEqual(OcupacionFranja.objects.count(), 24)
+        self.bloque((9,), (10,)).save()
+
+        # Sin pasar por clean(): la restricción única lo detiene y no queda la fila
+        with self.assertRaises(CruceHorario):
+            self.bloque((8, 45), (9, 15), id_ambiente=self.otro_ambiente).save()
+        self.assertEqual(Horarios.objects.count(), 2)
+
+        # Mover el primer bloque libera sus franjas; borrarlo también
+        primero.hora_inicio, primero.hora_fin = time(6), time(7)
+        primero.save()
+        self.bloque((7,), (8,)).save()
+        Horarios.objects.filter(hora_inicio=time(6)).delete()
+        self.bloque((6,), (7,)).save()
+
+        creados, conflictos = validar_lote([self.bloque((7, 30), (8, 30))])
+        self.assertEqual((creados, len(conflictos)), ([], 1))
+
+    def test_reconstruir_reporta_cruces_previos(self):
+        with override_settings(HORARIOS_OCUPACION_ESTRICTA=False):
+            self.bloque((7,), (9,)).save()
+            cruzado = self.bloque((8,), (10,))
+            cruzado.save()
+        self.assertEqual(reconstruir_ocupacion(), [cruzado.pk])
+        self.assertEqual(OcupacionFranja.objects.count(), 24)
+
+
+class ImportacionTests(HorariosTestCase):
+
+    def importar(self, tipo, lineas):
+        return importar(tipo, io.BytesIO('\n'.join(lineas).encode()), f'{tipo}.csv', tamano_lote=2)
+
+    def test_filas_malas_no_detienen_la_carga(self):
+        resultado = self.importar('ambientes', [
+            'id_ambiente;nombre_ambiente',
+            '2;Sala 2',
+            '',
+            '3;' + 'x' * 101,
+            'tres;Sala 3',
+            '"4";"Sala',
+            'de dos líneas"',
+            '1;Repetido',
+            '5;Sala 5',
+        ])
+        self.assertEqual(resultado.creados, 3)
+        self.assertEqual([numero for numero, _ in resultado.errores], [4, 5, 8])
+        self.assertIn('nombre_ambiente', resultado.errores[0][1])
+        self.assertEqual(
+            sorted(Ambientes.objects.values_list('id_ambiente', flat=True)), [1, 2, 4, 5]
+        )
+
+    def test_horarios_con_errores_mezclados(self):
+        documento = self.usuario.numero_documento
+        resultado = self.importar('horarios', [
+            'id_ficha,documento_instructor,id_ambiente,id_jornada,id_competencia,fecha,hora_inicio,hora_fin',
+            f'2500001,{documento},1,{self.jornada.pk},{self.competencia.pk},2026-01-05,07:00,09:00',
+            f'2599999,{documento},1,{self.jornada.pk},{self.competencia.pk},2026-01-05,09:00,10:00',
+            f'2500001,{documento},1,{self.jornada.pk},{self.competencia.pk},05/01/2026,08:00,10:00',
+            f'2500001,{documento},1,{self.jornada.pk},{self.competencia.pk},ayer,10:00,11:00',
+            '',
+            f'2500001,{documento},1,{self.jornada.pk},{self.competencia.pk},2026-01-06,07:00,09:00',
+        ])
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual([numero for numero, _ in resultado.errores], [3, 4, 5])
+        self.assertIn('cruce', resultado.errores[1][1])
@@ -0,0 +1,269 @@
+# validacion_horarios.py
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+
+# ===============================================================
+# ÍNDICE EN MEMORIA DE CRUCES DE HORARIO
+# ===============================================================
+# Cada recurso (instructor, ficha, ambiente) tiene por fecha una lista de
+# bloques ordenada por hora de inicio. Preguntar si [inicio, fin) choca es
+# una búsqueda binaria más el recorrido de los pocos bloques vecinos, sin
+# ir a la base de datos.
+
+RECURSOS = ('instructor', 'ficha', 'ambiente')
+
+
+def _segundos(hora):
+    return hora.hour * 3600 + hora.minute * 60 + hora.second
+
+
+def _clave(valor):
+    # Acepta tanto instancias de modelo como llaves primarias
+    return getattr(valor, 'pk', valor)
+
+
+class _Cubeta:
+    """Bloques de un recurso en una fecha, ordenados por hora de inicio."""
+
+    __slots__ = ('inicios', 'bloques', 'max_duracion')
+
+    def __init__(self):
+        self.inicios = []
+        self.bloques = []
+        self.max_duracion = 0
+
+    def agregar(self, inicio, fin, horario_id):
+        pos = bisect_right(self.inicios, inicio)
+        self.inicios.insert(pos, inicio)
+        self.bloques.insert(pos, (inicio, fin, horario_id))
+        self.max_duracion = max(self.max_duracion, fin - inicio)
+
+    def quitar(self, inicio, horario_id):
+        pos = bisect_left(self.inicios, inicio)
+        while pos < len(self.bloques) and self.bloques[pos][0] == inicio:
+            if self.bloques[pos][2] == horario_id:
+                del self.inicios[pos]
+                del self.bloques[pos]
+                return
+            pos += 1
+
+    def choques(self, inicio, fin):
+        # Solo pueden cruzarse los bloques que empiezan antes de `fin` y
+        # después de `inicio - max_duracion`.
+        pos = bisect_left(self.inicios, fin) - 1
+        limite = inicio - self.max_duracion
+        while pos >= 0 and self.bloques[pos][0] >= limite:
+            if self.bloques[pos][1] > inicio:
+                yield self.bloques[pos][2]
+            pos -= 1
+
+
+class IndiceHorarios:
+    """
+    Índice de Horarios por fecha y recurso. Las fechas se cargan de forma
+    perezosa (una consulta por fecha o por rango) y luego las consultas de
+    cruce se responden en memoria.
+    """
+
+    def __init__(self):
+        self._cubetas = {}
+        self._fechas = set()
+        self._por_id = {}
+        self._desde = self._hasta = None
+        self._reglas = None  # (desde, hasta, reglas)
+        self._recursos_reglas = None
+
+    # ---------------- carga ----------------
+    def cargar_rango(self, fecha_inicio, fecha_fin):
+        pendientes = []
+        dia = fecha_inicio
+        while dia <= fecha_fin:
+            if dia not in self._fechas:
+                pendientes.append(dia)
+            dia += timedelta(days=1)
+        if pendientes:
+            self._cargar({'fecha__range': (pendientes[0], pendientes[-1])}, pendientes)
+
+    def cargar_fechas(self, fechas):
+        """Como `cargar_rango`, pero solo las fechas dadas (sueltas, con `fecha__in`)."""
+        pendientes = sorted(set(fechas) - self._fechas)
+        if pendientes:
+            self._cargar({'fecha__in': pendientes}, pendientes)
+
+    def _cargar(self, filtro, pendientes):
+        from .models import Horarios
+
+        filas = Horarios.objects.filter(**filtro).values_list(
+            'id_horario', 'fecha', 'hora_inicio', 'hora_fin',
+            'id_instructor_id', 'id_ficha_id', 'id_ambiente_id',
+        )
+        pendientes = set(pendientes)
+        for fila in filas:
+            if fila[1] in pendientes:
+                self._indexar(*fila)
+        self._fechas.update(pendientes)
+        self._desde = min(pendientes) if self._desde is None else min(self._desde, *pendientes)
+        self._hasta = max(pendientes) if self._hasta is None else max(self._hasta, *pendientes)
+
+    def _asegurar_fecha(self, fecha):
+        if fecha not in self._fechas:
+            self.cargar_rango(fecha, fecha)
+
+    # ---------------- mantenimiento ----------------
+    def _indexar(self, horario_id, fecha, hora_inicio, hora_fin, instructor, ficha, ambiente):
+        inicio, fin = _segundos(hora_inicio), _segundos(hora_fin)
+        recursos = (instructor, ficha, ambiente)
+        self._por_id[horario_id] = (fecha, inicio, recursos)
+        for tipo, valor in zip(RECURSOS, recursos):
+            self._cubetas.setdefault((fecha, tipo, valor), _Cubeta()).agregar(inicio, fin, horario_id)
+
+    def agregar(self, horario_id, fecha, hora_inicio, hora_fin, instructor, ficha, ambiente):
+        """Indexa un bloque que aún no existe en la BD (p. ej. de un lote)."""
+        self._asegurar_fecha(fecha)
+        self._indexar(horario_id, fecha, hora_inicio, hora_fin, _clave(instructor), _clave(ficha), _clave(ambiente))
+
+    def descartar_fechas(self, fechas):
+        """Olvida las fechas dadas; se recargan de la BD en la próxima consulta."""
+        fechas = set(fechas)
+        self._fechas -= fechas
+        self._cubetas = {k: v for k, v in self._cubetas.items() if k[0] not in fechas}
+        self._por_id = {k: v for k, v in self._por_id.items() if v[0] not in fechas}
+
+    def quitar(self, horario_id):
+        datos = self._por_id.pop(horario_id, None)
+        if datos is None:
+            return
+        fecha, inicio, recursos = datos
+        for tipo, valor in zip(RECURSOS, recursos):
+            cubeta = self._cubetas.get((fecha, tipo, valor))
+            if cubeta is not None:
+                cubeta.quitar(inicio, horario_id)
+
+    def actualizar(self, horario):
+        """Refleja en el índice un Horario creado o modificado."""
+        self.quitar(horario.pk)
+        if horario.fecha in self._fechas:
+            self._indexar(
+                horario.pk, horario.fecha, horario.hora_inicio, horario.hora_fin,
+                horario.id_instructor_id, horario.id_ficha_id, horario.id_ambiente_id,
+            )
+
+    # ---------------- consultas ----------------
+    def choques(self, fecha, hora_inicio, hora_fin, instructor=None, ficha=None, ambiente=None, horario_id=None):
+        """
+        Devuelve el conjunto de id_horario que se cruzan con [hora_inicio, hora_fin)
+        para los recursos indicados. Mismas reglas que `buscar_choques`.
+        """
+        self._asegurar_fecha(fecha)
+        inicio, fin = _segundos(hora_inicio), _segundos(hora_fin)
+
+        recursos = [
+            (tipo, _clave(valor))
+            for tipo, valor in zip(RECURSOS, (instructor, ficha, ambiente))
+            if valor is not None
+        ]
+
+        encontrados = set()
+        if recursos:
+            for tipo, valor in recursos:
+                cubeta = self._cubetas.get((fecha, tipo, valor))
+                if cubeta is not None:
+                    encontrados.update(cubeta.choques(inicio, fin))
+        else:
+            # Sin recursos: cualquier bloque de la fecha cuenta (como en SQL)
+            for (dia, tipo, _), cubeta in self._cubetas.items():
+                if dia == fecha and tipo == 'instructor':
+                    encontrados.update(cubeta.choques(inicio, fin))
+
+        encontrados.discard(horario_id)
+        return encontrados
+
+    def hay_choque(self, *args, **kwargs):
+        return bool(self.choques(*args, **kwargs))
+
+    def limitar_reglas(self, bloques):
+        """Solo se cargarán las reglas de los instructores, fichas y ambientes de `bloques`."""
+        self._recursos_reglas = tuple(
+            {getattr(b, campo) for b in bloques} - {None}
+            for campo in ('id_instructor_id', 'id_ficha_id', 'id_ambiente_id')
+        )
+        self._reglas = None
+
+    def reglas_recurrentes(self, fecha=None):
+        """
+        Reglas de HorarioRecurrente (tuplas Regla) vigentes en el rango de
+        fechas cargadas (más `fecha`, que se carga si hace falta). Se vuelven
+        a leer solo si ese rango crece.
+        """
+        if fecha is not None:
+            self._asegurar_fecha(fecha)
+        if self._desde is None:
+            return []
+        if self._reglas is None or self._desde < self._reglas[0] or self._hasta > self._reglas[1]:
+            from django.db.models import Q
+            from .models import HorarioRecurrente
+            from .recurrencias import cargar_reglas
+
+            qs = HorarioRecurrente.objects.filter(fecha_inicio__lte=self._hasta, fecha_fin__gte=self._desde)
+            if self._recursos_reglas is not None:
+                instructores, fichas, ambientes = self._recursos_reglas
+                qs = qs.filter(
+                    Q(id_instructor__in=instructores) | Q(id_ficha__in=fichas) | Q(id_ambiente__in=ambientes)
+                )
+            self._reglas = (self._desde, self._hasta, cargar_reglas(qs, desde=self._desde, hasta=self._hasta))
+        return self._reglas[2]
+
+
+# ===============================================================
+# ÍNDICE ACTIVO (por hilo)
+# ===============================================================
+# El índice solo vive mientras dura una operación masiva; fuera de ella
+# `Horarios.clean()` y `buscar_choques()` siguen consultando la base de
+# datos, así que nunca se responde con datos viejos de otro proceso.
+_local = threading.local()
+
+
+def indice_actual():
+    return getattr(_local, 'indice', None)
+
+
+@contextmanager
+def indice_horarios(fecha_inicio=None, fecha_fin=None):
+    """
+    Activa un IndiceHorarios para el hilo actual:
+
+        with indice_horarios(inicio_trimestre, fin_trimestre):
+            for horario in bloques:
+                horario.full_clean()
+                horario.save()
+    """
+    indice = IndiceHorarios()
+    if fecha_inicio is not None:
+        indice.cargar_rango(fecha_inicio, fecha_fin or fecha_inicio)
+
+    anterior = indice_actual()
+    _local.indice = indice
+    try:
+        yield indice
+    finally:
+        _local.indice = anterior
+
+
+@receiver(post_save, sender='Models.Horarios')
+def _horario_guardado(sender, instance, **kwargs):
+    indice = indice_actual()
+    if indice is not None:
+        indice.actualizar(instance)
+
+
+@receiver(post_delete, sender='Models.Horarios')
+def _horario_eliminado(sender, instance, **kwargs):
+    indice = indice_actual()
+    if indice is not None:
+        indice.quitar(instance.pk)
@@ -0,0 +1,136 @@
+# versiones.py
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Ambientes, Competencias, HorarioRecurrente, Horarios, Jornadas, VersionHorarios
+
+
+# ===============================================================
+# VERSIONES DE HORARIOS (ETag / Last-Modified)
+# ===============================================================
+AMBITO_GLOBAL = 'global'
+
+
+def ambito_instructor(instructor_id):
+    return f'instructor:{instructor_id}'
+
+
+def ambito_ficha(ficha_id):
+    return f'ficha:{ficha_id}'
+
+
+def ambito_ambiente(ambiente_id):
+    return f'ambiente:{ambiente_id}'
+
+
+def registrar_cambio(ambitos):
+    """Incrementa la versión de los ámbitos dados (una sola UPDATE si ya existen)."""
+    ambitos = set(ambitos)
+    if not ambitos:
+        return
+    ahora = timezone.now()
+    actualizados = VersionHorarios.objects.filter(ambito__in=ambitos).update(
+        version=F('version') + 1, modificado=ahora
+    )
+    if actualizados < len(ambitos):
+        existentes = set(
+            VersionHorarios.objects.filter(ambito__in=ambitos).values_list('ambito', flat=True)
+        )
+        VersionHorarios.objects.bulk_create(
+            [VersionHorarios(ambito=a, version=1, modificado=ahora) for a in ambitos - existentes],
+            ignore_conflicts=True,
+        )
+
+
+def registrar_cambio_instructores(instructor_ids):
+    """Cambio en los horarios de estos instructores (y por lo tanto en el global)."""
+    registrar_cambio([AMBITO_GLOBAL] + [ambito_instructor(i) for i in instructor_ids])
+
+
+def registrar_cambio_horarios(horarios):
+    """Para escrituras sin señales: marca el cambio en todos los ámbitos de los bloques."""
+    ambitos = set()
+    for horario in horarios:
+        ambitos.update(ambitos_horario(horario))
+    if ambitos:
+        registrar_cambio({AMBITO_GLOBAL} | ambitos)
+
+
+def version_de(ambito):
+    """(version, modificado) del ámbito; (0, None) si nunca ha cambiado."""
+    fila = VersionHorarios.objects.filter(ambito=ambito).values_list('version', 'modificado').first()
+    return fila or (0, None)
+
+
+AMBITOS_HORARIO = (
+    ('id_instructor_id', ambito_instructor),
+    ('id_ficha_id', ambito_ficha),
+    ('id_ambiente_id', ambito_ambiente),
+)
+
+
+def ambitos_horario(horario):
+    """Ámbitos del instructor, ficha y ambiente del bloque (actuales y los que tenía al cargarse)."""
+    originales = getattr(horario, '_valores_originales', None) or {}
+    ambitos = set()
+    for campo, ambito in AMBITOS_HORARIO:
+        ambitos.add(ambito(getattr(horario, campo)))
+        if campo in originales:
+            ambitos.add(ambito(originales[campo]))
+    return ambitos
+
+
+# Un horario recurrente cambia las ocurrencias de los mismos ámbitos
+@receiver(post_save, sender='Models.Horarios')
+@receiver(post_save, sender='Models.HorarioRecurrente')
+def _horario_guardado(sender, instance, **kwargs):
+    registrar_cambio({AMBITO_GLOBAL} | ambitos_horario(instance))
+
+
+@receiver(post_delete, sender='Models.Horarios')
+@receiver(post_delete, sender='Models.HorarioRecurrente')
+def _horario_eliminado(sender, instance, **kwargs):
+    registrar_cambio({AMBITO_GLOBAL} | ambitos_horario(instance))
+
+
+# Cancelar una fecha (o liberarla) cambia las ocurrencias pendientes de la regla
+@receiver(post_save, sender='Models.ExcepcionRecurrente')
+@receiver(post_delete, sender='Models.ExcepcionRecurrente')
+def _excepcion_cambiada(sender, instance, **kwargs):
+    recurrente = HorarioRecurrente.objects.filter(pk=instance.recurrente_id).first()
+    if recurrente is not None:
+        registrar_cambio({AMBITO_GLOBAL} | ambitos_horario(recurrente))
+
+
+# ---------------- catálogos ----------------
+# Los horarios muestran el nombre de la competencia, el ambiente y la
+# jornada: cambiar uno cambia lo que ven los ámbitos de los bloques (y
+# reglas recurrentes) que lo usan. Son cambios raros; se buscan los ámbitos
+# afectados con una consulta agrupada por modelo.
+CAMPOS_CATALOGO = {
+    Ambientes: 'id_ambiente',
+    Competencias: 'id_competencia',
+    Jornadas: 'id_jornada',
+}
+
+
+def ambitos_catalogo(campo, pk):
+    """Ámbitos de todos los Horarios y HorarioRecurrente con `campo` = `pk`."""
+    campos = [c for c, _ in AMBITOS_HORARIO]
+    ambitos = set()
+    for modelo in (Horarios, HorarioRecurrente):
+        for fila in modelo.objects.filter(**{campo: pk}).values_list(*campos).distinct():
+            ambitos.update(ambito(valor) for (_, ambito), valor in zip(AMBITOS_HORARIO, fila))
+    return ambitos
+
+
+@receiver(post_save, sender=Ambientes)
+@receiver(post_save, sender=Competencias)
+@receiver(post_save, sender=Jornadas)
+@receiver(post_delete, sender=Ambientes)
+@receiver(post_delete, sender=Competencias)
+@receiver(post_delete, sender=Jornadas)
+def _catalogo_cambiado(sender, instance, **kwargs):
+    registrar_cambio({AMBITO_GLOBAL} | ambitos_catalogo(CAMPOS_CATALOGO[sender], instance.pk))
@@ -0,0 +1,179 @@
+# instrumentacion.py
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connection
+from django.shortcuts import render
+
+logger = logging.getLogger('sghsena.rendimiento')
+
+
+# ===============================================================
+# MEDICIÓN DE CONSULTAS Y TIEMPOS
+# ===============================================================
+# `medir()` cuenta las consultas SQL, su tiempo total y las más lentas de
+# un bloque de código (no depende de DEBUG). El middleware la usa en cada
+# request, publica el resultado en `Server-Timing` y en el log, y guarda
+# las últimas muestras por vista para el panel de rendimiento del admin.
+
+class Medicion:
+    def __init__(self, lentas=3):
+        self.consultas = 0
+        self.tiempo_bd = 0.0
+        self.tiempo_total = 0.0
+        self._lentas = []
+        self._max_lentas = lentas
+
+    def registrar(self, sql, duracion):
+        self.consultas += 1
+        self.tiempo_bd += duracion
+        # Montículo de tamaño fijo con las `lentas` consultas más lentas
+        entrada = (duracion, self.consultas, sql)
+        if len(self._lentas) < self._max_lentas:
+            heapq.heappush(self._lentas, entrada)
+        elif duracion > self._lentas[0][0]:
+            heapq.heapreplace(self._lentas, entrada)
+
+    @property
+    def lentas(self):
+        """[(segundos, sql), ...] de la más lenta a la más rápida."""
+        return [(d, sql) for d, _, sql in sorted(self._lentas, reverse=True)]
+
+
+@contextmanager
+def medir(lentas=3):
+    """
+    with medir() as m:
+        ...
+    m.consultas, m.tiempo_bd, m.tiempo_total, m.lentas
+    """
+    medicion = Medicion(lentas)
+
+    def envoltura(execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            medicion.registrar(sql, time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    try:
+        with connection.execute_wrapper(envoltura):
+            yield medicion
+    finally:
+        medicion.tiempo_total = time.perf_counter() - inicio
+
+
+# ===============================================================
+# MUESTRAS POR VISTA (buffer circular por proceso)
+# ===============================================================
+_muestras = {}
+_candado = threading.Lock()
+# Las requests que no resuelven a una vista (404, escaneos) comparten un
+# solo buffer: con una llave por ruta el diccionario crecería sin límite.
+SIN_VISTA = '(sin vista)'
+
+
+def guardar_muestra(vista, medicion):
+    with _candado:
+        buffer = _muestras.get(vista)
+        if buffer is None:
+            buffer = _muestras[vista] = deque(maxlen=settings.INSTRUMENTACION_MUESTRAS)
+        buffer.append((medicion.tiempo_total, medicion.tiempo_bd, medicion.consultas, medicion.lentas))
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def resumen_vistas():
+    """Percentiles de cada vista con las muestras que hay en el buffer, de la más lenta (p95) a la más rápida."""
+    with _candado:
+        copia = {vista: list(buffer) for vista, buffer in _muestras.items()}
+    filas = []
+    for vista, muestras in copia.items():
+        totales = [m[0] * 1000 for m in muestras]
+        consultas = [m[2] for m in muestras]
+        filas.append({
+            'vista': vista,
+            'muestras': len(muestras),
+            'p50_ms': percentil(totales, 50),
+            'p95_ms': percentil(totales, 95),
+            'p99_ms': percentil(totales, 99),
+            'bd_p95_ms': percentil([m[1] * 1000 for m in muestras], 95),
+            'consultas_p50': percentil(consultas, 50),
+            'consultas_max': max(consultas),
+            'lentas': max(muestras, key=lambda m: m[0])[3],
+        })
+    return sorted(filas, key=lambda f: f['p95_ms'], reverse=True)
+
+
+def presupuesto_de(match, metodo='GET'):
+    """
+    Máximo de consultas para la vista: por nombre (`dashboard:horarios_json`)
+    o por namespace (`admin`). Solo aplica a lecturas (GET/HEAD); las
+    escrituras, como las acciones masivas del admin, no tienen presupuesto.
+    """
+    if match is None or metodo not in ('GET', 'HEAD'):
+        return None
+    presupuestos = settings.PRESUPUESTO_CONSULTAS
+    return presupuestos.get(match.view_name, presupuestos.get(match.namespace))
+
+
+# ===============================================================
+# MIDDLEWARE
+# ===============================================================
+class InstrumentacionMiddleware:
+    """
+    Mide cada request. En respuestas en streaming solo cuenta lo que pasa
+    hasta que la vista devuelve la respuesta, no el envío del cuerpo.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with medir(settings.INSTRUMENTACION_LENTAS) as medicion:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        vista = match.view_name if match is not None else SIN_VISTA
+        bd_ms, total_ms = medicion.tiempo_bd * 1000, medicion.tiempo_total * 1000
+
+        tiempos = f'db;dur={bd_ms:.1f};desc="{medicion.consultas} consultas", vista;dur={total_ms:.1f}'
+        anterior = response.get('Server-Timing')
+        response['Server-Timing'] = f'{anterior}, {tiempos}' if anterior else tiempos
+
+        logger.info(
+            'vista=%s metodo=%s estado=%s consultas=%d bd_ms=%.1f total_ms=%.1f',
+            vista, request.method, response.status_code, medicion.consultas, bd_ms, total_ms,
+        )
+        presupuesto = presupuesto_de(match, request.method)
+        if presupuesto is not None and medicion.consultas > presupuesto:
+            logger.warning(
+                'presupuesto_excedido vista=%s consultas=%d presupuesto=%d lenta=%r',
+                vista, medicion.consultas, presupuesto,
+                medicion.lentas[0][1] if medicion.lentas else '',
+            )
+
+        guardar_muestra(vista, medicion)
+        return response
+
+
+@staff_member_required
+def panel_rendimiento(request):
+    return render(request, 'html/admin/rendimiento.html', {
+        **admin.site.each_context(request),
+        'title': 'Rendimiento por vista',
+        'filas': resumen_vistas(),
+        'capacidad': settings.INSTRUMENTACION_MUESTRAS,
+        'presupuestos': settings.PRESUPUESTO_CONSULTAS,
+    })
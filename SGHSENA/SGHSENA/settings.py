@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para que cuente también las consultas de sesión y autenticación
+    'SGHSENA.instrumentacion.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,6 +94,73 @@ DATABASES = {
     }
 }
 
+# SGHSENA_SQLITE=<ruta> usa SQLite en lugar de MySQL (pruebas locales y
+# `manage.py benchmark`, que compara resultados medidos en SQLite). La BD de
+# pruebas va en un archivo y no en memoria: los workers del planificador
+# (ProcessPoolExecutor) abren su propia conexión y deben verla.
+if os.environ.get('SGHSENA_SQLITE'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ['SGHSENA_SQLITE'],
+            'TEST': {'NAME': os.environ['SGHSENA_SQLITE'] + '.test'},
+        }
+    }
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'catalogos' guarda las listas de Ambientes, Competencias, Fichas, Jornadas y
+# Niveles usadas en los filtros; al ser de archivos lo comparten todos los workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalogos': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'sghsena_catalogos',
+    },
+}
+
+# Segundos que dura una lista de Models/catalogos.py en caché (las señales
+# la borran antes si cambia el catálogo)
+CATALOGOS_TTL = 3600
+
+# Segundos que se guardan las métricas del panel de coordinador
+METRICAS_COORDINADOR_TTL = 300
+
+# Modo estricto de cruces (Models/ocupacion.py): cada Horario reserva sus
+# franjas de 15 minutos en `ocupacion_franjas`, con restricción única, en
+# la misma transacción. Antes de activarlo: `manage.py reconstruir_ocupacion`.
+HORARIOS_OCUPACION_ESTRICTA = False
+
+# Instrumentación (SGHSENA/instrumentacion.py): muestras por vista que se
+# guardan para el panel /admin/rendimiento/, consultas lentas que se
+# reportan por request y máximo de consultas antes de avisar en el log
+# (por nombre de vista o por namespace; solo en GET/HEAD).
+INSTRUMENTACION_MUESTRAS = 500
+INSTRUMENTACION_LENTAS = 3
+PRESUPUESTO_CONSULTAS = {
+    'dashboard:horarios_json': 8,
+    'dashboard:dashboard_instructor': 12,
+    'dashboard:dashboard_coordinador': 15,
+    'admin': 15,
+}
+
+# 'sghsena.rendimiento' avisa en WARNING cuando una vista excede su
+# presupuesto de consultas. La línea por request (vista, consultas, tiempos)
+# sale en INFO: para verla, bajar el nivel del logger a 'INFO'.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'consola': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'sghsena.rendimiento': {'handlers': ['consola'], 'level': 'WARNING'},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -110,8 +181,8 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'Models.Usuario'
 AUTHENTICATION_BACKENDS = [
+    # Hereda de ModelBackend (permisos, get_user); no hace falta repetirlo aquí
     'Models.backends.DocumentoOrUsernameBackend',
-    'django.contrib.auth.backends.ModelBackend',
 ]
 
 # Internationalization
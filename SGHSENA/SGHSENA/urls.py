@@ -7,7 +7,9 @@ from Login import views as login_views
 from Inicio.views import *
 from Login.urls import *
 from consultas.views import *
+from SGHSENA.instrumentacion import panel_rendimiento
 urlpatterns = [
+    path('admin/rendimiento/', panel_rendimiento, name='rendimiento'),
     path('admin/', admin.site.urls),
     path('', HomeView.as_view(), name='home'),
     # Login del superusuario
@@ -17,5 +19,6 @@ urlpatterns = [
     path('login/', login_views.login_view, name='login_personal'),
     path("dashboard/", include("Dashboard.urls", namespace="dashboard")),
     path('home/', HomeHours.as_view(), name="homehours"),
-    path('consultas/', Panel_administrativo.as_view(), name='panel')
+    path('consultas/', Panel_administrativo.as_view(), name='panel'),
+    path('consultas/', include('consultas.urls', namespace='consultas')),
 ]
@@ -0,0 +1,192 @@
+from datetime import datetime, time
+
+from django.db.models import Q
+
+from .consultas import (
+    buscar_choques, horario_ficha, horario_por_jornada,
+    ambientes_disponibles, instructores_disponibles,
+)
+
+
+# ===============================================================
+# API DE CONSULTAS (proyección de campos + paginación por llave)
+# ===============================================================
+# Cada consulta declara los campos que se pueden pedir (`campos=a,b,c`) y
+# su orden estable. Solo se leen las columnas pedidas (values() sobre los
+# JOIN necesarios, sin instanciar modelos) y la página siguiente se pide
+# con el cursor `siguiente`, que filtra por las columnas del orden en vez
+# de usar OFFSET.
+
+LIMITE_POR_DEFECTO = 200
+LIMITE_MAXIMO = 2000
+
+CAMPOS_HORARIO = {
+    'id': 'id_horario',
+    'fecha': 'fecha',
+    'hora_inicio': 'hora_inicio',
+    'hora_fin': 'hora_fin',
+    'ficha': 'id_ficha_id',
+    'instructor_id': 'id_instructor_id',
+    'instructor': 'id_instructor__user__username',
+    'ambiente_id': 'id_ambiente_id',
+    'ambiente': 'id_ambiente__nombre_ambiente',
+    'jornada_id': 'id_jornada_id',
+    'jornada': 'id_jornada__nombre_jornada',
+    'competencia_id': 'id_competencia_id',
+    'competencia': 'id_competencia__nombre_competencia',
+}
+ORDEN_HORARIO = (('fecha', 'fecha'), ('hora_inicio', 'hora'), ('id_horario', 'entero'))
+POR_DEFECTO_HORARIO = ('id', 'fecha', 'hora_inicio', 'hora_fin', 'ficha', 'instructor', 'ambiente', 'competencia')
+
+CAMPOS_AMBIENTE = {'id': 'id_ambiente', 'nombre': 'nombre_ambiente'}
+CAMPOS_INSTRUCTOR = {
+    'id': 'id',
+    'nombre': 'user__username',
+    'documento': 'user__numero_documento',
+    'profesion': 'profesion',
+    'es_lider': 'es_lider',
+}
+
+
+def _entero(params, nombre, requerido=False):
+    valor = params.get(nombre)
+    if not valor:
+        if requerido:
+            raise ValueError(f"Falta el parámetro '{nombre}'.")
+        return None
+    return int(valor)
+
+
+def _fecha(params, nombre, requerido=False):
+    valor = params.get(nombre)
+    if not valor:
+        if requerido:
+            raise ValueError(f"Falta el parámetro '{nombre}'.")
+        return None
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def _hora(params, nombre):
+    valor = params.get(nombre)
+    if not valor:
+        raise ValueError(f"Falta el parámetro '{nombre}'.")
+    return time.fromisoformat(valor)
+
+
+def _rango(qs, params):
+    desde, hasta = _fecha(params, 'desde'), _fecha(params, 'hasta')
+    if desde:
+        qs = qs.filter(fecha__gte=desde)
+    if hasta:
+        qs = qs.filter(fecha__lte=hasta)
+    return qs
+
+
+def _bloque(params):
+    return _fecha(params, 'fecha', requerido=True), _hora(params, 'hora_inicio'), _hora(params, 'hora_fin')
+
+
+# ---------------- consultas expuestas ----------------
+def _consulta_ficha(params):
+    return _rango(horario_ficha(_entero(params, 'ficha', requerido=True)), params)
+
+
+def _consulta_jornada(params):
+    return _rango(horario_por_jornada(_entero(params, 'jornada', requerido=True)), params)
+
+
+def _consulta_choques(params):
+    return buscar_choques(
+        *_bloque(params),
+        instructor=_entero(params, 'instructor'),
+        ficha=_entero(params, 'ficha'),
+        ambiente=_entero(params, 'ambiente'),
+        horario_id=_entero(params, 'excluir'),
+    )
+
+
+def _consulta_ambientes(params):
+    return ambientes_disponibles(*_bloque(params))
+
+
+def _consulta_instructores(params):
+    return instructores_disponibles(*_bloque(params))
+
+
+# nombre: (función, campos, campos por defecto, orden [(campo_orm, tipo)])
+CONSULTAS = {
+    'ficha': (_consulta_ficha, CAMPOS_HORARIO, POR_DEFECTO_HORARIO, ORDEN_HORARIO),
+    'jornada': (_consulta_jornada, CAMPOS_HORARIO, POR_DEFECTO_HORARIO, ORDEN_HORARIO),
+    'choques': (_consulta_choques, CAMPOS_HORARIO, POR_DEFECTO_HORARIO, ORDEN_HORARIO),
+    'ambientes': (_consulta_ambientes, CAMPOS_AMBIENTE, tuple(CAMPOS_AMBIENTE), (('id_ambiente', 'entero'),)),
+    'instructores': (
+        _consulta_instructores, CAMPOS_INSTRUCTOR, ('id', 'nombre', 'documento', 'profesion'), (('id', 'entero'),)
+    ),
+}
+
+
+# ---------------- paginación por llave ----------------
+_CONVERTIR = {
+    'fecha': lambda v: datetime.strptime(v, '%Y-%m-%d').date(),
+    'hora': time.fromisoformat,
+    'entero': int,
+}
+
+
+def leer_cursor(cursor, orden):
+    """Cursor 'v1_v2_...' con los valores del orden de la última fila de la página anterior."""
+    partes = cursor.split('_')
+    if len(partes) != len(orden):
+        raise ValueError('cursor')
+    return [_CONVERTIR[tipo](parte) for parte, (_, tipo) in zip(partes, orden)]
+
+
+def filtro_cursor(orden, valores):
+    """(a > x) OR (a = x AND b > y) OR ... para el orden dado."""
+    condicion = Q()
+    for i, (campo, _) in enumerate(orden):
+        iguales = {c: v for (c, _), v in zip(orden[:i], valores[:i])}
+        condicion |= Q(**iguales, **{f'{campo}__gt': valores[i]})
+    return condicion
+
+
+def _texto_cursor(valor):
+    return valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+
+
+def ejecutar_consulta(nombre, params):
+    """
+    Ejecuta la consulta `nombre` con los `params` (QueryDict o dict).
+    Devuelve {"campos", "resultados", "siguiente"}. Lanza KeyError si la
+    consulta no existe y ValueError si los parámetros no son válidos.
+    """
+    funcion, disponibles, por_defecto, orden = CONSULTAS[nombre]
+
+    campos = [c for c in params.get('campos', '').split(',') if c] or list(por_defecto)
+    desconocidos = [c for c in campos if c not in disponibles]
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)}.")
+
+    limite = _entero(params, 'limite') or LIMITE_POR_DEFECTO
+    if limite < 1:
+        raise ValueError('limite')
+    limite = min(limite, LIMITE_MAXIMO)
+
+    qs = funcion(params)
+    if params.get('cursor'):
+        qs = qs.filter(filtro_cursor(orden, leer_cursor(params['cursor'], orden)))
+
+    columnas_orden = [campo for campo, _ in orden]
+    columnas = list(dict.fromkeys([disponibles[c] for c in campos] + columnas_orden))
+    filas = list(qs.order_by(*columnas_orden).values(*columnas)[:limite + 1])
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = '_'.join(_texto_cursor(filas[-1][c]) for c in columnas_orden)
+
+    return {
+        'campos': campos,
+        'resultados': [{c: fila[disponibles[c]] for c in campos} for fila in filas],
+        'siguiente': siguiente,
+    }
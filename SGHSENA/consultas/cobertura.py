@@ -0,0 +1,143 @@
+from collections import defaultdict
+
+from django.db.models import F, Q, Sum
+
+from Models.models import Horarios, Fichas, Competencias, ResultadosAprendizaje
+
+
+# ===============================================================
+# COBERTURA DE HORAS: PROGRAMADAS VS. REQUERIDAS
+# ===============================================================
+# Cuatro consultas agregadas sin importar cuántas fichas haya:
+#   1. fichas con su programa
+#   2. horas programadas por (ficha, competencia)
+#   3. competencias de los programas (y las programadas fuera del programa)
+#   4. resultados de aprendizaje de esas competencias
+# Horarios no guarda el resultado de aprendizaje, así que las horas de cada
+# competencia se reparten entre sus resultados en orden (id_resultado),
+# llenando uno antes de pasar al siguiente.
+
+COMPLETA = 'completa'
+FALTANTE = 'faltante'
+SOBREASIGNADA = 'sobreasignada'
+
+
+def _estado(programadas, requeridas):
+    if programadas > requeridas:
+        return SOBREASIGNADA
+    if programadas < requeridas:
+        return FALTANTE
+    return COMPLETA
+
+
+def cobertura_fichas(fichas=None, programa=None):
+    """
+    Cobertura de horas por ficha, competencia y resultado de aprendizaje.
+
+    `fichas` (ids) y `programa` (id) filtran; por defecto todas las fichas.
+    Devuelve una lista de dicts por ficha, cada uno con sus competencias y,
+    dentro de cada competencia, sus resultados.
+    """
+    qs_fichas = Fichas.objects.order_by('id_ficha')
+    if fichas is not None:
+        qs_fichas = qs_fichas.filter(id_ficha__in=fichas)
+    if programa is not None:
+        qs_fichas = qs_fichas.filter(id_programa_id=programa)
+    lista_fichas = list(qs_fichas.values_list('id_ficha', 'id_programa_id', 'id_programa__nombre_programa'))
+    if not lista_fichas:
+        return []
+
+    ids_fichas = [f[0] for f in lista_fichas]
+    programas = {f[1] for f in lista_fichas}
+
+    programadas = defaultdict(dict)
+    filas = Horarios.objects.filter(id_ficha__in=ids_fichas).values('id_ficha_id', 'id_competencia_id').annotate(
+        total=Sum(F('hora_fin') - F('hora_inicio'))
+    ).values_list('id_ficha_id', 'id_competencia_id', 'total')
+    competencias_usadas = set()
+    for ficha_id, comp_id, total in filas:
+        programadas[ficha_id][comp_id] = total.total_seconds() / 3600 if total else 0
+        competencias_usadas.add(comp_id)
+
+    competencias = {}
+    por_programa = defaultdict(list)
+    for comp_id, programa_id, nombre, horas in Competencias.objects.filter(
+        Q(programa_relacionado_id__in=programas) | Q(id_competencia__in=competencias_usadas)
+    ).order_by('id_competencia').values_list('id_competencia', 'programa_relacionado_id', 'nombre_competencia', 'horas'):
+        competencias[comp_id] = (nombre, horas)
+        if programa_id in programas:
+            por_programa[programa_id].append(comp_id)
+
+    resultados = defaultdict(list)
+    for res_id, comp_id, nombre, horas in ResultadosAprendizaje.objects.filter(
+        id_competencia_id__in=list(competencias)
+    ).order_by('id_resultado').values_list('id_resultado', 'id_competencia_id', 'nombre_resultado', 'hora_resultado'):
+        resultados[comp_id].append((res_id, nombre, horas))
+
+    reporte = []
+    for ficha_id, programa_id, nombre_programa in lista_fichas:
+        horas_ficha = programadas.get(ficha_id, {})
+        ids_comp = por_programa.get(programa_id, []) + sorted(
+            c for c in horas_ficha if c not in por_programa.get(programa_id, [])
+        )
+        filas_comp = []
+        for comp_id in ids_comp:
+            nombre, requeridas = competencias[comp_id]
+            horas = horas_ficha.get(comp_id, 0)
+            filas_comp.append({
+                'id_competencia': comp_id,
+                'competencia': nombre,
+                'requeridas': requeridas,
+                'programadas': horas,
+                'diferencia': horas - requeridas,
+                'estado': _estado(horas, requeridas),
+                'resultados': _repartir(horas, resultados.get(comp_id, [])),
+            })
+        requeridas = sum(c['requeridas'] for c in filas_comp)
+        total = sum(c['programadas'] for c in filas_comp)
+        reporte.append({
+            'id_ficha': ficha_id,
+            'programa': nombre_programa,
+            'requeridas': requeridas,
+            'programadas': total,
+            'faltantes': sum(-c['diferencia'] for c in filas_comp if c['diferencia'] < 0),
+            'sobreasignadas': sum(c['diferencia'] for c in filas_comp if c['diferencia'] > 0),
+            'competencias': filas_comp,
+        })
+    return reporte
+
+
+def _repartir(horas, resultados):
+    filas = []
+    disponibles = horas
+    for res_id, nombre, requeridas in resultados:
+        cubiertas = min(disponibles, requeridas)
+        disponibles -= cubiertas
+        filas.append({
+            'id_resultado': res_id,
+            'resultado': nombre,
+            'requeridas': requeridas,
+            'cubiertas': cubiertas,
+            'estado': _estado(cubiertas, requeridas),
+        })
+    # Lo que sobra tras cubrir todos los resultados queda en el último
+    if filas and disponibles > 0:
+        filas[-1]['cubiertas'] += disponibles
+        filas[-1]['estado'] = SOBREASIGNADA
+    return filas
+
+
+def filas_csv(reporte):
+    """Filas planas (encabezado incluido) para exportar el reporte."""
+    yield ['ficha', 'programa', 'competencia', 'resultado', 'requeridas', 'programadas', 'diferencia', 'estado']
+    for ficha in reporte:
+        for comp in ficha['competencias']:
+            yield [
+                ficha['id_ficha'], ficha['programa'], comp['competencia'], '',
+                comp['requeridas'], comp['programadas'], comp['diferencia'], comp['estado'],
+            ]
+            for res in comp['resultados']:
+                yield [
+                    ficha['id_ficha'], ficha['programa'], comp['competencia'], res['resultado'],
+                    res['requeridas'], res['cubiertas'], res['cubiertas'] - res['requeridas'], res['estado'],
+                ]
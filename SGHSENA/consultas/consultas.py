@@ -1,6 +1,16 @@
-from Models.models import Horarios, Ambientes, Instructores
-from django.db.models import Q
+from datetime import time, timedelta
+from itertools import groupby
 
+from Models.models import Horarios, Ambientes, Instructores, Jornadas, JornadaDia
+from Models.validacion_horarios import IndiceHorarios, indice_actual
+from Models.versiones import registrar_cambio_horarios
+from Models.libro_horas import registrar_horarios
+from Models.ocupacion import MENSAJE_CRUCE, ocupacion_estricta, ocupar_por_bloque
+from Models.recurrencias import ocurrencias_por_recurso, reglas_en_choque
+from Models.dias_semana import LUNES_A_SABADO, dias_de
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
 
 
 
@@ -9,7 +19,15 @@ def buscar_choques(fecha, hora_inicio, hora_fin, instructor=None, ficha=None, am
     Devuelve los Horarios que se cruzan con el bloque [hora_inicio, hora_fin)
     para el instructor / ficha / ambiente indicados.
     Si `horario_id` viene, se excluye (útil en updates).
+    Dentro de `indice_horarios(...)` el cruce se calcula en memoria.
     """
+    indice = indice_actual()
+    if indice is not None:
+        ids = indice.choques(fecha, hora_inicio, hora_fin, instructor, ficha, ambiente, horario_id)
+        if not ids:
+            return Horarios.objects.none()
+        return Horarios.objects.filter(id_horario__in=ids)
+
     qs = Horarios.objects.filter(
         fecha=fecha,
         hora_inicio__lt=hora_fin,   # inicio_existente < fin_nuevo
@@ -47,6 +65,13 @@ def horario_instructor_semana(instructor, fecha_inicio, fecha_fin):
     ).select_related('id_ficha', 'id_ambiente', 'id_competencia').order_by('fecha', 'hora_inicio')
 
 
+def horario_ambiente_semana(ambiente, fecha_inicio, fecha_fin):
+    return Horarios.objects.filter(
+        id_ambiente=ambiente,
+        fecha__range=(fecha_inicio, fecha_fin)
+    ).select_related('id_ficha', 'id_instructor', 'id_competencia').order_by('fecha', 'hora_inicio')
+
+
 def horario_ficha(ficha):
     return Horarios.objects.filter(
         id_ficha=ficha
@@ -66,8 +91,10 @@ def ambientes_disponibles(fecha, hora_inicio, hora_fin):
         hora_inicio__lt=hora_fin,
         hora_fin__gt=hora_inicio,
     ).values_list('id_ambiente_id', flat=True)
+    # Las ocurrencias de horarios recurrentes sin materializar también ocupan
+    por_reglas = {a for a, _ in ocurrencias_por_recurso('ambiente', fecha, fecha, hora_inicio, hora_fin)}
 
-    return Ambientes.objects.exclude(id_ambiente__in=ocupados)
+    return Ambientes.objects.exclude(id_ambiente__in=ocupados).exclude(id_ambiente__in=por_reglas)
 
 
 #Realizo consulta
@@ -77,6 +104,243 @@ def instructores_disponibles(fecha, hora_inicio, hora_fin):
         hora_inicio__lt=hora_fin,
         hora_fin__gt=hora_inicio,
     ).values_list('id_instructor_id', flat=True)
+    por_reglas = {i for i, _ in ocurrencias_por_recurso('instructor', fecha, fecha, hora_inicio, hora_fin)}
+
+    return Instructores.objects.exclude(id__in=ocupados).exclude(id__in=por_reglas)
+
+
+
+# ===============================================================
+# HUECOS LIBRES (barrido ordenado)
+# ===============================================================
+RECURSOS_LIBRES = {
+    'ambiente': (Ambientes, 'id_ambiente', 'id_ambiente_id'),
+    'instructor': (Instructores, 'id', 'id_instructor_id'),
+}
+
+
+def _segundos(hora):
+    return hora.hour * 3600 + hora.minute * 60 + hora.second
+
+
+def _hora(segundos):
+    return time(segundos // 3600, segundos % 3600 // 60, segundos % 60)
+
+
+def dias_jornada(jornada):
+    """Días de la semana (0=lunes) en que aplica la jornada según JornadaDia; Lunes a Sábado si no tiene."""
+    mascara = 0
+    for dias in JornadaDia.objects.filter(jornada=jornada).values_list('mascara_dias', flat=True):
+        mascara |= dias
+    return set(dias_de(mascara or LUNES_A_SABADO))
+
+
+def huecos_libres(recurso, fecha_inicio, fecha_fin, jornada, duracion_minima, ids=None):
+    """
+    Todos los huecos libres de al menos `duracion_minima` minutos, dentro del
+    horario de la `jornada`, para cada ambiente o instructor (`recurso`) entre
+    `fecha_inicio` y `fecha_fin`.
+
+    Lee los Horarios del rango en una sola consulta ordenada por recurso, fecha
+    y hora, les suma las ocurrencias sin materializar de los horarios
+    recurrentes y recorre cada día con un barrido que une los bloques ocupados.
+    Devuelve {id_recurso: [(fecha, hora_inicio, hora_fin), ...]}.
+    """
+    modelo, campo_id, campo_horario = RECURSOS_LIBRES[recurso]
+    if not isinstance(jornada, Jornadas):
+        jornada = Jornadas.objects.get(pk=jornada)
+
+    inicio_jornada, fin_jornada = _segundos(jornada.hora_inicio), _segundos(jornada.hora_fin)
+    minimo = duracion_minima * 60
+    dias = dias_jornada(jornada)
+    fechas = [
+        fecha_inicio + timedelta(days=n)
+        for n in range((fecha_fin - fecha_inicio).days + 1)
+        if (fecha_inicio + timedelta(days=n)).weekday() in dias
+    ]
+
+    recursos = modelo.objects.order_by(campo_id)
+    if ids is not None:
+        recursos = recursos.filter(**{f'{campo_id}__in': ids})
+    recursos = list(recursos.values_list(campo_id, flat=True))
+
+    ocupados = Horarios.objects.filter(
+        fecha__range=(fecha_inicio, fecha_fin),
+        hora_inicio__lt=jornada.hora_fin,
+        hora_fin__gt=jornada.hora_inicio,
+    )
+    if ids is not None:
+        ocupados = ocupados.filter(**{f'{campo_horario}__in': recursos})
+    ocupados = ocupados.order_by(campo_horario, 'fecha', 'hora_inicio').values_list(
+        campo_horario, 'fecha', 'hora_inicio', 'hora_fin'
+    )
+    bloques = {
+        clave: [(_segundos(f[2]), _segundos(f[3])) for f in filas]
+        for clave, filas in groupby(ocupados.iterator(), key=lambda f: (f[0], f[1]))
+    }
+    for clave, tramos in ocurrencias_por_recurso(
+        recurso, fecha_inicio, fecha_fin, jornada.hora_inicio, jornada.hora_fin,
+        ids=recursos if ids is not None else None,
+    ).items():
+        bloques[clave] = sorted(bloques.get(clave, []) + tramos)
+
+    resultado = {}
+    for recurso_id in recursos:
+        huecos = []
+        for fecha in fechas:
+            cursor = inicio_jornada
+            for inicio, fin in bloques.get((recurso_id, fecha), ()):
+                if inicio - cursor >= minimo:
+                    huecos.append((fecha, _hora(cursor), _hora(inicio)))
+                cursor = max(cursor, fin)
+            if fin_jornada - cursor >= minimo:
+                huecos.append((fecha, _hora(cursor), _hora(fin_jornada)))
+        resultado[recurso_id] = huecos
+    return resultado
+
+
+def ambientes_libres(fecha_inicio, fecha_fin, jornada, duracion_minima, ids=None):
+    return huecos_libres('ambiente', fecha_inicio, fecha_fin, jornada, duracion_minima, ids)
+
+
+def instructores_libres(fecha_inicio, fecha_fin, jornada, duracion_minima, ids=None):
+    return huecos_libres('instructor', fecha_inicio, fecha_fin, jornada, duracion_minima, ids)
+
+
+# Llaves foráneas de Horarios: clean_fields las validaría con una consulta
+# por bloque; en un lote solo se exige que las obligatorias vengan.
+FORANEAS_HORARIO = [f for f in Horarios._meta.fields if f.is_relation]
+
+
+def errores_campos(bloque):
+    """
+    Motivo por el que el bloque no se puede revisar (campos vacíos o con
+    formato inválido, hora fin <= hora inicio) o None. No hace consultas;
+    los valores en texto quedan convertidos (p. ej. '07:00' a time).
+    """
+    try:
+        bloque.clean_fields(exclude=[f.name for f in FORANEAS_HORARIO])
+        errores = {}
+    except ValidationError as e:
+        errores = e.message_dict
+    for campo in FORANEAS_HORARIO:
+        if not campo.null and getattr(bloque, campo.attname) is None:
+            errores.setdefault(campo.name, []).append('Este campo es obligatorio.')
+    if errores:
+        return ' '.join(f"{campo}: {' '.join(mensajes)}" for campo, mensajes in errores.items())
+    if bloque.hora_fin <= bloque.hora_inicio:
+        return 'La hora fin debe ser mayor que la hora inicio.'
+    return None
+
+
+def validar_lote(bloques, guardar=True, todo_o_nada=False):
+    """
+    Valida juntos muchos Horarios propuestos (instancias sin guardar o dicts
+    con los campos del modelo) contra la BD y contra el mismo lote.
+
+    Hace una sola consulta para traer los bloques existentes del rango de
+    fechas del lote, sin importar cuántos bloques traiga. Los bloques se
+    revisan en orden: si uno choca con otro del lote que ya fue aceptado,
+    se reporta el segundo.
+
+    Primero se revisan los campos de cada bloque (`errores_campos`); los
+    inválidos se reportan como conflicto sin llegar al índice.
+
+    Devuelve (creados, conflictos). `conflictos` es una lista de dicts,
+    ordenada por índice, con el índice del bloque en el lote, el bloque, el
+    motivo y los id_horario
+    (`choques_bd`), índices del lote (`choques_lote`) o reglas recurrentes
+    (`choques_reglas`) con los que se cruza.
+    Si `guardar` es True, los bloques sin conflicto se insertan con
+    `bulk_create` dentro de una sola transacción; con `todo_o_nada`, un
+    solo conflicto hace que no se inserte ninguno.
+    """
+    bloques = [b if isinstance(b, Horarios) else Horarios(**b) for b in bloques]
+    creados, conflictos = [], []
+    if not bloques:
+        return creados, conflictos
+
+    validos = []
+    for pos, bloque in enumerate(bloques):
+        motivo = errores_campos(bloque)
+        if motivo:
+            conflictos.append({
+                'indice': pos, 'bloque': bloque, 'motivo': motivo,
+                'choques_bd': [], 'choques_lote': [], 'choques_reglas': [],
+            })
+        else:
+            validos.append((pos, bloque))
+    if not validos:
+        return creados, conflictos
+
+    with transaction.atomic():
+        indice = IndiceHorarios()
+        indice.cargar_fechas(b.fecha for _, b in validos)
+        indice.limitar_reglas([b for _, b in validos])
+
+        aceptados = []
+        for pos, bloque in validos:
+            # Ocurrencias de horarios recurrentes aún sin materializar
+            reglas = reglas_en_choque(
+                bloque.fecha, bloque.hora_inicio, bloque.hora_fin,
+                bloque.id_instructor_id, bloque.id_ficha_id, bloque.id_ambiente_id,
+                excluir=bloque.id_recurrente_id, reglas=indice.reglas_recurrentes(),
+            )
+            if reglas:
+                conflictos.append({
+                    'indice': pos, 'bloque': bloque,
+                    'motivo': 'Existe un cruce con un horario recurrente.',
+                    'choques_bd': [], 'choques_lote': [], 'choques_reglas': reglas,
+                })
+                continue
+
+            ids = indice.choques(
+                bloque.fecha, bloque.hora_inicio, bloque.hora_fin,
+                instructor=bloque.id_instructor_id,
+                ficha=bloque.id_ficha_id,
+                ambiente=bloque.id_ambiente_id,
+            )
+            if ids:
+                # Los bloques del lote se indexan con ids negativos: -(pos + 1)
+                conflictos.append({
+                    'indice': pos, 'bloque': bloque,
+                    'motivo': 'Existe un cruce de horario con otro registro.',
+                    'choques_bd': sorted(i for i in ids if i > 0),
+                    'choques_lote': sorted(-i - 1 for i in ids if i < 0),
+                    'choques_reglas': [],
+                })
+                continue
+
+            indice.agregar(
+                -(pos + 1), bloque.fecha, bloque.hora_inicio, bloque.hora_fin,
+                bloque.id_instructor_id, bloque.id_ficha_id, bloque.id_ambiente_id,
+            )
+            aceptados.append((pos, bloque))
+
+        if guardar and aceptados and not (todo_o_nada and conflictos):
+            with transaction.atomic():
+                if ocupacion_estricta():
+                    # Sin cruzarse pueden compartir una franja de 15 minutos
+                    rechazados = set(ocupar_por_bloque([b for _, b in aceptados]))
+                    for n in sorted(rechazados):
+                        pos, bloque = aceptados[n]
+                        conflictos.append({
+                            'indice': pos, 'bloque': bloque, 'motivo': MENSAJE_CRUCE,
+                            'choques_bd': [], 'choques_lote': [], 'choques_reglas': [],
+                        })
+                    aceptados = [a for n, a in enumerate(aceptados) if n not in rechazados]
+                    if todo_o_nada and rechazados:
+                        transaction.set_rollback(True)
+                        aceptados = []
+                if aceptados:
+                    creados = Horarios.objects.bulk_create([b for _, b in aceptados], batch_size=500)
+                    registrar_cambio_horarios(creados)
+                    registrar_horarios(creados)
 
-    return Instructores.objects.exclude(id__in=ocupados)
+    # bulk_create no envía señales: si hay un índice activo lo ponemos al día
+    activo = indice_actual()
+    if activo is not None and creados:
+        activo.descartar_fechas({h.fecha for h in creados})
 
+    conflictos.sort(key=lambda c: c['indice'])
+    return creados, conflictos
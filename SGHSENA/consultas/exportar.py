@@ -0,0 +1,113 @@
+import csv
+import tempfile
+from datetime import datetime, timezone
+
+
+# ===============================================================
+# EXPORTACIÓN DE HORARIOS (CSV / XLSX / ICS)
+# ===============================================================
+# Las filas se leen con .iterator(chunk_size=...) sobre values_list, sin
+# instanciar modelos ni cargar el trimestre completo en memoria. CSV e ICS
+# se generan línea por línea; el XLSX se escribe en modo write_only a un
+# archivo temporal y se envía por partes.
+
+CHUNK_EXPORTACION = 1000
+
+CAMPOS_EXPORTACION = (
+    'id_horario', 'fecha', 'hora_inicio', 'hora_fin', 'id_ficha_id',
+    'id_instructor__user__username', 'id_ambiente__nombre_ambiente',
+    'id_competencia__nombre_competencia', 'id_jornada__nombre_jornada',
+)
+
+ENCABEZADOS = (
+    'id_horario', 'fecha', 'hora_inicio', 'hora_fin', 'ficha',
+    'instructor', 'ambiente', 'competencia', 'jornada',
+)
+
+
+def filas_horarios(qs):
+    """Tuplas (ver CAMPOS_EXPORTACION) de un queryset de Horarios, por bloques."""
+    return qs.values_list(*CAMPOS_EXPORTACION).iterator(chunk_size=CHUNK_EXPORTACION)
+
+
+class _Eco:
+    def write(self, valor):
+        return valor
+
+
+def escribir_csv(filas):
+    """Genera cada fila (lista o tupla) como una línea CSV, para StreamingHttpResponse."""
+    escritor = csv.writer(_Eco())
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def lineas_csv(qs):
+    yield from escribir_csv([ENCABEZADOS])
+    yield from escribir_csv(filas_horarios(qs))
+
+
+def archivo_xlsx(qs):
+    """Archivo temporal (abierto, al inicio) con el libro XLSX; requiere openpyxl."""
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ValueError("Para exportar a .xlsx instale openpyxl (pip install openpyxl).")
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Horarios')
+    hoja.append(ENCABEZADOS)
+    for fila in filas_horarios(qs):
+        hoja.append(fila)
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return archivo
+
+
+# ---------------- iCalendar ----------------
+def _texto_ics(valor):
+    return (
+        str(valor or '').replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def _plegar(linea):
+    # RFC 5545: líneas de máximo 75 octetos, las siguientes empiezan con espacio
+    datos = linea.encode('utf-8')
+    if len(datos) <= 75:
+        return linea + '\r\n'
+    partes, actual = [], ''
+    for caracter in linea:
+        limite = 75 if not partes else 74
+        if len((actual + caracter).encode('utf-8')) > limite:
+            partes.append(actual)
+            actual = ''
+        actual += caracter
+    partes.append(actual)
+    return '\r\n '.join(partes) + '\r\n'
+
+
+def lineas_ics(qs, nombre):
+    """
+    Calendario con un VEVENT por bloque. Las horas se escriben sin zona
+    (hora local "flotante"), igual que se guardan en Horarios.
+    """
+    sello = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//SGHSENA//Horarios//ES\r\nCALSCALE:GREGORIAN\r\n'
+    yield _plegar(f'X-WR-CALNAME:{_texto_ics(nombre)}')
+    for id_horario, fecha, inicio, fin, ficha, instructor, ambiente, competencia, jornada in filas_horarios(qs):
+        dia = fecha.strftime('%Y%m%d')
+        yield (
+            'BEGIN:VEVENT\r\n'
+            f'UID:horario-{id_horario}@sghsena\r\n'
+            f'DTSTAMP:{sello}\r\n'
+            f'DTSTART:{dia}T{inicio.strftime("%H%M%S")}\r\n'
+            f'DTEND:{dia}T{fin.strftime("%H%M%S")}\r\n'
+            + _plegar(f'SUMMARY:{_texto_ics(competencia)} - Ficha {ficha}')
+            + _plegar(f'LOCATION:{_texto_ics(ambiente)}')
+            + _plegar(f'DESCRIPTION:{_texto_ics(f"Instructor: {instructor}. Jornada: {jornada}.")}')
+            + 'END:VEVENT\r\n'
+        )
+    yield 'END:VCALENDAR\r\n'
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from itertools import chain
+
+from django.utils.functional import cached_property
+
+from Models.recurrencias import ocurrencias_pendientes
+from Models.versiones import ambito_ambiente, ambito_ficha, ambito_instructor, version_de
+from .consultas import horario_ambiente_semana, horario_ficha, horario_instructor_semana
+
+
+# ===============================================================
+# GRILLA SEMANAL RENDERIZADA EN EL SERVIDOR
+# ===============================================================
+# Misma escala que el calendario del panel: de 6:00 a 23:00, un pixel por
+# minuto, lunes a sábado. La plantilla guarda el HTML con {% cache %} por
+# entidad, semana y versión; los bloques (incluidas las ocurrencias de
+# horarios recurrentes) solo se consultan si el fragmento no está en caché
+# (`dias` es perezoso).
+
+HORA_INICIO_GRILLA = 6
+HORA_FIN_GRILLA = 23
+PIXELES_POR_MINUTO = 1
+# La versión va en la llave del fragmento, así que el TTL solo limpia semanas viejas
+TTL_GRILLA = 60 * 60 * 24
+NOMBRES_DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+
+PALETA = [
+    "#f87171", "#60a5fa", "#34d399", "#fbbf24", "#a78bfa",
+    "#fb7185", "#60a5fa", "#f97316", "#7dd3fc", "#fca5a5"
+]
+
+ALCANCES_GRILLA = {
+    'instructor': ambito_instructor,
+    'ficha': ambito_ficha,
+    'ambiente': ambito_ambiente,
+}
+
+
+def _minutos(hora):
+    return (hora.hour - HORA_INICIO_GRILLA) * 60 + hora.minute
+
+
+def horarios_semana(alcance, pk, lunes):
+    sabado = lunes + timedelta(days=5)
+    if alcance == 'instructor':
+        return horario_instructor_semana(pk, lunes, sabado)
+    if alcance == 'ambiente':
+        return horario_ambiente_semana(pk, lunes, sabado)
+    return horario_ficha(pk).filter(fecha__range=(lunes, sabado))
+
+
+class GrillaSemana:
+    """Semana (lunes a sábado) de un instructor, ficha o ambiente lista para pintar."""
+
+    def __init__(self, alcance, pk, fecha):
+        self.alcance = alcance
+        self.pk = pk
+        self.lunes = fecha - timedelta(days=fecha.weekday())
+        self.sabado = self.lunes + timedelta(days=5)
+        self.anterior = self.lunes - timedelta(days=7)
+        self.siguiente = self.lunes + timedelta(days=7)
+        self.alto = (HORA_FIN_GRILLA - HORA_INICIO_GRILLA) * 60 * PIXELES_POR_MINUTO
+
+    @cached_property
+    def version(self):
+        if self.pk is None:
+            return 0
+        return version_de(ALCANCES_GRILLA[self.alcance](self.pk))[0]
+
+    @property
+    def etiquetas(self):
+        for minuto in range(0, (HORA_FIN_GRILLA - HORA_INICIO_GRILLA) * 60 + 1, 30):
+            yield {
+                'texto': f"{HORA_INICIO_GRILLA + minuto // 60:02d}:{minuto % 60:02d}",
+                'top': minuto * PIXELES_POR_MINUTO,
+            }
+
+    @cached_property
+    def dias(self):
+        dias = [
+            {'nombre': nombre, 'fecha': self.lunes + timedelta(days=i), 'bloques': []}
+            for i, nombre in enumerate(NOMBRES_DIAS)
+        ]
+        if self.pk is None:
+            return dias
+
+        filas = horarios_semana(self.alcance, self.pk, self.lunes).values_list(
+            'fecha', 'hora_inicio', 'hora_fin', 'id_ficha_id', 'id_competencia_id',
+            'id_competencia__nombre_competencia', 'id_ambiente__nombre_ambiente',
+            'id_instructor__user__username',
+        )
+        # Ocurrencias de horarios recurrentes aún sin materializar
+        pendientes = (
+            (
+                o.fecha, o.hora_inicio, o.hora_fin, o.id_ficha_id, o.id_competencia_id,
+                o.id_competencia.nombre_competencia, o.id_ambiente.nombre_ambiente,
+                o.id_instructor.user.username,
+            )
+            for o in ocurrencias_pendientes(self.lunes, self.sabado, **{self.alcance: self.pk})
+        )
+        for fecha, inicio, fin, ficha, comp_id, competencia, ambiente, instructor in chain(filas, pendientes):
+            inicio_min, fin_min = _minutos(inicio), _minutos(fin)
+            dias[fecha.weekday()]['bloques'].append({
+                'top': max(0, inicio_min) * PIXELES_POR_MINUTO,
+                'alto': max(8, (fin_min - inicio_min) * PIXELES_POR_MINUTO),
+                'color': PALETA[(comp_id or 0) % len(PALETA)],
+                'competencia_id': comp_id,
+                'competencia': competencia or 'Sin competencia',
+                'ambiente': ambiente or '',
+                'ficha': ficha,
+                'instructor': instructor or '',
+                'hora_inicio': inicio,
+                'hora_fin': fin,
+            })
+        return dias
+
+    @property
+    def leyenda(self):
+        vistos = {}
+        for dia in self.dias:
+            for bloque in dia['bloques']:
+                vistos.setdefault(bloque['competencia_id'], (bloque['competencia'], bloque['color']))
+        return list(vistos.values())
@@ -0,0 +1,172 @@
+import json
+import random
+import time
+from datetime import date, datetime
+
+import django
+from django.contrib.auth import authenticate
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from Models.datos_sinteticos import CLAVE_SINTETICA, TAMANOS, generar
+from Models.models import Horarios, Usuario
+from SGHSENA.instrumentacion import medir, percentil
+from consultas.consultas import ambientes_disponibles, buscar_choques, instructores_disponibles
+
+INICIO_TRIMESTRE = date(2026, 1, 12)
+CACHES_BENCHMARK = {
+    # Los datos sintéticos no deben terminar en la caché de archivos compartida
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'},
+    'catalogos': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-catalogos'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide buscar_choques, ambientes/instructores disponibles, horarios_json, el login y "
+        "Horarios.clean() sobre datos sintéticos de varios tamaños, en una BD de prueba "
+        "temporal. Escribe los resultados en JSON y, con --comparar, marca las regresiones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', default='pequeno,mediano', help="Separados por coma: " + ", ".join(TAMANOS))
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--repeticiones-login', type=int, default=5, help="El hash de la clave es lento a propósito.")
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--salida', help="Archivo JSON (por defecto, la salida estándar).")
+        parser.add_argument('--comparar', help="JSON de una corrida anterior.")
+        parser.add_argument('--tolerancia', type=float, default=25.0, help="%% de aumento del p50 que cuenta como regresión.")
+
+    def handle(self, *args, **opts):
+        tamanos = [t.strip() for t in opts['tamanos'].split(',') if t.strip()]
+        desconocidos = set(tamanos) - set(TAMANOS)
+        if desconocidos:
+            raise CommandError(f"Tamaños desconocidos: {', '.join(sorted(desconocidos))}.")
+        if connection.vendor != 'sqlite':
+            self.stderr.write(self.style.WARNING(
+                f"La BD es {connection.vendor}; los resultados de referencia se toman en SQLite (SGHSENA_SQLITE=...)."
+            ))
+
+        # Nunca sobre la BD real: una BD de prueba que se destruye al final
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=CACHES_BENCHMARK, ALLOWED_HOSTS=['testserver']):
+                resultados = [self.medir_tamano(tamano, opts) for tamano in tamanos]
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        reporte = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'motor': connection.vendor,
+            'django': django.get_version(),
+            'repeticiones': opts['repeticiones'],
+            'tamanos': resultados,
+        }
+        texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+        if opts['salida']:
+            with open(opts['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(texto + "\n")
+        else:
+            self.stdout.write(texto)
+
+        if opts['comparar']:
+            self.comparar(reporte, opts['comparar'], opts['tolerancia'])
+
+    # ---------------- medición ----------------
+    def medir_tamano(self, tamano, opts):
+        call_command('flush', interactive=False, verbosity=0)
+        for alias in CACHES_BENCHMARK:
+            caches[alias].clear()
+
+        inicio = time.perf_counter()
+        conteos = generar(**TAMANOS[tamano], desde=INICIO_TRIMESTRE, semilla=opts['semilla'])
+        generacion = time.perf_counter() - inicio
+
+        azar = random.Random(opts['semilla'])
+        ids = list(Horarios.objects.values_list('id_horario', flat=True))
+        muestra = list(Horarios.objects.filter(id_horario__in=azar.sample(ids, min(opts['repeticiones'], len(ids)))))
+
+        instructor = muestra[0].id_instructor
+        cliente = Client()
+        cliente.force_login(instructor.user)
+        url_json = reverse('dashboard:horarios_json')
+        documento = str(Usuario.objects.filter(tipo='INSTRUCTOR').values_list('numero_documento', flat=True).first())
+
+        def clean(h):
+            bloque = Horarios(
+                id_ficha_id=h.id_ficha_id, id_instructor_id=h.id_instructor_id, id_ambiente_id=h.id_ambiente_id,
+                id_jornada_id=h.id_jornada_id, id_competencia_id=h.id_competencia_id,
+                fecha=h.fecha, hora_inicio=h.hora_inicio, hora_fin=h.hora_fin,
+            )
+            try:
+                bloque.full_clean()
+            except ValidationError:
+                pass
+
+        operaciones = {
+            'buscar_choques': lambda h: list(buscar_choques(
+                h.fecha, h.hora_inicio, h.hora_fin,
+                instructor=h.id_instructor_id, ficha=h.id_ficha_id, ambiente=h.id_ambiente_id,
+            )),
+            'ambientes_disponibles': lambda h: list(ambientes_disponibles(h.fecha, h.hora_inicio, h.hora_fin)),
+            'instructores_disponibles': lambda h: list(instructores_disponibles(h.fecha, h.hora_inicio, h.hora_fin)),
+            'horarios_json': lambda h: cliente.get(url_json, {'desde': h.fecha.isoformat()}),
+            'horarios_clean': clean,
+        }
+        medidas = {nombre: self.medir_operacion(funcion, muestra) for nombre, funcion in operaciones.items()}
+        medidas['login'] = self.medir_operacion(
+            lambda h: authenticate(None, username=documento, password=CLAVE_SINTETICA),
+            muestra[:opts['repeticiones_login']],
+        )
+
+        self.stderr.write(f"{tamano}: {conteos['horarios']} horarios generados en {generacion:.1f} s")
+        return {'tamano': tamano, 'conteos': conteos, 'generacion_s': round(generacion, 3), 'operaciones': medidas}
+
+    def medir_operacion(self, funcion, muestra):
+        tiempos, consultas = [], []
+        for horario in muestra:
+            with medir() as medicion:
+                funcion(horario)
+            tiempos.append(medicion.tiempo_total * 1000)
+            consultas.append(medicion.consultas)
+        return {
+            'repeticiones': len(tiempos),
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'max_ms': round(max(tiempos), 3),
+            'consultas_p50': percentil(consultas, 50),
+            'consultas_max': max(consultas),
+        }
+
+    # ---------------- comparación ----------------
+    def comparar(self, reporte, ruta, tolerancia):
+        with open(ruta, encoding='utf-8') as archivo:
+            anterior = json.load(archivo)
+        previas = {
+            (t['tamano'], nombre): datos
+            for t in anterior.get('tamanos', []) for nombre, datos in t['operaciones'].items()
+        }
+
+        regresiones = []
+        for t in reporte['tamanos']:
+            for nombre, datos in t['operaciones'].items():
+                previa = previas.get((t['tamano'], nombre))
+                if previa is None:
+                    continue
+                if datos['p50_ms'] > previa['p50_ms'] * (1 + tolerancia / 100):
+                    regresiones.append(f"{t['tamano']}/{nombre}: p50 {previa['p50_ms']} -> {datos['p50_ms']} ms")
+                if datos['consultas_max'] > previa['consultas_max']:
+                    regresiones.append(
+                        f"{t['tamano']}/{nombre}: consultas {previa['consultas_max']} -> {datos['consultas_max']}"
+                    )
+
+        for linea in regresiones:
+            self.stderr.write(self.style.ERROR(linea))
+        if regresiones:
+            raise CommandError(f"{len(regresiones)} regresiones frente a {ruta}.")
+        self.stderr.write(self.style.SUCCESS(f"Sin regresiones frente a {ruta} (tolerancia {tolerancia:g} %)."))
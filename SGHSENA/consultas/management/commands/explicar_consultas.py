@@ -0,0 +1,59 @@
+from datetime import date, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from Models.models import Horarios
+from consultas import consultas
+
+
+class Command(BaseCommand):
+    help = (
+        "Imprime el plan de ejecución (EXPLAIN) de las consultas de consultas/consultas.py "
+        "para confirmar que usan los índices de Horarios."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', type=date.fromisoformat, help='YYYY-MM-DD (por defecto la del primer horario)')
+        parser.add_argument('--hora-inicio', type=time.fromisoformat, default=time(7))
+        parser.add_argument('--hora-fin', type=time.fromisoformat, default=time(9))
+        parser.add_argument('--instructor', type=int)
+        parser.add_argument('--ficha', type=int)
+        parser.add_argument('--ambiente', type=int)
+        parser.add_argument('--jornada', type=int)
+
+    def handle(self, *args, **opts):
+        muestra = Horarios.objects.order_by('fecha').values(
+            'fecha', 'id_instructor_id', 'id_ficha_id', 'id_ambiente_id', 'id_jornada_id'
+        ).first() or {}
+
+        def valor(opcion, campo):
+            dato = opts[opcion] if opts[opcion] is not None else muestra.get(campo)
+            if dato is None:
+                raise CommandError(f"No hay horarios de ejemplo: indique --{opcion.replace('_', '-')}.")
+            return dato
+
+        fecha = valor('fecha', 'fecha')
+        instructor = valor('instructor', 'id_instructor_id')
+        ficha = valor('ficha', 'id_ficha_id')
+        ambiente = valor('ambiente', 'id_ambiente_id')
+        jornada = valor('jornada', 'id_jornada_id')
+        inicio, fin = opts['hora_inicio'], opts['hora_fin']
+
+        planes = [
+            ('buscar_choques', consultas.buscar_choques(
+                fecha, inicio, fin, instructor=instructor, ficha=ficha, ambiente=ambiente)),
+            ('horario_instructor_dia', consultas.horario_instructor_dia(instructor, fecha)),
+            ('horario_instructor_semana', consultas.horario_instructor_semana(instructor, fecha, fecha)),
+            ('horario_ficha', consultas.horario_ficha(ficha)),
+            ('horario_por_jornada', consultas.horario_por_jornada(jornada)),
+            ('ambientes_disponibles', consultas.ambientes_disponibles(fecha, inicio, fin)),
+            ('instructores_disponibles', consultas.instructores_disponibles(fecha, inicio, fin)),
+        ]
+
+        self.stdout.write(f"Motor: {connection.vendor}")
+        for nombre, qs in planes:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {nombre}"))
+            self.stdout.write(str(qs.query))
+            self.stdout.write(self.style.SUCCESS("-- plan:"))
+            self.stdout.write(qs.explain())
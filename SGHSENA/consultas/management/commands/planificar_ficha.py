@@ -0,0 +1,84 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Models.models import Competencias, Fichas
+from consultas.planificador import (
+    planificar_ficha, planificar_fichas, guardar_plan, HORAS_BLOQUE, MAX_ITERACIONES, PRESUPUESTO_SEGUNDOS
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Propone (y opcionalmente guarda) los Horarios de una o varias fichas para sus horas "
+        "pendientes. Con varias fichas, los grupos independientes se planifican en paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichas', type=int, nargs='+', help='id_ficha (uno o varios)')
+        parser.add_argument('--desde', type=date.fromisoformat, help='YYYY-MM-DD (por defecto fecha_inicio de la ficha)')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='YYYY-MM-DD (por defecto 12 semanas después)')
+        parser.add_argument('--horas-bloque', type=int, default=HORAS_BLOQUE)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--iteraciones', type=int, default=MAX_ITERACIONES, help='iteraciones de búsqueda local')
+        parser.add_argument(
+            '--presupuesto', type=float, default=PRESUPUESTO_SEGUNDOS,
+            help='segundos máximos (opcional; si corta antes, el plan deja de ser reproducible)',
+        )
+        parser.add_argument('--guardar', action='store_true', help='Guarda los bloques sin conflicto')
+        parser.add_argument('--procesos', type=int, help='Workers para varias fichas (por defecto, núcleos)')
+
+    def handle(self, *args, **opts):
+        if len(opts['fichas']) > 1:
+            return self.planificar_varias(opts)
+
+        try:
+            ficha = Fichas.objects.select_related('id_jornada').get(pk=opts['fichas'][0])
+        except Fichas.DoesNotExist:
+            raise CommandError(f"No existe la ficha {opts['fichas'][0]}.")
+
+        resultado = planificar_ficha(
+            ficha, opts['desde'], opts['hasta'], horas_bloque=opts['horas_bloque'],
+            semilla=opts['semilla'], presupuesto=opts['presupuesto'], max_iteraciones=opts['iteraciones'],
+        )
+        reporte = resultado.reporte()
+        self.stdout.write(
+            f"Ficha {reporte['ficha']}: {reporte['bloques']} bloques, "
+            f"{reporte['horas_programadas']:g} h programadas, {reporte['horas_sin_ubicar']:g} h sin ubicar "
+            f"({reporte['iteraciones']} iteraciones, semilla {reporte['semilla']})."
+        )
+        if reporte['cortado_por_tiempo']:
+            self.stdout.write(self.style.WARNING("  Se agotó el presupuesto de tiempo antes de las iteraciones."))
+
+        nombres = dict(Competencias.objects.filter(
+            id_competencia__in=resultado.sin_ubicar
+        ).values_list('id_competencia', 'nombre_competencia'))
+        for comp_id, horas in resultado.sin_ubicar.items():
+            self.stdout.write(self.style.WARNING(f"  Sin ubicar: {nombres.get(comp_id, comp_id)} - {horas:g} h"))
+
+        if opts['guardar']:
+            creados, conflictos = guardar_plan(resultado)
+            self.stdout.write(self.style.SUCCESS(f"Guardados {len(creados)} bloques."))
+            for conflicto in conflictos:
+                self.stdout.write(self.style.ERROR(f"  Bloque {conflicto['indice']}: {conflicto['motivo']}"))
+
+    def planificar_varias(self, opts):
+        fichas = list(Fichas.objects.filter(id_ficha__in=opts['fichas']))
+        faltantes = set(opts['fichas']) - {f.id_ficha for f in fichas}
+        if faltantes:
+            raise CommandError(f"No existen las fichas {sorted(faltantes)}.")
+
+        reportes, creados, conflictos = planificar_fichas(
+            fichas, opts['desde'], opts['hasta'], horas_bloque=opts['horas_bloque'],
+            semilla=opts['semilla'], presupuesto=opts['presupuesto'], max_iteraciones=opts['iteraciones'],
+            procesos=opts['procesos'], guardar=opts['guardar'],
+        )
+        for reporte in reportes:
+            self.stdout.write(
+                f"Ficha {reporte['ficha']}: {reporte['bloques']} bloques, "
+                f"{reporte['horas_programadas']:g} h programadas, {reporte['horas_sin_ubicar']:g} h sin ubicar."
+            )
+        if opts['guardar']:
+            self.stdout.write(self.style.SUCCESS(f"Guardados {len(creados)} bloques."))
+        for conflicto in conflictos:
+            self.stdout.write(self.style.ERROR(f"  Bloque {conflicto['indice']}: {conflicto['motivo']}"))
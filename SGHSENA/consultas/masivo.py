@@ -0,0 +1,171 @@
+# masivo.py
+from datetime import timedelta
+
+from django.db import transaction
+
+from Models.models import Horarios
+from Models.libro_horas import aplicar_movimientos, movimiento_horario
+from Models.ocupacion import MENSAJE_CRUCE, liberar, ocupacion_estricta, ocupar_por_bloque
+from Models.recurrencias import reglas_en_choque
+from Models.validacion_horarios import IndiceHorarios, indice_actual
+from Models.versiones import registrar_cambio_horarios
+from .consultas import validar_lote
+
+
+# ===============================================================
+# CAMBIOS MASIVOS DE HORARIOS (mover, reasignar, clonar)
+# ===============================================================
+# El cambio se valida completo antes de escribir: una consulta trae los
+# bloques existentes de las fechas afectadas, se sacan del índice las
+# posiciones viejas de los bloques que cambian y cada posición nueva se
+# revisa en memoria contra la BD y contra el resto del cambio. Sin
+# conflictos se guarda todo con bulk_update en una transacción; con alguno,
+# no se guarda nada.
+
+def _en_rango(horarios, desde=None, hasta=None):
+    if desde is not None:
+        horarios = horarios.filter(fecha__gte=desde)
+    if hasta is not None:
+        horarios = horarios.filter(fecha__lte=hasta)
+    return horarios
+
+
+def _pk(valor):
+    return getattr(valor, 'pk', valor)
+
+
+def aplicar_cambio(horarios, cambiar, campos):
+    """
+    Aplica `cambiar(horario)` (modifica la instancia en memoria) a cada
+    bloque del QuerySet `horarios` y guarda `campos` con un bulk_update.
+    Devuelve (cambiados, conflictos); los conflictos tienen el formato de
+    `validar_lote`, con `choques_lote` como posiciones dentro del cambio.
+    """
+    conflictos = []
+    with transaction.atomic():
+        bloques = list(horarios.select_for_update().order_by('fecha', 'hora_inicio', 'id_horario'))
+        if not bloques:
+            return [], []
+
+        fechas = {h.fecha for h in bloques}
+        for bloque in bloques:
+            cambiar(bloque)
+        fechas |= {h.fecha for h in bloques}
+
+        indice = IndiceHorarios()
+        # Solo las fechas de origen y destino: mover de enero a julio no
+        # debe cargar los meses de en medio
+        indice.cargar_fechas(fechas)
+        indice.limitar_reglas(bloques)
+        posiciones = {h.pk: pos for pos, h in enumerate(bloques)}
+        for pk in posiciones:
+            indice.quitar(pk)
+
+        for pos, bloque in enumerate(bloques):
+            reglas = reglas_en_choque(
+                bloque.fecha, bloque.hora_inicio, bloque.hora_fin,
+                bloque.id_instructor_id, bloque.id_ficha_id, bloque.id_ambiente_id,
+                excluir=bloque.id_recurrente_id, reglas=indice.reglas_recurrentes(),
+            )
+            if reglas:
+                conflictos.append({
+                    'indice': pos, 'bloque': bloque,
+                    'motivo': 'Existe un cruce con un horario recurrente.',
+                    'choques_bd': [], 'choques_lote': [], 'choques_reglas': reglas,
+                })
+                continue
+
+            ids = indice.choques(
+                bloque.fecha, bloque.hora_inicio, bloque.hora_fin,
+                instructor=bloque.id_instructor_id,
+                ficha=bloque.id_ficha_id,
+                ambiente=bloque.id_ambiente_id,
+            )
+            if ids:
+                conflictos.append({
+                    'indice': pos, 'bloque': bloque,
+                    'motivo': 'Existe un cruce de horario con otro registro.',
+                    'choques_bd': sorted(i for i in ids if i not in posiciones),
+                    'choques_lote': sorted(posiciones[i] for i in ids if i in posiciones),
+                    'choques_reglas': [],
+                })
+                continue
+
+            indice.agregar(
+                bloque.pk, bloque.fecha, bloque.hora_inicio, bloque.hora_fin,
+                bloque.id_instructor_id, bloque.id_ficha_id, bloque.id_ambiente_id,
+            )
+
+        if conflictos:
+            return [], conflictos
+
+        # bulk_update no envía señales: ocupación, libro de horas y versiones a mano
+        if ocupacion_estricta():
+            # Sin cruzarse pueden compartir una franja de 15 minutos
+            liberar([h._valores_originales for h in bloques])
+            rechazados = ocupar_por_bloque(bloques)
+            if rechazados:
+                transaction.set_rollback(True)
+                return [], [{
+                    'indice': pos, 'bloque': bloques[pos], 'motivo': MENSAJE_CRUCE,
+                    'choques_bd': [], 'choques_lote': [], 'choques_reglas': [],
+                } for pos in rechazados]
+        Horarios.objects.bulk_update(bloques, campos, batch_size=500)
+        aplicar_movimientos(
+            [movimiento_horario(h, -1, h._valores_originales) for h in bloques] +
+            [movimiento_horario(h) for h in bloques]
+        )
+        registrar_cambio_horarios(bloques)
+        for bloque in bloques:
+            bloque._valores_originales = {
+                f.attname: getattr(bloque, f.attname) for f in bloque._meta.concrete_fields
+            }
+
+    activo = indice_actual()
+    if activo is not None:
+        activo.descartar_fechas(fechas)
+    return bloques, conflictos
+
+
+def mover(horarios, dias, desde=None, hasta=None):
+    """Corre los bloques `dias` días (negativo hacia atrás)."""
+    delta = timedelta(days=dias)
+
+    def cambiar(horario):
+        horario.fecha += delta
+
+    return aplicar_cambio(_en_rango(horarios, desde, hasta), cambiar, ['fecha'])
+
+
+def reasignar(horarios, ambiente=None, instructor=None, desde=None, hasta=None):
+    """Pone el ambiente y/o el instructor dados en los bloques (opcionalmente solo entre `desde` y `hasta`)."""
+    campos = []
+    if ambiente is not None:
+        campos.append('id_ambiente')
+    if instructor is not None:
+        campos.append('id_instructor')
+    if not campos:
+        return [], []
+
+    def cambiar(horario):
+        if ambiente is not None:
+            horario.id_ambiente_id = _pk(ambiente)
+        if instructor is not None:
+            horario.id_instructor_id = _pk(instructor)
+
+    return aplicar_cambio(_en_rango(horarios, desde, hasta), cambiar, campos)
+
+
+def clonar(horarios, dias, desde=None, hasta=None):
+    """Copia los bloques `dias` días adelante; o se crean todas las copias o ninguna."""
+    delta = timedelta(days=dias)
+    copias = [
+        Horarios(
+            id_ficha_id=h.id_ficha_id, id_instructor_id=h.id_instructor_id,
+            id_ambiente_id=h.id_ambiente_id, id_jornada_id=h.id_jornada_id,
+            id_competencia_id=h.id_competencia_id,
+            fecha=h.fecha + delta, hora_inicio=h.hora_inicio, hora_fin=h.hora_fin,
+        )
+        for h in _en_rango(horarios, desde, hasta).order_by('fecha', 'hora_inicio', 'id_horario')
+    ]
+    return validar_lote(copias, todo_o_nada=True)
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max, Min, Sum
+from django.utils import timezone
+
+from Models.catalogos import catalogo
+from Models.models import Horarios, Jornadas, LibroHorasContrato
+from Models.versiones import AMBITO_GLOBAL, version_de
+from .cobertura import cobertura_fichas
+
+
+# ===============================================================
+# MÉTRICAS DEL PANEL DE COORDINADOR
+# ===============================================================
+# Todo sale de consultas agrupadas (no una por ambiente / instructor /
+# ficha) y el resultado completo se guarda en caché por semana y versión
+# global de horarios durante METRICAS_COORDINADOR_TTL segundos. Las horas
+# cumplidas, los contratos y las horas de las competencias no tienen
+# versión: `calculado` marca cada cálculo y es lo que usa el ETag del panel.
+
+TTL_POR_DEFECTO = 300
+
+
+def _minutos(duracion):
+    return int(duracion.total_seconds() // 60) if duracion else 0
+
+
+def _diferencia_minutos(hora_inicio, hora_fin):
+    return (hora_fin.hour * 60 + hora_fin.minute) - (hora_inicio.hour * 60 + hora_inicio.minute)
+
+
+def ocupacion_ambientes(desde, hasta):
+    """
+    % de ocupación de cada ambiente entre `desde` y `hasta`. La capacidad de
+    un día es la ventana que cubren todas las jornadas (primera hora de
+    inicio a última de fin), de lunes a sábado.
+    """
+    ventana = Jornadas.objects.aggregate(inicio=Min('hora_inicio'), fin=Max('hora_fin'))
+    dias = sum(1 for n in range((hasta - desde).days + 1) if (desde + timedelta(days=n)).weekday() < 6)
+    capacidad = dias * _diferencia_minutos(ventana['inicio'], ventana['fin']) if ventana['inicio'] else 0
+
+    ocupados = dict(
+        Horarios.objects.filter(fecha__range=(desde, hasta)).values('id_ambiente_id').annotate(
+            total=Sum(F('hora_fin') - F('hora_inicio'))
+        ).values_list('id_ambiente_id', 'total')
+    )
+    filas = []
+    for ambiente_id, nombre in catalogo('ambientes'):
+        minutos = _minutos(ocupados.get(ambiente_id))
+        filas.append({
+            'id_ambiente': ambiente_id,
+            'ambiente': nombre,
+            'horas_ocupadas': minutos / 60,
+            'horas_disponibles': capacidad / 60,
+            'porcentaje': round(100 * minutos / capacidad, 1) if capacidad else 0,
+        })
+    filas.sort(key=lambda f: -f['porcentaje'])
+    return filas
+
+
+def carga_instructores(fecha):
+    """Horas planeadas y cumplidas vs. horas del contrato vigente en `fecha` (libro de horas)."""
+    filas = LibroHorasContrato.objects.filter(
+        contrato__fecha_inicio__lte=fecha,
+        contrato__fecha_fin__gte=fecha,
+        contrato__id_instructor__isnull=False,
+    ).values_list(
+        'contrato__id_instructor_id', 'contrato__id_instructor__user__username',
+        'contrato__tipo_contrato', 'contrato__horas_por_cumplir',
+        'minutos_planeados', 'horas_cumplidas',
+    ).order_by('contrato__id_instructor__user__username')
+    carga = []
+    for instructor_id, nombre, tipo, horas_contrato, minutos, cumplidas in filas:
+        planeadas = minutos / 60
+        carga.append({
+            'id_instructor': instructor_id,
+            'instructor': nombre,
+            'tipo_contrato': tipo,
+            'horas_contrato': horas_contrato,
+            'horas_planeadas': planeadas,
+            'horas_cumplidas': cumplidas,
+            'porcentaje': round(100 * planeadas / horas_contrato, 1) if horas_contrato else 0,
+        })
+    return carga
+
+
+def horas_sin_programar():
+    """Fichas con horas de competencia aún sin programar (de la cobertura), de más a menos."""
+    fichas = [
+        {
+            'id_ficha': f['id_ficha'],
+            'programa': f['programa'],
+            'requeridas': f['requeridas'],
+            'programadas': f['programadas'],
+            'faltantes': f['faltantes'],
+            'competencias_pendientes': sum(1 for c in f['competencias'] if c['diferencia'] < 0),
+        }
+        for f in cobertura_fichas()
+    ]
+    return sorted((f for f in fichas if f['faltantes'] > 0), key=lambda f: -f['faltantes'])
+
+
+def metricas_coordinador(fecha):
+    """
+    Las tres métricas para la semana de `fecha`, desde caché si están
+    vigentes, con `calculado` (momento en que se calcularon).
+    """
+    lunes = fecha - timedelta(days=fecha.weekday())
+    sabado = lunes + timedelta(days=5)
+    llave = f"metricas_coordinador:{lunes.isoformat()}:{version_de(AMBITO_GLOBAL)[0]}"
+
+    def calcular():
+        return {
+            'lunes': lunes,
+            'sabado': sabado,
+            'ocupacion': ocupacion_ambientes(lunes, sabado),
+            'carga': carga_instructores(fecha),
+            'sin_programar': horas_sin_programar(),
+            'calculado': timezone.now(),
+        }
+
+    ttl = getattr(settings, 'METRICAS_COORDINADOR_TTL', TTL_POR_DEFECTO)
+    return cache.get_or_set(llave, calcular, timeout=ttl)
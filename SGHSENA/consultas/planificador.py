@@ -0,0 +1,402 @@
+import random
+import time as reloj
+from datetime import timedelta
+from itertools import count
+
+from django.db.models import Sum, F
+
+from Models.models import Horarios, Fichas, Competencias, Instructores, Ambientes
+from Models.validacion_horarios import IndiceHorarios
+from .consultas import dias_jornada, validar_lote, _segundos, _hora
+from .procesos import inicializar_worker
+
+
+# ===============================================================
+# PLANIFICADOR DE HORARIOS POR FICHA
+# ===============================================================
+# Heurística voraz + búsqueda local:
+#   1. Recorre los días permitidos por la jornada de la ficha en orden y va
+#      llenando las horas pendientes de cada competencia con bloques de
+#      `horas_bloque`, eligiendo el primer instructor y ambiente libres según
+#      un orden de preferencia (líder y ambiente de la ficha primero).
+#   2. Durante `max_iteraciones`, perturba el orden de las competencias y
+#      las preferencias de instructores/ambientes (con una semilla
+#      reproducible) y se queda con el mejor plan. Solo las iteraciones
+#      deciden cuándo parar, así que la misma semilla da el mismo plan en
+#      cualquier máquina; el límite de tiempo es opcional.
+# Los cruces se revisan contra un IndiceHorarios cargado una sola vez.
+
+SEMANAS_POR_DEFECTO = 12
+HORAS_BLOQUE = 3
+PRESUPUESTO_SEGUNDOS = None  # sin límite de tiempo: el plan es reproducible
+MAX_ITERACIONES = 200
+
+# Los bloques tentativos del planificador usan ids negativos en el índice
+_ids_temporales = count(-1, -1)
+
+
+class ResultadoPlan:
+    """Bloques propuestos (Horarios sin guardar) y horas que no se pudieron ubicar."""
+
+    def __init__(self, ficha, semilla):
+        self.ficha = ficha
+        self.semilla = semilla
+        self.bloques = []
+        self.sin_ubicar = {}
+        self.iteraciones = 0
+        self.cortado_por_tiempo = False
+        self.puntaje = None
+
+    @property
+    def horas_programadas(self):
+        return sum(
+            (_segundos(b.hora_fin) - _segundos(b.hora_inicio)) / 3600 for b in self.bloques
+        )
+
+    @property
+    def horas_sin_ubicar(self):
+        return sum(self.sin_ubicar.values())
+
+    def reporte(self):
+        return {
+            'ficha': self.ficha.id_ficha,
+            'semilla': self.semilla,
+            'iteraciones': self.iteraciones,
+            'cortado_por_tiempo': self.cortado_por_tiempo,
+            'bloques': len(self.bloques),
+            'horas_programadas': self.horas_programadas,
+            'horas_sin_ubicar': self.horas_sin_ubicar,
+            'sin_ubicar': dict(self.sin_ubicar),
+        }
+
+
+def horas_pendientes(ficha):
+    """{id_competencia: horas} que la ficha aún no tiene programadas."""
+    programadas = dict(
+        Horarios.objects.filter(id_ficha=ficha).values('id_competencia').annotate(
+            total=Sum(F('hora_fin') - F('hora_inicio'))
+        ).values_list('id_competencia', 'total')
+    )
+    pendientes = {}
+    for comp_id, horas in Competencias.objects.filter(
+        programa_relacionado_id=ficha.id_programa_id
+    ).order_by('id_competencia').values_list('id_competencia', 'horas'):
+        hechas = programadas.get(comp_id)
+        hechas = hechas.total_seconds() / 3600 if hechas else 0
+        if horas - hechas > 0:
+            pendientes[comp_id] = horas - hechas
+    return pendientes
+
+
+def _dias_plan(ficha, fecha_inicio, fecha_fin):
+    dias = dias_jornada(ficha.id_jornada_id)
+    return [
+        fecha_inicio + timedelta(days=n)
+        for n in range((fecha_fin - fecha_inicio).days + 1)
+        if (fecha_inicio + timedelta(days=n)).weekday() in dias
+    ]
+
+
+def _primero_libre(indice, candidatos, tipo, fecha, inicio, fin):
+    for candidato in candidatos:
+        if not indice.choques(fecha, inicio, fin, **{tipo: candidato}):
+            return candidato
+    return None
+
+
+def _pasada(ficha, fechas, pendientes, orden, pref_instructores, pref_ambientes, indice, horas_bloque):
+    """Una pasada voraz. Deja sus bloques en el índice y los devuelve."""
+    jornada = ficha.id_jornada
+    inicio_j, fin_j = _segundos(jornada.hora_inicio), _segundos(jornada.hora_fin)
+    restantes = {c: round(pendientes[c] * 3600) for c in orden}
+    instructores = {c: list(pref_instructores) for c in orden}
+    colocados = []
+    cola = [c for c in orden if restantes[c] > 0]
+
+    for fecha in fechas:
+        t = inicio_j
+        while cola and t < fin_j:
+            comp = cola[0]
+            fin = min(t + horas_bloque * 3600, fin_j, t + restantes[comp])
+            h_ini, h_fin = _hora(t), _hora(fin)
+            if indice.choques(fecha, h_ini, h_fin, ficha=ficha.id_ficha):
+                t += 3600
+                continue
+
+            instructor = _primero_libre(indice, instructores[comp], 'instructor', fecha, h_ini, h_fin)
+            ambiente = None
+            if instructor is not None:
+                ambiente = _primero_libre(indice, pref_ambientes, 'ambiente', fecha, h_ini, h_fin)
+            if ambiente is None:
+                t += 3600
+                continue
+
+            # Continuidad: el instructor usado pasa a ser el preferido de la competencia
+            if instructores[comp][0] != instructor:
+                instructores[comp].remove(instructor)
+                instructores[comp].insert(0, instructor)
+
+            temporal = next(_ids_temporales)
+            indice.agregar(temporal, fecha, h_ini, h_fin, instructor, ficha.id_ficha, ambiente)
+            colocados.append((temporal, fecha, h_ini, h_fin, comp, instructor, ambiente))
+            restantes[comp] -= fin - t
+            if restantes[comp] <= 0:
+                cola.pop(0)
+            t = fin
+
+    sin_ubicar = {c: s / 3600 for c, s in restantes.items() if s > 0}
+    return colocados, sin_ubicar
+
+
+def _puntaje(colocados, sin_ubicar, ficha):
+    # Menos horas sin ubicar, luego menos instructores distintos por competencia,
+    # luego menos bloques fuera del ambiente de la ficha.
+    instructores = {}
+    fuera = 0
+    for _, _, _, _, comp, instructor, ambiente in colocados:
+        instructores.setdefault(comp, set()).add(instructor)
+        fuera += ambiente != ficha.id_ambiente_id
+    cambios = sum(len(v) - 1 for v in instructores.values())
+    return (sum(sin_ubicar.values()), cambios, fuera)
+
+
+def planificar_ficha(ficha, fecha_inicio=None, fecha_fin=None, horas_bloque=HORAS_BLOQUE,
+                     instructores=None, ambientes=None, semilla=0,
+                     presupuesto=PRESUPUESTO_SEGUNDOS, max_iteraciones=MAX_ITERACIONES, indice=None):
+    """
+    Propone Horarios sin cruces para las horas pendientes de las competencias
+    del programa de la `ficha` entre `fecha_inicio` (por defecto la de la
+    ficha) y `fecha_fin` (por defecto 12 semanas después).
+
+    `instructores` / `ambientes` limitan los recursos elegibles (ids); por
+    defecto se usan todos. La búsqueda local hace `max_iteraciones` y con la
+    misma `semilla` el resultado es siempre el mismo. `presupuesto`
+    (segundos, opcional) corta antes si se acaba el tiempo; en ese caso el
+    plan depende de la máquina y `cortado_por_tiempo` queda en True. Si se
+    pasa un `indice` compartido, el plan elegido queda registrado en él.
+
+    No guarda nada: ver `guardar_plan`.
+    """
+    if not isinstance(ficha, Fichas):
+        ficha = Fichas.objects.select_related('id_jornada').get(pk=ficha)
+    fecha_inicio = fecha_inicio or ficha.fecha_inicio
+    fecha_fin = fecha_fin or fecha_inicio + timedelta(weeks=SEMANAS_POR_DEFECTO) - timedelta(days=1)
+
+    resultado = ResultadoPlan(ficha, semilla)
+    pendientes = horas_pendientes(ficha)
+    if not pendientes:
+        return resultado
+
+    if instructores is None:
+        instructores = list(Instructores.objects.order_by('id').values_list('id', flat=True))
+    if ambientes is None:
+        ambientes = list(Ambientes.objects.order_by('id_ambiente').values_list('id_ambiente', flat=True))
+    # Preferencia inicial: líder y ambiente de la ficha primero
+    instructores = sorted(instructores, key=lambda i: i != ficha.id_instructor_lider_id)
+    ambientes = sorted(ambientes, key=lambda a: a != ficha.id_ambiente_id)
+
+    if indice is None:
+        indice = IndiceHorarios()
+    indice.cargar_rango(fecha_inicio, fecha_fin)
+    fechas = _dias_plan(ficha, fecha_inicio, fecha_fin)
+
+    rng = random.Random(semilla)
+    orden = list(pendientes)
+    mejor = None
+    limite = reloj.monotonic() + presupuesto if presupuesto is not None else None
+
+    while resultado.iteraciones < max_iteraciones:
+        colocados, sin_ubicar = _pasada(
+            ficha, fechas, pendientes, orden, instructores, ambientes, indice, horas_bloque
+        )
+        for temporal, *_ in colocados:
+            indice.quitar(temporal)
+        resultado.iteraciones += 1
+
+        puntaje = _puntaje(colocados, sin_ubicar, ficha)
+        if mejor is None or puntaje < mejor[0]:
+            mejor = (puntaje, colocados, sin_ubicar, list(orden), list(instructores), list(ambientes))
+        if puntaje == (0, 0, 0):
+            break
+        if limite is not None and reloj.monotonic() >= limite:
+            resultado.cortado_por_tiempo = resultado.iteraciones < max_iteraciones
+            break
+
+        # Vecino: parte del mejor plan e intercambia dos competencias y dos recursos
+        orden, instructores, ambientes = list(mejor[3]), list(mejor[4]), list(mejor[5])
+        for lista in (orden, instructores, ambientes):
+            if len(lista) > 1:
+                i, j = rng.sample(range(len(lista)), 2)
+                lista[i], lista[j] = lista[j], lista[i]
+
+    resultado.puntaje, colocados, resultado.sin_ubicar = mejor[0], mejor[1], mejor[2]
+    for temporal, fecha, h_ini, h_fin, comp, instructor, ambiente in colocados:
+        indice.agregar(temporal, fecha, h_ini, h_fin, instructor, ficha.id_ficha, ambiente)
+        resultado.bloques.append(Horarios(
+            id_ficha_id=ficha.id_ficha,
+            id_instructor_id=instructor,
+            id_ambiente_id=ambiente,
+            id_jornada_id=ficha.id_jornada_id,
+            id_competencia_id=comp,
+            fecha=fecha,
+            hora_inicio=h_ini,
+            hora_fin=h_fin,
+        ))
+    return resultado
+
+
+def guardar_plan(resultado):
+    """Valida de nuevo contra la BD y guarda el plan con `validar_lote`."""
+    return validar_lote(resultado.bloques)
+
+
+# ===============================================================
+# PLANIFICACIÓN DE VARIAS FICHAS EN PARALELO
+# ===============================================================
+# Las fichas solo compiten por instructores y ambientes. Se agrupan las que
+# comparten algún recurso elegible (unión-búsqueda); cada grupo es
+# independiente y se planifica en un proceso distinto. Al final todos los
+# bloques pasan juntos por `validar_lote`, que resuelve cualquier cruce que
+# quede (con la BD o entre grupos) y los inserta con `bulk_create`.
+
+def recursos_elegibles(fichas):
+    """
+    {id_ficha: (instructores, ambientes)} por defecto: el líder y el ambiente
+    de la ficha más los que ya le dictan o la reciben en Horarios.
+    """
+    recursos = {
+        f.id_ficha: ({f.id_instructor_lider_id}, {f.id_ambiente_id}) for f in fichas
+    }
+    usados = Horarios.objects.filter(id_ficha__in=list(recursos)).values_list(
+        'id_ficha_id', 'id_instructor_id', 'id_ambiente_id'
+    ).distinct()
+    for ficha_id, instructor, ambiente in usados:
+        recursos[ficha_id][0].add(instructor)
+        recursos[ficha_id][1].add(ambiente)
+    return {k: (sorted(i), sorted(a)) for k, (i, a) in recursos.items()}
+
+
+def agrupar_fichas(recursos):
+    """Grupos de id_ficha que comparten al menos un instructor o ambiente."""
+    padre = {f: f for f in recursos}
+
+    def raiz(f):
+        while padre[f] != f:
+            padre[f] = padre[padre[f]]
+            f = padre[f]
+        return f
+
+    dueno = {}
+    for ficha_id, (instructores, ambientes) in recursos.items():
+        llaves = [('instructor', i) for i in instructores] + [('ambiente', a) for a in ambientes]
+        for llave in llaves:
+            if llave in dueno:
+                padre[raiz(ficha_id)] = raiz(dueno[llave])
+            else:
+                dueno[llave] = ficha_id
+
+    grupos = {}
+    for ficha_id in recursos:
+        grupos.setdefault(raiz(ficha_id), []).append(ficha_id)
+    return sorted((sorted(g) for g in grupos.values()), key=len, reverse=True)
+
+
+def _planificar_grupo(fichas_ids, recursos, fecha_inicio, fecha_fin, opciones):
+    """Planifica un grupo en un proceso; devuelve tuplas serializables."""
+    indice = IndiceHorarios()
+    fichas = Fichas.objects.select_related('id_jornada').filter(id_ficha__in=fichas_ids)
+    bloques, reportes = [], []
+    for ficha in sorted(fichas, key=lambda f: (f.fecha_inicio, f.id_ficha)):
+        instructores, ambientes = recursos[ficha.id_ficha]
+        resultado = planificar_ficha(
+            ficha, fecha_inicio, fecha_fin, instructores=instructores, ambientes=ambientes,
+            semilla=opciones['semilla'] + ficha.id_ficha, indice=indice,
+            horas_bloque=opciones['horas_bloque'], presupuesto=opciones['presupuesto'],
+            max_iteraciones=opciones['max_iteraciones'],
+        )
+        reportes.append(resultado.reporte())
+        bloques.extend(
+            (b.id_ficha_id, b.id_instructor_id, b.id_ambiente_id, b.id_jornada_id,
+             b.id_competencia_id, b.fecha, b.hora_inicio, b.hora_fin)
+            for b in resultado.bloques
+        )
+    return bloques, reportes
+
+
+def planificar_fichas(fichas, fecha_inicio=None, fecha_fin=None, recursos=None,
+                      horas_bloque=HORAS_BLOQUE, semilla=0, presupuesto=PRESUPUESTO_SEGUNDOS,
+                      max_iteraciones=MAX_ITERACIONES, procesos=None, guardar=True):
+    """
+    Planifica varias fichas a la vez. `recursos` es {id_ficha: (instructores,
+    ambientes)}; por defecto `recursos_elegibles`. Los grupos independientes
+    se reparten en un ProcessPoolExecutor de `procesos` workers (con
+    `procesos=1` todo corre en el proceso actual).
+
+    Devuelve (reportes, creados, conflictos); `creados` queda vacío si
+    `guardar` es False. Los reportes ya descuentan los bloques rechazados
+    en la pasada final (sus horas cuentan como sin ubicar).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from django.conf import settings
+    from django.db import connections
+
+    fichas = [
+        f if isinstance(f, Fichas) else Fichas.objects.get(pk=f) for f in fichas
+    ]
+    recursos = recursos or recursos_elegibles(fichas)
+    grupos = agrupar_fichas({f.id_ficha: recursos[f.id_ficha] for f in fichas})
+    opciones = {
+        'semilla': semilla, 'horas_bloque': horas_bloque,
+        'presupuesto': presupuesto, 'max_iteraciones': max_iteraciones,
+    }
+
+    if procesos == 1 or len(grupos) == 1:
+        salidas = [
+            _planificar_grupo(g, recursos, fecha_inicio, fecha_fin, opciones) for g in grupos
+        ]
+    else:
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            initializer=inicializar_worker,
+            initargs=(
+                settings.SETTINGS_MODULE,
+                {c.alias: c.settings_dict['NAME'] for c in connections.all()},
+            ),
+        ) as pool:
+            futuros = [
+                pool.submit(_planificar_grupo, g, recursos, fecha_inicio, fecha_fin, opciones)
+                for g in grupos
+            ]
+            salidas = [f.result() for f in futuros]
+
+    reportes, bloques = [], []
+    for grupo_bloques, grupo_reportes in salidas:
+        reportes.extend(grupo_reportes)
+        bloques.extend(
+            Horarios(
+                id_ficha_id=ficha, id_instructor_id=instructor, id_ambiente_id=ambiente,
+                id_jornada_id=jornada, id_competencia_id=competencia,
+                fecha=fecha, hora_inicio=inicio, hora_fin=fin,
+            )
+            for ficha, instructor, ambiente, jornada, competencia, fecha, inicio, fin in grupo_bloques
+        )
+
+    # Pasada final: cruces contra la BD y entre grupos, e inserción en bloque
+    creados, conflictos = validar_lote(bloques, guardar=guardar)
+    _devolver_rechazados(reportes, conflictos)
+    return reportes, creados, conflictos
+
+
+def _devolver_rechazados(reportes, conflictos):
+    """Las horas de los bloques que rechazó `validar_lote` vuelven a `sin_ubicar` de su ficha."""
+    por_ficha = {r['ficha']: r for r in reportes}
+    for conflicto in conflictos:
+        bloque = conflicto['bloque']
+        horas = (_segundos(bloque.hora_fin) - _segundos(bloque.hora_inicio)) / 3600
+        reporte = por_ficha[bloque.id_ficha_id]
+        sin_ubicar = reporte['sin_ubicar']
+        sin_ubicar[bloque.id_competencia_id] = sin_ubicar.get(bloque.id_competencia_id, 0) + horas
+        reporte['bloques'] -= 1
+        reporte['horas_programadas'] -= horas
+        reporte['horas_sin_ubicar'] += horas
@@ -0,0 +1,22 @@
+# procesos.py
+import os
+
+
+# ===============================================================
+# INICIALIZADOR DE LOS WORKERS DEL PLANIFICADOR
+# ===============================================================
+# Este módulo no importa modelos: con 'spawn' (Windows) o 'forkserver' el
+# proceso hijo lo importa para correr el inicializador antes de que Django
+# esté configurado.
+
+def inicializar_worker(settings_module, nombres_bd):
+    import django
+    from django.db import connections
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+    # Con 'fork' no se pueden reutilizar las conexiones del proceso padre
+    connections.close_all()
+    # La BD que usa el padre (p. ej. la de pruebas), no la de settings
+    for alias, nombre in nombres_bd.items():
+        connections[alias].settings_dict['NAME'] = nombre
@@ -1,3 +1,445 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import F, Sum
+from django.test import override_settings
+from django.urls import reverse
+
+from Models.models import (
+    Usuario, Instructores, Ambientes, Competencias, Fichas, Horarios, HorarioRecurrente, JornadaDia,
+    LibroHorasSemana, OcupacionFranja, ProgramasFormacion, ResultadosAprendizaje, VersionHorarios
+)
+from Models.pruebas import LUNES, HorariosTestCase, HorariosTransactionTestCase
+from Models.recurrencias import materializar
+from Models.validacion_horarios import IndiceHorarios
+from .cobertura import FALTANTE, SOBREASIGNADA, cobertura_fichas
+from .consultas import ambientes_disponibles, ambientes_libres, instructores_disponibles, validar_lote
+from .planificador import agrupar_fichas, planificar_ficha, planificar_fichas
+from .masivo import clonar, mover, reasignar
+
+
+class ApiConsultasTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.coordinador = Usuario.objects.create_user(
+            10000002, 'clave-segura-123', username='coordinador', tipo='COORDINADOR'
+        )
+        Ambientes.objects.create(id_ambiente=2, nombre_ambiente='Sala 2')
+        Horarios.objects.bulk_create([
+            cls.bloque(
+                (7 + 2 * (n % 2),), (9 + 2 * (n % 2),), fecha=date(2026, 1, 5) + timedelta(days=n // 2)
+            )
+            for n in range(7)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.coordinador)
+
+    def test_paginacion_por_cursor_y_proyeccion(self):
+        url = reverse('consultas:api_consulta', args=['ficha'])
+        params = {'ficha': self.ficha.id_ficha, 'limite': 3, 'campos': 'id,hora_inicio'}
+        ids = []
+        while True:
+            datos = self.client.get(url, params).json()
+            self.assertTrue(all(set(fila) == {'id', 'hora_inicio'} for fila in datos['resultados']))
+            ids += [fila['id'] for fila in datos['resultados']]
+            if not datos['siguiente']:
+                break
+            params['cursor'] = datos['siguiente']
+        esperados = Horarios.objects.order_by('fecha', 'hora_inicio', 'id_horario').values_list('id_horario', flat=True)
+        self.assertEqual(ids, list(esperados))
+
+        self.assertEqual(self.client.get(url, {'ficha': 1, 'campos': 'clave'}).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_disponibles_y_choques(self):
+        bloque = {'fecha': '2026-01-05', 'hora_inicio': '08:00', 'hora_fin': '10:00'}
+        ambientes = self.client.get(reverse('consultas:api_consulta', args=['ambientes']), bloque).json()
+        self.assertEqual(ambientes['resultados'], [{'id': 2, 'nombre': 'Sala 2'}])
+
+        choques = self.client.get(
+            reverse('consultas:api_consulta', args=['choques']), {**bloque, 'instructor': self.instructor.pk}
+        ).json()
+        self.assertEqual(len(choques['resultados']), 2)
+
+    def test_etag_por_usuario(self):
+        url = reverse('panel')
+        primera = self.client.get(url)
+        self.assertIn('no-cache', primera['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag']).status_code, 304)
+
+        # Otro coordinador con la misma versión no recibe la página del primero
+        otro = Usuario.objects.create_user(10000004, 'clave-segura-123', username='otro', tipo='COORDINADOR')
+        self.client.force_login(otro)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag']).status_code, 200)
+
+    def test_solo_coordinadores(self):
+        self.client.force_login(self.instructor.user)
+        self.assertEqual(self.client.get(reverse('consultas:api_consulta', args=['ficha'])).status_code, 403)
+
+
+class CambiosMasivosTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = Usuario.objects.create_superuser(10000009, 'clave-segura-123', username='admin')
+        cls.sala1 = cls.ambiente
+        cls.sala2 = Ambientes.objects.create(id_ambiente=2, nombre_ambiente='Sala 2')
+        otra_ficha = Fichas.objects.create(
+            id_ficha=2500002, id_programa=cls.programa, id_instructor_lider=cls.instructor,
+            id_ambiente=cls.sala1, id_jornada=cls.jornada, fecha_inicio=date(2026, 1, 5),
+        )
+        # Ficha 1: lunes a miércoles en la Sala 1; ficha 2: el lunes de la semana siguiente en la Sala 2
+        for n in range(3):
+            cls.bloque(fecha=date(2026, 1, 5) + timedelta(days=n)).save()
+        otro = Usuario.objects.create_user(10000003, None, username='otro', tipo='INSTRUCTOR')
+        cls.bloque(
+            id_ficha=otra_ficha, id_instructor=Instructores.objects.create(user=otro, profesion='Diseñador'),
+            id_ambiente=cls.sala2, fecha=date(2026, 1, 12),
+        ).save()
+
+    def bloques(self):
+        return Horarios.objects.filter(id_ficha=self.ficha)
+
+    def test_mover_y_reasignar_todo_o_nada(self):
+        # Correrlos una semana los deja en la Sala 1 sin cruces
+        cambiados, conflictos = mover(self.bloques(), 7)
+        self.assertEqual((len(cambiados), conflictos), (3, []))
+        self.assertEqual(sorted(self.bloques().values_list('fecha', flat=True)), [date(2026, 1, 12 + n) for n in range(3)])
+        minutos = dict(LibroHorasSemana.objects.values_list('semana', 'minutos_planeados'))
+        self.assertEqual((minutos[date(2026, 1, 5)], minutos[date(2026, 1, 12)]), (0, 360))
+        self.assertTrue(VersionHorarios.objects.filter(ambito=f'ficha:{self.ficha.pk}').exists())
+
+        # La Sala 2 está ocupada el lunes 12: no se cambia ningún bloque
+        cambiados, conflictos = reasignar(self.bloques(), ambiente=self.sala2)
+        self.assertEqual(cambiados, [])
+        self.assertEqual([c['indice'] for c in conflictos], [0])
+        self.assertFalse(self.bloques().filter(id_ambiente=self.sala2).exists())
+
+        # Solo martes y miércoles sí caben
+        cambiados, conflictos = reasignar(self.bloques(), ambiente=self.sala2, desde=date(2026, 1, 13))
+        self.assertEqual((len(cambiados), conflictos), (2, []))
+
+    def test_mover_lejos_carga_solo_fechas_afectadas(self):
+        # Seis meses después: el índice no debe traer los días de en medio
+        with mock.patch.object(IndiceHorarios, '_cargar', autospec=True, side_effect=IndiceHorarios._cargar) as cargar:
+            cambiados, conflictos = mover(self.bloques(), 182)
+        self.assertEqual((len(cambiados), conflictos), (3, []))
+        (_, filtro, pendientes), = [llamada.args for llamada in cargar.call_args_list]
+        origen = [date(2026, 1, 5 + n) for n in range(3)]
+        self.assertEqual(pendientes, origen + [f + timedelta(days=182) for f in origen])
+        self.assertEqual(filtro, {'fecha__in': pendientes})
+
+    @override_settings(HORARIOS_OCUPACION_ESTRICTA=True)
+    def test_accion_del_admin_con_franja_compartida(self):
+        martes = date(2026, 1, 20)
+        self.bloque((7,), (7, 10), fecha=martes).save()
+        movido = self.bloque((7, 10), (7, 20), fecha=martes + timedelta(days=1))
+        movido.save()
+
+        # Correrlo al martes no lo cruza con nadie, pero comparte la franja de 7:00 a 7:15
+        self.client.force_login(self.admin)
+        respuesta = self.client.post('/admin/Models/horarios/', {
+            'action': 'mover_bloques', '_selected_action': [movido.pk], 'aplicar': '1', 'dias': -1,
+        })
+        self.assertContains(respuesta, '1 bloques con cruce')
+        movido.refresh_from_db()
+        self.assertEqual(movido.fecha, martes + timedelta(days=1))
+        self.assertEqual(OcupacionFranja.objects.count(), 9)
+
+    def test_clonar_y_accion_del_admin(self):
+        # Clonar la semana encima de sí misma choca con cada bloque original
+        creados, conflictos = clonar(self.bloques(), 0)
+        self.assertEqual((creados, len(conflictos)), ([], 3))
+        self.assertEqual(self.bloques().count(), 3)
+
+        self.client.force_login(self.admin)
+        datos = {'action': 'clonar_bloques', '_selected_action': list(self.bloques().values_list('pk', flat=True))}
+        self.assertContains(self.client.post('/admin/Models/horarios/', datos), '3 bloques seleccionados')
+        respuesta = self.client.post('/admin/Models/horarios/', {**datos, 'aplicar': '1', 'dias': 14})
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(self.bloques().filter(fecha__gte=date(2026, 1, 19)).count(), 3)
+
+
+class HuecosLibresTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.sala2 = Ambientes.objects.create(id_ambiente=2, nombre_ambiente='Sala 2')
+        # Lunes en la Sala 1 (jornada de 6 a 12): uno empieza antes de la
+        # jornada, dos se tocan o se cruzan y el último termina después
+        for inicio, fin in [((5,), (6, 30)), ((6, 30), (7,)), ((6, 45), (8,)),
+                            ((9,), (9, 20)), ((10,), (11,)), ((11, 30), (13,))]:
+            cls.bloque(inicio, fin).save()
+
+    def test_une_bloques_y_recorta_a_la_jornada(self):
+        martes = LUNES + timedelta(days=1)
+        libres = ambientes_libres(LUNES, martes, self.jornada, 30)
+        self.assertEqual(libres[1], [
+            (LUNES, time(8), time(9)),
+            (LUNES, time(9, 20), time(10)),
+            (LUNES, time(11), time(11, 30)),
+            (martes, time(6), time(12)),
+        ])
+        self.assertEqual(libres[2], [(LUNES, time(6), time(12)), (martes, time(6), time(12))])
+
+        # Con 45 minutos solo queda el hueco de una hora; `ids` filtra recursos
+        libres = ambientes_libres(LUNES, LUNES, self.jornada, 45, ids=[1])
+        self.assertEqual(libres, {1: [(LUNES, time(8), time(9))]})
+
+    def test_solo_dias_de_la_jornada(self):
+        JornadaDia.objects.create(jornada=self.jornada, Martes=True)
+        libres = ambientes_libres(LUNES, LUNES + timedelta(days=6), self.jornada, 30, ids=[1])
+        self.assertEqual(libres[1], [(LUNES + timedelta(days=1), time(6), time(12))])
+
+    def test_ocurrencias_recurrentes_ocupan(self):
+        martes = LUNES + timedelta(days=1)
+        regla = HorarioRecurrente.objects.create(
+            id_ficha=self.ficha, id_instructor=self.instructor, id_ambiente=self.sala2,
+            id_jornada=self.jornada, id_competencia=self.competencia, Martes=True,
+            fecha_inicio=LUNES, fecha_fin=LUNES + timedelta(days=13), hora_inicio=time(8), hora_fin=time(10),
+        )
+        libres = ambientes_libres(martes, martes, self.jornada, 30, ids=[2])
+        self.assertEqual(libres[2], [(martes, time(6), time(8)), (martes, time(10), time(12))])
+        self.assertNotIn(self.sala2, ambientes_disponibles(martes, time(9), time(11)))
+        self.assertNotIn(self.instructor, instructores_disponibles(martes, time(9), time(11)))
+        self.assertIn(self.sala2, ambientes_disponibles(martes, time(10), time(11)))
+
+        # Materializada sigue ocupando, ahora como Horario
+        materializar(regla, hasta=martes)
+        self.assertEqual(ambientes_libres(martes, martes, self.jornada, 30, ids=[2]), libres)
+
+
+class CoberturaTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for nombre, horas in [('Analizar', 30), ('Construir', 10)]:
+            ResultadosAprendizaje.objects.create(nombre_resultado=nombre, id_competencia=cls.competencia, hora_resultado=horas)
+        otro_programa = ProgramasFormacion.objects.create(nombre_programa='Contabilidad', id_nivel=cls.programa.id_nivel)
+        cls.ajena = Competencias.objects.create(nombre_competencia='Costos', horas=5, programa_relacionado=otro_programa)
+        # 20 días de 1 h 30 min de Programación y 7 h de una competencia de otro programa
+        for n in range(20):
+            cls.bloque((7,), (8, 30), fecha=LUNES + timedelta(days=n)).save()
+        cls.bloque((6,), (13,), id_competencia=cls.ajena, fecha=LUNES + timedelta(days=30)).save()
+
+    def test_sumas_coinciden_con_la_bd(self):
+        with self.assertNumQueries(4):
+            reporte, = cobertura_fichas(fichas=[self.ficha.pk])
+        crudo = dict(
+            Horarios.objects.filter(id_ficha=self.ficha).values('id_competencia_id')
+            .annotate(t=Sum(F('hora_fin') - F('hora_inicio'))).values_list('id_competencia_id', 't')
+        )
+        horas = {c['id_competencia']: c['programadas'] for c in reporte['competencias']}
+        self.assertEqual(horas, {k: v.total_seconds() / 3600 for k, v in crudo.items()})
+        self.assertEqual(reporte['programadas'], 37)
+        self.assertEqual(reporte['requeridas'], 45)
+        self.assertEqual((reporte['faltantes'], reporte['sobreasignadas']), (10, 2))
+
+        programacion, costos = reporte['competencias']
+        self.assertEqual((programacion['estado'], costos['estado']), (FALTANTE, SOBREASIGNADA))
+        # Las 30 h llenan el primer resultado antes de pasar al segundo
+        self.assertEqual([r['cubiertas'] for r in programacion['resultados']], [30, 0])
+        self.assertEqual(sum(r['cubiertas'] for r in programacion['resultados']), programacion['programadas'])
+
+
+class ValidarLoteTests(HorariosTestCase):
+
+    def lote(self):
+        return [
+            self.bloque(),
+            self.bloque(hora_inicio=None),
+            self.bloque((10,), (9,)),
+            self.bloque((8,), (10,)),
+            {
+                'id_ficha_id': self.ficha.pk, 'id_instructor_id': self.instructor.pk,
+                'id_ambiente_id': self.ambiente.pk, 'id_jornada_id': self.jornada.pk,
+                'id_competencia_id': self.competencia.pk,
+                'fecha': '2026-01-06', 'hora_inicio': '07:00', 'hora_fin': '09:00',
+            },
+            {'fecha': 'mañana', 'hora_inicio': '07:00', 'hora_fin': '09:00'},
+        ]
+
+    def test_campos_invalidos_se_reportan_por_bloque(self):
+        creados, conflictos = validar_lote(self.lote())
+        self.assertEqual(len(creados), 2)
+        self.assertEqual([c['indice'] for c in conflictos], [1, 2, 3, 5])
+        self.assertIn('hora_inicio', conflictos[0]['motivo'])
+        self.assertEqual(conflictos[1]['motivo'], 'La hora fin debe ser mayor que la hora inicio.')
+        self.assertEqual(conflictos[2]['choques_lote'], [0])
+        self.assertIn('fecha', conflictos[3]['motivo'])
+        self.assertIn('id_ficha', conflictos[3]['motivo'])
+        self.assertEqual(Horarios.objects.count(), 2)
+
+    def test_todo_o_nada(self):
+        creados, conflictos = validar_lote(self.lote(), todo_o_nada=True)
+        self.assertEqual((creados, [c['indice'] for c in conflictos]), ([], [1, 2, 3, 5]))
+        self.assertFalse(Horarios.objects.exists())
+
+        # Solo bloques inválidos: no se consulta la BD ni se guarda nada
+        creados, conflictos = validar_lote([self.bloque(fecha=None)], todo_o_nada=True)
+        self.assertEqual((creados, len(conflictos)), ([], 1))
+
+    @override_settings(HORARIOS_OCUPACION_ESTRICTA=True)
+    def test_franja_compartida_en_modo_estricto(self):
+        self.bloque((7,), (7, 10)).save()
+        # 7:10-7:20 no se cruza con 7:00-7:10, pero comparte la franja de 7:00 a 7:15
+        lote = lambda: [self.bloque((7, 10), (7, 20)), self.bloque((9,), (10,))]
+        creados, conflictos = validar_lote(lote(), todo_o_nada=True)
+        self.assertEqual((creados, [c['indice'] for c in conflictos]), ([], [0]))
+        self.assertEqual((Horarios.objects.count(), OcupacionFranja.objects.count()), (1, 3))
+
+        creados, conflictos = validar_lote(lote())
+        self.assertEqual(([h.hora_inicio for h in creados], [c['indice'] for c in conflictos]), ([time(9)], [0]))
+        self.assertEqual(conflictos[0]['motivo'], 'Existe un cruce de horario con otro registro.')
+        self.assertEqual((Horarios.objects.count(), OcupacionFranja.objects.count()), (2, 15))
+
+
+class ExportacionTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.coordinador = Usuario.objects.create_user(
+            10000002, 'clave-segura-123', username='coordinador', tipo='COORDINADOR'
+        )
+        for fecha in (date(2026, 1, 5), date(2026, 1, 12), date(2026, 1, 20)):
+            cls.bloque(fecha=fecha).save()
+
+    def descargar(self, alcance, pk, **params):
+        respuesta = self.client.get(reverse('consultas:exportar_horario', args=[alcance, pk]), params)
+        if respuesta.status_code != 200:
+            return respuesta.status_code, None
+        return 200, b''.join(respuesta.streaming_content).decode()
+
+    def test_csv_del_instructor_por_rango(self):
+        self.client.force_login(self.usuario)
+        pk = self.instructor.pk
+        estado, texto = self.descargar('instructor', pk, desde='2026-01-05', hasta='2026-01-13')
+        lineas = texto.splitlines()
+        self.assertEqual(lineas[0].split(',')[:4], ['id_horario', 'fecha', 'hora_inicio', 'hora_fin'])
+        self.assertEqual([l.split(',')[1] for l in lineas[1:]], ['2026-01-05', '2026-01-12'])
+
+        # Solo `hasta`: la semana que termina ese día, no un rango invertido desde hoy
+        estado, texto = self.descargar('instructor', pk, hasta='2026-01-13')
+        self.assertEqual([l.split(',')[1] for l in texto.splitlines()[1:]], ['2026-01-12'])
+
+        self.assertEqual(self.descargar('instructor', pk, desde='2026-01-13', hasta='2026-01-05')[0], 400)
+        self.assertEqual(self.descargar('instructor', pk, formato='pdf')[0], 400)
+        self.assertEqual(self.descargar('ficha', self.ficha.pk)[0], 403)
+
+    def test_ics_y_cobertura_para_coordinador(self):
+        self.client.force_login(self.coordinador)
+        estado, texto = self.descargar('ficha', self.ficha.pk, formato='ics', desde='2026-01-06')
+        self.assertTrue(texto.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(texto.count('BEGIN:VEVENT'), 2)
+        self.assertIn('DTSTART:20260112T070000', texto)
+
+        respuesta = self.client.get(reverse('consultas:cobertura'), {'formato': 'csv'})
+        lineas = b''.join(respuesta.streaming_content).decode().splitlines()
+        self.assertEqual(lineas[0], 'ficha,programa,competencia,resultado,requeridas,programadas,diferencia,estado')
+        self.assertTrue(lineas[1].startswith('2500001,ADSO,Programación,,40,6'))
+
+
+class PlanificadorTests(HorariosTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        JornadaDia.objects.create(jornada=cls.jornada, Lunes=True, Martes=True, Miercoles=True, Jueves=True, Viernes=True)
+        Competencias.objects.create(nombre_competencia='Bases de datos', horas=30, programa_relacionado=cls.programa)
+        otro = Usuario.objects.create_user(10000003, None, username='otro', tipo='INSTRUCTOR')
+        cls.otro_instructor = Instructores.objects.create(user=otro, profesion='Diseñador')
+        cls.sala2 = Ambientes.objects.create(id_ambiente=2, nombre_ambiente='Sala 2')
+        # El líder está ocupado con otra ficha los lunes y miércoles de 6 a 9
+        otra_ficha = Fichas.objects.create(
+            id_ficha=2500002, id_programa=cls.programa, id_instructor_lider=cls.instructor,
+            id_ambiente=cls.sala2, id_jornada=cls.jornada, fecha_inicio=date(2026, 1, 5),
+        )
+        for dia in (0, 2, 7, 9):
+            cls.bloque((6,), (9,), id_ficha=otra_ficha, id_ambiente=cls.sala2,
+                       fecha=date(2026, 1, 5) + timedelta(days=dia)).save()
+
+    def plan(self, **opciones):
+        # 10 días de 6 h no alcanzan para las 70 h: el puntaje nunca es perfecto
+        resultado = planificar_ficha(self.ficha, date(2026, 1, 5), date(2026, 1, 16), **opciones)
+        bloques = [
+            (b.fecha, b.hora_inicio, b.hora_fin, b.id_instructor_id, b.id_ambiente_id, b.id_competencia_id)
+            for b in resultado.bloques
+        ]
+        return resultado, bloques
+
+    def test_misma_semilla_mismo_plan(self):
+        primero, bloques = self.plan(semilla=5, max_iteraciones=25)
+        segundo, otros = self.plan(semilla=5, max_iteraciones=25)
+        self.assertEqual((primero.iteraciones, segundo.iteraciones), (25, 25))
+        self.assertFalse(primero.cortado_por_tiempo)
+        self.assertEqual(bloques, otros)
+        self.assertEqual(primero.horas_programadas + primero.horas_sin_ubicar, 70)
+
+        # Con presupuesto de tiempo corta antes y lo informa
+        cortado, _ = self.plan(semilla=5, max_iteraciones=25, presupuesto=0)
+        self.assertEqual(cortado.iteraciones, 1)
+        self.assertTrue(cortado.reporte()['cortado_por_tiempo'])
+
+    def test_agrupar_fichas_por_recursos_compartidos(self):
+        # 1 y 3 comparten instructor; 3 y 4 comparten ambiente; 2 va sola
+        recursos = {1: ([10], [1]), 2: ([11], [2]), 3: ([10], [3]), 4: ([12], [3])}
+        self.assertEqual(agrupar_fichas(recursos), [[1, 3, 4], [2]])
+
+    def test_bloques_rechazados_vuelven_a_sin_ubicar(self):
+        # El planificador no ve las reglas recurrentes; la pasada final sí
+        HorarioRecurrente.objects.create(
+            id_ficha_id=2500002, id_instructor=self.instructor, id_ambiente=self.sala2,
+            id_jornada=self.jornada, id_competencia=self.competencia,
+            fecha_inicio=date(2026, 1, 5), fecha_fin=date(2026, 1, 16),
+            hora_inicio=time(9), hora_fin=time(12),
+        )
+        recursos = {self.ficha.id_ficha: ([self.instructor.pk], [self.ambiente.pk])}
+        reportes, creados, conflictos = planificar_fichas(
+            [self.ficha], date(2026, 1, 5), date(2026, 1, 16), recursos=recursos,
+            semilla=5, max_iteraciones=25, procesos=1,
+        )
+        self.assertTrue(conflictos)
+        reporte, = reportes
+        self.assertEqual(reporte['bloques'], len(creados))
+        horas = sum(
+            (b.hora_fin.hour - b.hora_inicio.hour) for b in creados
+        )
+        self.assertEqual(reporte['horas_programadas'], horas)
+        self.assertEqual(reporte['horas_programadas'] + reporte['horas_sin_ubicar'], 70)
+        self.assertEqual(sum(reporte['sin_ubicar'].values()), reporte['horas_sin_ubicar'])
+
+
+@skipIf(
+    connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME'],
+    'Los workers no ven la BD de prueba en memoria de SQLite',
+)
+class PlanificadorProcesosTests(HorariosTransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        JornadaDia.objects.create(jornada=self.jornada, Lunes=True, Martes=True, Miercoles=True, Jueves=True, Viernes=True)
+        otro = Usuario.objects.create_user(10000003, None, username='otro', tipo='INSTRUCTOR')
+        otro_instructor = Instructores.objects.create(user=otro, profesion='Diseñador')
+        sala2 = Ambientes.objects.create(id_ambiente=2, nombre_ambiente='Sala 2')
+        # Sin recursos en común: dos grupos que se reparten entre los workers
+        Fichas.objects.create(
+            id_ficha=2500002, id_programa=self.programa, id_instructor_lider=otro_instructor,
+            id_ambiente=sala2, id_jornada=self.jornada, fecha_inicio=date(2026, 1, 5),
+        )
+
+    def test_pool_igual_que_en_proceso(self):
+        opciones = {'semilla': 5, 'max_iteraciones': 10, 'guardar': False}
+        fichas = [2500001, 2500002]
+        en_proceso = planificar_fichas(fichas, date(2026, 1, 5), date(2026, 1, 9), procesos=1, **opciones)
+        con_pool = planificar_fichas(fichas, date(2026, 1, 5), date(2026, 1, 9), procesos=2, **opciones)
+        self.assertEqual(len(en_proceso[0]), 2)
+        self.assertEqual(en_proceso[0], con_pool[0])
+        self.assertEqual(len(en_proceso[2]), len(con_pool[2]))
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+app_name = 'consultas'
+
+urlpatterns = [
+    path("cobertura/", views.cobertura, name="cobertura"),
+    path("api/<str:consulta>/", views.api_consulta, name="api_consulta"),
+    path("semana/<str:alcance>/<int:pk>/", views.semana, name="semana"),
+    path("exportar/<str:alcance>/<int:pk>/", views.exportar_horario, name="exportar_horario"),
+]
@@ -1,9 +1,201 @@
+from datetime import date, datetime, timedelta
+from functools import wraps
+
 from django.shortcuts import render
+from django.http import (
+    FileResponse, Http404, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+)
 from django.views.generic import TemplateView
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from Models.models import Instructores
+from Models.versiones import AMBITO_GLOBAL, version_de
+from .api import CONSULTAS, ejecutar_consulta
+from .cobertura import cobertura_fichas, filas_csv
+from .consultas import horario_instructor_semana, horario_ficha, horario_por_jornada
+from .exportar import archivo_xlsx, escribir_csv, lineas_csv, lineas_ics
+from .grilla import ALCANCES_GRILLA, GrillaSemana, TTL_GRILLA
+
+
+def coordinador_requerido(vista):
+    """Solo coordinadores (o superusuarios) logueados."""
+    @login_required
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if request.user.is_superuser or getattr(request.user, 'tipo', None) == 'COORDINADOR':
+            return vista(request, *args, **kwargs)
+        return HttpResponseForbidden("No tienes permiso para ver esta consulta.")
+    return envoltura
+
+
+def etag_consultas(request, consulta=None, *args, **kwargs):
+    # Ambientes e instructores disponibles dependen de tablas sin versión: sin ETag.
+    # El usuario va en la etiqueta: la página incluye datos de su sesión.
+    if (consulta or request.GET.get("consulta")) in ("ambientes", "instructores"):
+        return None
+    return f"g{version_de(AMBITO_GLOBAL)[0]}-u{request.user.pk}"
+
+
+# (parámetro, etiqueta, tipo de input) del formulario del panel
+FILTROS_PANEL = (
+    ("ficha", "Ficha", "number"), ("jornada", "Jornada (id)", "number"),
+    ("instructor", "Instructor (id)", "number"), ("ambiente", "Ambiente (id)", "number"),
+    ("fecha", "Fecha", "date"), ("hora_inicio", "Hora inicio", "time"), ("hora_fin", "Hora fin", "time"),
+    ("desde", "Desde", "date"), ("hasta", "Hasta", "date"),
+    ("campos", "Campos (a,b,c)", "text"), ("limite", "Límite", "number"),
+)
+
+
 # Create your views here.
+@method_decorator(coordinador_requerido, name='dispatch')
+@method_decorator(cache_control(private=True, no_cache=True), name='dispatch')
+@method_decorator(condition(etag_func=etag_consultas), name='dispatch')
 class Panel_administrativo(TemplateView):
-    template_name= 'html/consultas/panel_consultas.html'
\ No newline at end of file
+    template_name= 'html/consultas/panel_consultas.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        params = self.request.GET
+        context["consultas"] = CONSULTAS
+        context["consulta"] = params.get("consulta", "")
+        context["filtros"] = [(c, e, t, params.get(c, "")) for c, e, t in FILTROS_PANEL]
+        if context["consulta"] in CONSULTAS:
+            try:
+                resultado = ejecutar_consulta(context["consulta"], params)
+                context["resultado"] = resultado
+                context["filas"] = [[fila[c] for c in resultado["campos"]] for fila in resultado["resultados"]]
+            except ValueError as e:
+                context["error"] = str(e) or "Parámetros inválidos"
+            sin_cursor = params.copy()
+            sin_cursor.pop("cursor", None)
+            context["query"] = sin_cursor.urlencode()
+        return context
+
+
+# Consulta en JSON: /consultas/api/<consulta>/?campos=...&limite=...&cursor=...
+@coordinador_requerido
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etag_consultas)
+def api_consulta(request, consulta):
+    if consulta not in CONSULTAS:
+        raise Http404
+    try:
+        return JsonResponse(ejecutar_consulta(consulta, request.GET))
+    except ValueError as e:
+        return JsonResponse({"error": str(e) or "Parámetros inválidos"}, status=400)
+
+
+def _ids(valores):
+    return [int(v) for v in valores if v.strip().isdigit()]
+
+
+# Cobertura de horas programadas vs. requeridas por ficha / competencia / resultado
+@coordinador_requerido
+def cobertura(request):
+    fichas = _ids(request.GET.getlist("ficha")) or None
+    programa = request.GET.get("programa")
+    programa = int(programa) if programa and programa.isdigit() else None
+    reporte = cobertura_fichas(fichas=fichas, programa=programa)
+
+    if request.GET.get("formato") == "csv":
+        response = StreamingHttpResponse(escribir_csv(filas_csv(reporte)), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = 'attachment; filename="cobertura.csv"'
+        return response
+
+    return render(request, "html/consultas/cobertura.html", {
+        "reporte": reporte,
+        "query": request.GET.urlencode(),
+    })
+
+
+# Exportación de horarios por instructor, ficha o jornada (CSV / XLSX / ICS)
+FORMATOS_EXPORTACION = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "ics": "text/calendar; charset=utf-8",
+}
+
+
+def _fecha(valor):
+    return datetime.strptime(valor, "%Y-%m-%d").date() if valor else None
+
+
+def puede_ver_horario(request, alcance, pk):
+    """Coordinadores ven cualquier horario; un instructor solo el suyo."""
+    if request.user.is_superuser or getattr(request.user, "tipo", None) == "COORDINADOR":
+        return True
+    return alcance == "instructor" and Instructores.objects.filter(pk=pk, user=request.user).exists()
+
+
+@login_required
+def exportar_horario(request, alcance, pk):
+    if alcance not in ("instructor", "ficha", "jornada"):
+        raise Http404
+    formato = request.GET.get("formato", "csv")
+    if formato not in FORMATOS_EXPORTACION:
+        return HttpResponseBadRequest("Formato inválido (csv, xlsx o ics).")
+    try:
+        desde, hasta = _fecha(request.GET.get("desde")), _fecha(request.GET.get("hasta"))
+    except ValueError:
+        return HttpResponseBadRequest("Fechas inválidas (YYYY-MM-DD).")
+    if desde and hasta and desde > hasta:
+        return HttpResponseBadRequest("'desde' no puede ser posterior a 'hasta'.")
+
+    if not puede_ver_horario(request, alcance, pk):
+        return HttpResponseForbidden("No tienes permiso para exportar este horario.")
+
+    if alcance == "instructor":
+        # Siempre un rango acotado: sin fechas, la semana actual; con una sola, la semana que empieza o termina en ella
+        if desde is None and hasta is None:
+            desde = date.today() - timedelta(days=date.today().weekday())
+        if desde is None:
+            desde = hasta - timedelta(days=6)
+        qs = horario_instructor_semana(pk, desde, hasta or desde + timedelta(days=6))
+    else:
+        qs = horario_ficha(pk) if alcance == "ficha" else horario_por_jornada(pk)
+        if desde:
+            qs = qs.filter(fecha__gte=desde)
+        if hasta:
+            qs = qs.filter(fecha__lte=hasta)
+
+    nombre = f"horario_{alcance}_{pk}"
+    if formato == "xlsx":
+        try:
+            archivo = archivo_xlsx(qs)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+        return FileResponse(
+            archivo, as_attachment=True, filename=f"{nombre}.xlsx",
+            content_type=FORMATOS_EXPORTACION["xlsx"],
+        )
+
+    lineas = lineas_csv(qs) if formato == "csv" else lineas_ics(qs, nombre)
+    response = StreamingHttpResponse(lineas, content_type=FORMATOS_EXPORTACION[formato])
+    response["Content-Disposition"] = f'attachment; filename="{nombre}.{formato}"'
+    return response
+
+
+# Grilla semanal renderizada en el servidor (instructor, ficha o ambiente)
+@login_required
+def semana(request, alcance, pk):
+    if alcance not in ALCANCES_GRILLA:
+        raise Http404
+    try:
+        fecha = _fecha(request.GET.get("fecha")) or date.today()
+    except ValueError:
+        return HttpResponseBadRequest("Fecha inválida (YYYY-MM-DD).")
+    if not puede_ver_horario(request, alcance, pk):
+        return HttpResponseForbidden("No tienes permiso para ver este horario.")
+
+    return render(request, "html/consultas/semana.html", {
+        "grilla": GrillaSemana(alcance, pk, fecha),
+        "ttl_grilla": TTL_GRILLA,
+        "titulo": f"{alcance.capitalize()} {pk}",
+        "alcance": alcance,
+        "pk": pk,
+        "formatos": FORMATOS_EXPORTACION,
+    })